@@ -15,35 +15,92 @@ Alternative: If uiautomator2 doesn't work, we can use adb commands via subproces
 
 import time
 import os
-import subprocess
+import re
+import threading
+import contextlib
 from pathlib import Path
 
-try:
-    import uiautomator2 as u2
-    USE_UIAUTOMATOR = True
-except ImportError:
-    USE_UIAUTOMATOR = False
+from startup import STARTUP, lazy_module, module_available, ensure_loaded
+
+# Heavy dependencies are only detected here and imported on first use,
+# so start-up does not pay for engines a run never touches
+USE_UIAUTOMATOR = module_available('uiautomator2')
+if not USE_UIAUTOMATOR:
     print("⚠️  uiautomator2 not available, will use ADB commands")
 
-try:
-    from PIL import Image, ImageOps, ImageEnhance
-    import numpy as np
-    IMAGE_PROCESSING_AVAILABLE = True
-except ImportError:
-    IMAGE_PROCESSING_AVAILABLE = False
+IMAGE_PROCESSING_AVAILABLE = module_available('PIL') and module_available('numpy')
+Image = lazy_module('PIL.Image')
+np = lazy_module('numpy')
+if not IMAGE_PROCESSING_AVAILABLE:
     print("⚠️  Image processing libraries not available - install pillow and numpy")
 
-try:
-    import pytesseract
+from tesseract_engine import create_resident_tesseract, resident_tesseract_available, PSM_SINGLE_BLOCK
+
+OCR_WHITELIST = '0123456789/:$'
+
+pytesseract = lazy_module('pytesseract')
+easyocr = lazy_module('easyocr')
+PYTESSERACT_AVAILABLE = module_available('pytesseract')
+EASYOCR_AVAILABLE = module_available('easyocr')
+if PYTESSERACT_AVAILABLE:
     OCR_ENGINE = 'pytesseract'
-except ImportError:
-    try:
-        import easyocr
-        reader = easyocr.Reader(['en'])
-        OCR_ENGINE = 'easyocr'
-    except ImportError:
-        OCR_ENGINE = None
-        print("⚠️  OCR not available - install pytesseract or easyocr")
+elif resident_tesseract_available():
+    # tesserocr / libtesseract work without the pytesseract wrapper
+    OCR_ENGINE = 'pytesseract'
+elif EASYOCR_AVAILABLE:
+    OCR_ENGINE = 'easyocr'
+else:
+    OCR_ENGINE = None
+    print("⚠️  OCR not available - install pytesseract or easyocr")
+
+# Template glyph recognizer - replaces the OCR engine once a glyph bank was learned
+# (see glyph_ocr.py for how to collect samples and learn the bank)
+GLYPH_BANK_FILE = "glyph_bank.npz"
+GLYPH_OCR_AVAILABLE = IMAGE_PROCESSING_AVAILABLE
+glyph_ocr = lazy_module('glyph_ocr')
+if GLYPH_OCR_AVAILABLE and os.path.exists(GLYPH_BANK_FILE):
+    OCR_ENGINE = 'template'
+
+_ocr_models = {}
+
+
+def get_easyocr_reader():
+    """Create the easyocr reader (loads torch models) on first use"""
+    if 'easyocr' not in _ocr_models:
+        ensure_loaded(easyocr)
+        with STARTUP.measure('easyocr.Reader', 'engine'):
+            _ocr_models['easyocr'] = easyocr.Reader(['en'])
+    return _ocr_models['easyocr']
+
+
+def get_glyph_bank():
+    """Load the learned glyph bank on first use"""
+    if 'template' not in _ocr_models:
+        with STARTUP.measure(GLYPH_BANK_FILE, 'engine'):
+            _ocr_models['template'] = glyph_ocr.GlyphBank.load(GLYPH_BANK_FILE)
+        print(f"✅ Template OCR: {len(_ocr_models['template'])} glyphs loaded")
+    return _ocr_models['template']
+
+
+from frames import FrameCache, load_frame
+from device_backend import Uiautomator2Backend, ShellBackend, FakeDevice
+from backend_select import BackendSelector
+from waiting import PollPolicy, ScreenSettled, wait_until, summarize_waits
+from pipeline import Pipeline, AnalyzedState
+from run_trace import TraceWriter
+from clock import SystemClock
+from metrics import Metrics, MetricsExporter
+from structured_log import StructuredLogger
+from debug_frames import DebugFrameWriter
+
+# numpy-backed helpers, loaded on first use like numpy itself
+ocr_cache_lib = lazy_module('ocr_cache')
+OCR_CACHE_AVAILABLE = IMAGE_PROCESSING_AVAILABLE
+ocr_batch = lazy_module('ocr_batch')
+ocr_preprocess = lazy_module('ocr_preprocess')
+change_detection = lazy_module('change_detection')
+pixel_probes = lazy_module('pixel_probes')
+ocr_pool = lazy_module('ocr_pool')
 
 
 # Try to load config helper
@@ -57,40 +114,28 @@ except ImportError:
 class AndroidAutomation:
     """Android automation class for game automation"""
     
-    def __init__(self, game_package_name=None):
+    def __init__(self, game_package_name=None, backend=None, clock=None, read_only=False):
         # Game package name (e.g., "com.example.game")
         # Leave None to use current foreground app
         self.game_package = game_package_name
         
-        # Initialize device connection
-        if USE_UIAUTOMATOR:
-            try:
-                # Connect to device - works standalone without computer!
-                # Try local connection first (standalone mode)
-                try:
-                    self.device = u2.connect()  # Auto-detect device
-                    print("✅ Connected via uiautomator2 (standalone mode)")
-                except:
-                    # Try connecting to localhost (for wireless ADB)
-                    try:
-                        self.device = u2.connect('127.0.0.1:5555')
-                        print("✅ Connected via uiautomator2 (wireless ADB)")
-                    except:
-                        raise
-            except Exception as e:
-                print(f"⚠️  uiautomator2 connection failed: {e}")
-                print("   Make sure uiautomator2 is initialized:")
-                print("   Run: python -m uiautomator2 init")
-                USE_UIAUTOMATOR = False
-                self.device = None
-        else:
-            self.device = None
-            print("⚠️  uiautomator2 not available")
-            print("   Install it for standalone operation: pip install uiautomator2")
+        # read_only: the config is still read, but no directory or file is created (replay.py)
+        self.read_only = read_only
+        
+        # Every timestamp and sleep goes through the clock (replay.py uses a virtual one)
+        self.clock = clock or SystemClock()
+        
+        # Device access (see device_backend.py) - connected after the config is loaded
+        self.backend = backend
+        self.device_backend = 'auto'  # 'auto', 'uiautomator2', 'shell' or 'fake'
+        self.fake_frames = None  # screenshots directory for the fake device
+        # 'auto' times the capture/tap paths once per device and keeps the fastest
+        self.backend_probe = True
+        self.backend_cache_file = "backend_choice.json"
         
         # Screenshots directory
         self.screenshots_dir = Path("/sdcard/automation_screenshots")
-        if not self.screenshots_dir.exists():
+        if not read_only and not self.screenshots_dir.exists():
             try:
                 self.screenshots_dir.mkdir(parents=True, exist_ok=True)
             except:
@@ -98,6 +143,18 @@ class AndroidAutomation:
                 self.screenshots_dir = Path("screenshots")
                 self.screenshots_dir.mkdir(exist_ok=True)
         
+        # Only write captures to screenshots_dir when asked to (debug)
+        self.save_screenshots = False
+        # Written to screenshots_dir/debug by a background thread (see debug_frames.py);
+        # only the newest are kept
+        self.screenshots_keep = 200
+        self.screenshots_max_mb = 200
+        self.screenshot_format = 'png'  # 'png' (fast compression), 'bmp' or 'jpg'
+        # Frames behind resets, unreadable OCR and errors go to screenshots_dir/anomalies
+        self.save_anomalies = True
+        self.anomalies_keep = 50
+        self.debug_frames = None
+        
         # Screen dimensions (will be set after first screenshot)
         self.screen_width = None
         self.screen_height = None
@@ -111,6 +168,89 @@ class AndroidAutomation:
         self.final_step_target = '20/30'
         self.click_delay = 1.0  # seconds
         self.reset_clicks_delay = 0.05  # seconds
+        self.frame_cache_ttl = 0.5  # seconds a capture is reused when no tap happened
+        
+        # Shell capture: 'raw' pipes the framebuffer (fast), 'png' uses screencap -p
+        # (None: the backend probe picks one, 'raw' without it)
+        self.capture_method = None
+        self.screencap_command = 'screencap'
+        
+        # Shell taps: 'input' (persistent shell) or 'sendevent' (raw touch events, no JVM)
+        # (None: the backend probe picks one, 'input' without it)
+        self.tap_method = None
+        
+        # OCR cache: repeated crops skip the engine (set a file to keep it between runs)
+        self.ocr_cache_size = 256
+        self.ocr_cache_file = None
+        
+        # OCR preprocessing: 'median' or 'otsu' threshold, integer upscale for small text
+        self.ocr_threshold_method = 'median'
+        self.ocr_upscale = 1
+        self.ocr_preprocessor = None
+        
+        # Extra color probes from the config (popups, dialogs...), see pixel_probes.py
+        self.extra_probes = []
+        self.probe_set = None
+        self._probed_frame = None
+        self._probe_results = None
+        
+        # Skip color checks / OCR on regions whose pixels did not change
+        self.change_detection = True
+        self.change_stride = 4  # compare every 4th button pixel in both directions (OCR regions: all)
+        self.change_fraction = 0.0  # share of pixels that may change without counting as changed
+        self.change_delta = 32  # per-pixel difference (0-255) that counts as a changed pixel
+        
+        # Keep one tesseract engine loaded instead of starting tesseract per read
+        self.use_resident_tesseract = True
+        self.tesseract_engine = None
+        
+        # OCR engine picked at import time; ocr_reader(binary) replaces it when set
+        # (replay.py answers OCR from a recorded trace)
+        self.ocr_engine = OCR_ENGINE
+        self.ocr_reader = None
+        
+        # OCR in worker processes (one warm engine each) - 0 keeps it in this process
+        self.ocr_workers = 0
+        self.ocr_pool = None
+        
+        # Record crops, OCR results, taps and waits of each run (see run_trace.py)
+        self.trace_dir = None
+        self.trace = None
+        
+        # Loop messages go through a structured log written on a background thread
+        # (see structured_log.py): a rotating JSONL file plus a rate-limited console
+        self.log_file = "logs/automation.jsonl"  # None: console only
+        self.log_level = 'info'  # lowest level written to the file
+        self.log_console = True
+        self.log_console_level = 'info'
+        self.log_console_rate = 20  # console lines per second, the rest only go to the file
+        self.log_max_bytes = 5 * 1024 * 1024  # rotate the file at this size
+        self.log_backups = 3
+        
+        # Time per phase and counters (see metrics.py) - written to metrics_dir if set
+        self.metrics = Metrics(self.clock)
+        self.metrics_dir = None
+        self.metrics_interval = 10.0  # seconds between snapshots
+        self.metrics_exporter = None
+        
+        # Store every tesseract/easyocr read as a labeled crop for glyph_ocr.py
+        self.glyph_samples_dir = None
+        
+        # Waits poll the screen and return early; delays become upper bounds
+        self.poll_initial = 0.05  # seconds before the first re-check
+        self.poll_max = 0.5  # backoff ceiling between checks
+        self.settle_polls = 2  # unchanged polls in a row before the screen counts as settled
+        self.settle_stable = 0.3  # ... spanning at least this many seconds
+        self.wait_log = []
+        
+        # Capture and analysis run on background threads while the loop decides
+        self.use_pipeline = True
+        self.pipeline_depth = 2  # frames queued between capture and analysis
+        self.pipeline_interval = 0.2  # seconds between captures while the loop asks for none
+        self.pipeline = None
+        self.analysis_lock = threading.RLock()
+        self.last_tap_time = 0.0
+        self.settled_time = 0.0  # capture time of the frame the last settle wait ended on
         
         # Coordinates (adjust for your screen size)
         self.start_click_x = 150
@@ -166,6 +306,71 @@ class AndroidAutomation:
             config = load_config()
             if config:
                 apply_config_to_automation(self, config)
+        
+        self.log = StructuredLogger(None if read_only else self.log_file, self.log_level, self.log_console,
+                                    self.log_console_level, self.log_console_rate,
+                                    max_bytes=self.log_max_bytes, backups=self.log_backups,
+                                    now=self.clock.time)
+        
+        if self.backend is None:
+            self.backend = self.create_backend()
+        
+        # One capture serves every check until the next tap or the TTL runs out
+        self.frame_cache = FrameCache(self.capture_frame, ttl=self.frame_cache_ttl, now=self.clock.time)
+        
+        self.ocr_cache = None
+        if OCR_CACHE_AVAILABLE and self.ocr_cache_size > 0:
+            self.ocr_cache = ocr_cache_lib.OCRCache(self.ocr_cache_size, self.ocr_cache_file)
+        
+        self.change_detector = None
+        if IMAGE_PROCESSING_AVAILABLE and self.change_detection:
+            self.change_detector = change_detection.RegionChangeDetector(
+                self.change_stride, self.change_fraction, self.change_delta)
+        
+        self.glyph_samples = None
+        if GLYPH_OCR_AVAILABLE and self.glyph_samples_dir and self.ocr_engine != 'template' and not read_only:
+            self.glyph_samples = glyph_ocr.GlyphSampleWriter(self.glyph_samples_dir)
+        
+        self.poll_policy = PollPolicy(self.poll_initial, maximum=self.poll_max)
+    
+    def create_backend(self):
+        """Connect to the device with the configured backend"""
+        if self.device_backend == 'fake':
+            backend = FakeDevice(self.fake_frames or self.screenshots_dir, clock=self.clock)
+            print(f"✅ Fake device: {len(backend.frames)} frames from {self.fake_frames or self.screenshots_dir}")
+            return backend
+        
+        if self.device_backend == 'auto' and self.backend_probe:
+            selector = BackendSelector(self.backend_cache_file, screencap_command=self.screencap_command,
+                                       use_uiautomator=USE_UIAUTOMATOR)
+            try:
+                with STARTUP.measure('backend selection', 'connect'):
+                    # Methods set in the config are kept, only the others are probed
+                    backend, choice = selector.select(self.capture_method, self.tap_method)
+                return backend
+            except Exception as e:
+                print(f"⚠️  Backend probe failed, using defaults: {e}")
+                if self.capture_method or self.tap_method:
+                    return self.shell_backend()
+                return selector.u2_backend or self.shell_backend()
+        
+        if self.device_backend in ('auto', 'uiautomator2'):
+            if USE_UIAUTOMATOR:
+                try:
+                    # Connect to device - works standalone without computer!
+                    return Uiautomator2Backend.connect()
+                except Exception as e:
+                    print(f"⚠️  uiautomator2 connection failed: {e}")
+                    print("   Make sure uiautomator2 is initialized:")
+                    print("   Run: python -m uiautomator2 init")
+            else:
+                print("⚠️  uiautomator2 not available")
+                print("   Install it for standalone operation: pip install uiautomator2")
+        
+        return self.shell_backend()
+    
+    def shell_backend(self):
+        return ShellBackend(self.capture_method or 'raw', self.screencap_command, self.tap_method or 'input')
     
     def switch_to_game(self):
         """Switch to the game app - works standalone without computer"""
@@ -174,73 +379,38 @@ class AndroidAutomation:
             return True
         
         try:
-            if USE_UIAUTOMATOR and self.device:
-                # Method 1: Use uiautomator2 (works standalone, no computer needed)
-                try:
-                    self.device.app_start(self.game_package)
-                    print(f"✅ Opening game: {self.game_package}")
-                    time.sleep(3)  # Wait for app to load
-                    
-                    # Verify app is in foreground
-                    current_app = self.device.app_current()
-                    if current_app.get('package') == self.game_package:
-                        print(f"✅ Game is now in foreground!")
-                        return True
-                    else:
-                        print(f"⚠️  App started but may not be in foreground")
-                        print(f"   Current app: {current_app.get('package', 'unknown')}")
-                        # Try bringing to front
-                        self.device.app_start(self.game_package, stop=True)
-                        time.sleep(2)
-                        return True
-                except Exception as e:
-                    print(f"⚠️  uiautomator2 app_start failed: {e}")
-                    # Try alternative method
-                    pass
-            
-            # Method 2: Try using Android's am (Activity Manager) via shell
-            # This works if you have shell access (root or ADB over network)
-            try:
-                # Try to launch app using am start
-                result = subprocess.run(
-                    ['sh', '-c', f'am start -n {self.game_package}/.MainActivity'],
-                    capture_output=True,
-                    text=True,
-                    timeout=5
-                )
-                if result.returncode == 0:
-                    print(f"✅ Opened game using am start")
-                    time.sleep(3)
+            reference = self.get_frame()
+            method = self.backend.start_app(self.game_package)
+            if method:
+                print(f"✅ Opening game: {self.game_package} ({method})")
+                if self.backend.current_app() is None:
+                    # The backend cannot tell the foreground app - wait for the screen
+                    self.wait_for_screen_settled(reference, 3, 'app start')
                     return True
-            except:
-                pass
-            
-            # Method 3: Try monkey command (if available)
-            try:
-                result = subprocess.run(
-                    ['sh', '-c', f'monkey -p {self.game_package} -c android.intent.category.LAUNCHER 1'],
-                    capture_output=True,
-                    text=True,
-                    timeout=5
-                )
-                if result.returncode == 0:
-                    print(f"✅ Opened game using monkey")
-                    time.sleep(3)
+                
+                # Wait for app to load (up to 3 seconds)
+                if self.wait_for(self.game_in_foreground, 3, 'app start'):
+                    print(f"✅ Game is now in foreground!")
                     return True
-            except:
-                pass
+                
+                print(f"⚠️  App started but may not be in foreground")
+                print(f"   Current app: {self.backend.current_app() or 'unknown'}")
+                # Try bringing to front
+                self.backend.start_app(self.game_package, restart=True)
+                self.wait_for(self.game_in_foreground, 2, 'app restart')
+                return True
             
             print(f"⚠️  Could not automatically open game")
             print(f"   Please manually open the game now")
             print(f"   Waiting 5 seconds...")
-            time.sleep(5)
+            self.sleep(5, 'manual app switch')
             return True  # Return True anyway, user can open manually
             
         except Exception as e:
             print(f"⚠️  Error opening game: {e}")
             print(f"   Please manually open the game")
             print(f"   Waiting 5 seconds...")
-            time.sleep(5)
+            self.sleep(5, 'manual app switch')
             return True
     
     def get_screen_size(self):
@@ -249,35 +419,16 @@ class AndroidAutomation:
             return {'width': self.screen_width, 'height': self.screen_height}
         
         try:
-            if USE_UIAUTOMATOR and self.device:
-                # Method 1: Use uiautomator2 (works standalone)
-                info = self.device.info
-                self.screen_width = info['displayWidth']
-                self.screen_height = info['displayHeight']
+            size = self.backend.screen_size()
+            if size:
+                self.screen_width, self.screen_height = size
             else:
-                # Method 2: Try shell command (works if shell access available)
-                try:
-                    result = subprocess.run(
-                        ['sh', '-c', 'wm size'],
-                        capture_output=True,
-                        text=True,
-                        timeout=2
-                    )
-                    if result.returncode == 0:
-                        # Parse output like "Physical size: 1080x1920"
-                        size_str = result.stdout.split()[-1]
-                        w, h = map(int, size_str.split('x'))
-                        self.screen_width = w
-                        self.screen_height = h
-                except:
-                    # Method 3: Get from screenshot
-                    screenshot_path = self.take_screenshot()
-                    if screenshot_path and os.path.exists(screenshot_path):
-                        img = Image.open(screenshot_path)
-                        self.screen_width = img.width
-                        self.screen_height = img.height
+                # Get from a captured frame (sets screen size itself)
+                self.capture_frame()
         except Exception as e:
             print(f"⚠️  Could not get screen size: {e}")
+        
+        if not (self.screen_width and self.screen_height):
             # Default values (will be updated from screenshot)
             self.screen_width = 1080
             self.screen_height = 1920
@@ -287,207 +438,703 @@ class AndroidAutomation:
     def click(self, x, y, delay=0):
         """Click at coordinates - works standalone"""
         try:
-            if USE_UIAUTOMATOR and self.device:
-                # Method 1: Use uiautomator2 (works standalone, no computer needed)
-                self.device.click(x, y)
-            else:
-                # Method 2: Try shell command (works if shell access available)
-                try:
-                    subprocess.run(
-                        ['sh', '-c', f'input tap {x} {y}'],
-                        check=False,
-                        timeout=2
-                    )
-                except:
-                    print(f"⚠️  Click method not available - install uiautomator2 for best results")
-                    return False
+            try:
+                with self.metrics.span('tap'):
+                    self.backend.tap(x, y)
+                self.metrics.count('taps')
+            except Exception as e:
+                self.log.warning(f"⚠️  Click method not available - install uiautomator2 for best results ({e})")
+                return False
+            
+            # The screen is about to change, so cached frames are stale
+            self.last_tap_time = self.clock.time()
+            self.frame_cache.invalidate()
+            if self.trace is not None:
+                self.trace.tap(x, y)
             
             if delay > 0:
-                time.sleep(delay)
+                self.sleep(delay, 'click delay')
             return True
         except Exception as e:
-            print(f"❌ Click failed at ({x}, {y}): {e}")
+            self.log.error(f"❌ Click failed at ({x}, {y}): {e}")
             return False
     
-    def take_screenshot(self, output_path=None):
-        """Take screenshot and return path - works standalone"""
+    def click_sequence(self, steps):
+        """Tap a chain of [(x, y, delay), ...] in one round-trip to the device
+        
+        Delays between taps are enforced on the device side. Falls back to
+        individual click() calls if the batched path fails.
+        """
         try:
-            if output_path is None:
-                timestamp = int(time.time() * 1000)
-                output_path = self.screenshots_dir / f"screenshot_{timestamp}.png"
+            # Includes the delays when they run on the device
+            with self.metrics.span('tap_chain'):
+                self.backend.tap_sequence(steps)
+            self.metrics.count('taps', len(steps))
+            self.last_tap_time = self.clock.time()
+            self.frame_cache.invalidate()
+            if self.trace is not None:
+                self.trace.taps(steps)
+            return True
+        except Exception as e:
+            self.log.warning(f"⚠️  Batched clicks failed, clicking one by one: {e}")
+            return all([self.click(x, y, delay) for x, y, delay in steps])
+    
+    def click_and_settle(self, x, y, timeout):
+        """Click, then wait until the screen has reacted and stopped changing
+        
+        Returns as soon as the transition is over; waits the full timeout
+        (like click(x, y, timeout)) if the tap changes nothing on screen.
+        """
+        reference = self.get_frame()
+        if not self.click(x, y):
+            return False
+        # The regions the loop reads next: a change there alone ends the wait
+        self.wait_for_screen_settled(reference, timeout, 'tap settle', regions=self.watched_regions())
+        return True
+    
+    def tap_latency_stats(self):
+        """Measured per-tap latency of the backend (empty with uiautomator2)"""
+        return self.backend.latency_stats()
+    
+    def capture_frame(self):
+        """Capture the screen into memory and return a Frame - works standalone"""
+        try:
+            started = self.clock.monotonic()
+            with self.metrics.span('capture'):
+                frame = self.backend.capture()
+            if frame is None:
+                return None
+            self.metrics.count('captures')
             
-            if USE_UIAUTOMATOR and self.device:
-                # Method 1: Use uiautomator2 (works standalone, no computer needed)
-                self.device.screenshot(str(output_path))
-            else:
-                # Method 2: Try shell command (works if shell access available)
-                try:
-                    temp_path = "/sdcard/screenshot_temp.png"
-                    # Take screenshot
-                    subprocess.run(
-                        ['sh', '-c', f'screencap -p {temp_path}'],
-                        check=False,
-                        timeout=5
-                    )
-                    # Copy to local path
-                    if os.path.exists(temp_path):
-                        import shutil
-                        shutil.copy(temp_path, str(output_path))
-                    else:
-                        # Try direct path
-                        output_path = Path(temp_path)
-                except Exception as e:
-                    print(f"⚠️  Screenshot via shell failed: {e}")
-                    print(f"   Install uiautomator2 for better screenshot support")
-                    return None
+            # Pixels are needed by every check (PNG / PIL captures are converted here once)
+            with self.metrics.span('decode'):
+                frame.array
             
-            # Update screen size from screenshot
-            if IMAGE_PROCESSING_AVAILABLE and os.path.exists(output_path):
-                img = Image.open(output_path)
-                self.screen_width = img.width
-                self.screen_height = img.height
+            # Update screen size from the frame (no extra decode needed)
+            self.screen_width = frame.width
+            self.screen_height = frame.height
             
-            return str(output_path)
+            if self.save_screenshots and self.get_debug_frames():
+                self.debug_frames.save(frame)
+            if self.trace is not None:
+                self.trace.frame(frame, self.trace_regions(), self.clock.monotonic() - started)
+            
+            return frame
         except Exception as e:
-            print(f"❌ Screenshot failed: {e}")
+            self.log.error(f"❌ Screenshot failed: {e}")
             return None
     
-    def recognize_text(self, image_path, region=None):
-        """Perform OCR on image or region"""
-        if OCR_ENGINE is None:
-            return {'text': '', 'confidence': 0}
+    def get_frame(self, max_age=None):
+        """Return a recent frame, reusing the cached capture while it is fresh
         
+        While the pipeline runs this is the newest frame of its capture thread
+        taken after the last tap.
+        """
+        if self.pipeline is not None and self.pipeline.serving:
+            if max_age is None:
+                max_age = self.frame_cache_ttl
+            frame = self.pipeline.frame(after=max(self.last_tap_time, self.clock.time() - max_age))
+            if frame is not None:
+                return frame
+        return self.frame_cache.get(max_age)
+    
+    def start_pipeline(self):
+        """Start the capture and analysis threads"""
+        if not self.use_pipeline or not IMAGE_PROCESSING_AVAILABLE or self.pipeline is not None:
+            return self.pipeline
+        self.pipeline = Pipeline(self.capture_frame, self.analyze_frame, depth=self.pipeline_depth,
+                                 interval=self.pipeline_interval, clock=self.clock)
+        self.pipeline.start()
+        self.log.info(f"✅ Pipeline running (capture + analysis threads, queue depth {self.pipeline_depth})")
+        return self.pipeline
+    
+    def pipeline_paused(self):
+        """Block in which the pipeline captures nothing (sleeps, resets)"""
+        if self.pipeline is None:
+            return contextlib.nullcontext()
+        return self.pipeline.paused()
+    
+    def stop_pipeline(self):
+        """Stop the background threads and return their counters"""
+        if self.pipeline is None:
+            return None
+        self.pipeline.stop()
+        stats = self.pipeline.stats()
+        self.pipeline = None
+        return stats
+    
+    def watched_regions(self):
+        """Button, step and amount regions (what a tap is expected to change)"""
+        button = (self.button_x, self.button_y, self.button_width, self.button_height)
+        return [button] + list(self.step_regions().values())
+    
+    def step_regions(self):
+        """The step text above the button and the amount below it"""
+        return {
+            'step': (self.ocr_above_x, self.ocr_above_y,
+                     self.ocr_above_width, self.ocr_above_height),
+            'amount': (self.ocr_second_x, self.ocr_second_y,
+                       self.ocr_second_width, self.ocr_second_height),
+        }
+    
+    def timer_region(self):
+        """Timer OCR region (use config if available, otherwise default)"""
+        if self.timer_ocr_x is not None:
+            return (self.timer_ocr_x, self.timer_ocr_y,
+                    self.timer_ocr_width, self.timer_ocr_height)
+        # Default: button region + offset
+        return (self.button_x + 30, self.button_y + 30,
+                self.button_width - 30, self.button_height)
+    
+    def trace_regions(self):
+        """Regions whose crops go into the trace for every captured frame"""
+        regions = dict(self.step_regions())
+        regions['button'] = (self.button_x, self.button_y, self.button_width, self.button_height)
+        regions['timer'] = self.timer_region()
+        for probe in self.extra_probes:
+            region = probe['region']
+            regions[probe['name']] = (region['x'], region['y'], region['width'], region['height'])
+        return regions
+    
+    def start_trace(self):
+        """Open a trace archive in trace_dir (if set)"""
+        if not self.trace_dir or self.trace is not None or not IMAGE_PROCESSING_AVAILABLE:
+            return self.trace
+        try:
+            trace_dir = Path(self.trace_dir)
+            trace_dir.mkdir(parents=True, exist_ok=True)
+            path = trace_dir / time.strftime("trace_%Y%m%d_%H%M%S.trc")
+            self.trace = TraceWriter(path, clock=self.clock)
+            print(f"📼 Tracing to {path}")
+        except Exception as e:
+            print(f"⚠️  Could not start trace: {e}")
+            self.trace = None
+        return self.trace
+    
+    def stop_trace(self):
+        """Flush and close the trace, returns its counters"""
+        if self.trace is None:
+            return None
+        self.trace.close()
+        stats = self.trace.stats()
+        self.trace = None
+        return stats
+    
+    def start_metrics(self):
+        """Write metrics snapshots to metrics_dir (if set) every metrics_interval seconds"""
+        if not self.metrics_dir or self.metrics_exporter is not None:
+            return self.metrics_exporter
         try:
-            if not os.path.exists(image_path):
+            self.metrics_exporter = MetricsExporter(self.metrics, self.metrics_dir, self.metrics_interval)
+            print(f"📊 Metrics every {self.metrics_interval:.0f}s to {self.metrics_dir}")
+        except OSError as e:
+            print(f"⚠️  Could not start metrics export: {e}")
+            self.metrics_exporter = None
+        return self.metrics_exporter
+    
+    def stop_metrics(self):
+        """Write the final snapshot and stop the exporter"""
+        if self.metrics_exporter is None:
+            return
+        self.metrics_exporter.close()
+        self.metrics_exporter = None
+    
+    def analyze_frame(self, frame):
+        """Everything the main loop reads from a frame (runs on the pipeline thread)"""
+        return {
+            'button_blue': self.is_button_blue(frame),
+            # Only regions that changed are OCR'd again
+            'reads': self.recognize_regions(frame, self.step_regions()),
+        }
+    
+    def analyzed_state(self):
+        """Analysis of a frame captured after the last tap and settle wait
+        
+        Comes from the pipeline when it runs, otherwise the frame is
+        captured and analysed right here.
+        """
+        if self.pipeline is not None and self.pipeline.serving:
+            # Not a frame from the middle of the transition the settle wait sat out
+            state = self.pipeline.state(after=max(self.last_tap_time, self.settled_time))
+            if state is not None:
+                return state
+        frame = self.get_frame()
+        if frame is None:
+            return None
+        return AnalyzedState(frame, self.analyze_frame(frame), self.clock.time())
+    
+    def save_frame(self, frame, output_path=None):
+        """Write a frame to disk and return the path"""
+        if output_path is None:
+            timestamp = int(frame.timestamp * 1000)
+            output_path = self.screenshots_dir / f"screenshot_{timestamp}.png"
+        try:
+            return frame.save(output_path)
+        except Exception as e:
+            self.log.error(f"❌ Saving screenshot failed: {e}")
+            return None
+    
+    def get_debug_frames(self):
+        """Background writer of debug frames, started on first use (None if it cannot start)"""
+        if self.debug_frames is None:
+            try:
+                self.debug_frames = DebugFrameWriter(self.screenshots_dir, self.screenshots_keep,
+                                                     self.screenshots_max_mb * 1024 * 1024, self.anomalies_keep,
+                                                     self.screenshot_format)
+            except (OSError, ValueError) as e:
+                self.log.warning(f"⚠️  Debug frames disabled: {e}")
+                self.save_screenshots = False
+                self.save_anomalies = False
+        return self.debug_frames
+    
+    def keep_anomaly(self, reason, frame=None):
+        """Keep the frame behind an anomaly (defaults to the latest capture)"""
+        if not self.save_anomalies:
+            return
+        frame = frame or self.frame_cache.frame
+        if frame is None or not self.get_debug_frames():
+            return
+        self.metrics.count('anomalies')
+        self.debug_frames.anomaly(frame, reason)
+        self.log.debug(f"🖼️  Kept {reason} frame", event='anomaly', reason=reason)
+    
+    def stop_debug_frames(self):
+        """Write the queued debug frames and stop the writer, returns its counters"""
+        if self.debug_frames is None:
+            return None
+        self.debug_frames.close()
+        stats = self.debug_frames.stats()
+        self.debug_frames = None
+        return stats
+    
+    def take_screenshot(self, output_path=None):
+        """Take screenshot, write it to disk and return path - works standalone"""
+        frame = self.capture_frame()
+        if frame is None:
+            return None
+        if frame.path and output_path is None:
+            return frame.path
+        return self.save_frame(frame, output_path)
+    
+    def wait_until(self, predicate, timeout, name='wait'):
+        """Poll fresh frames until predicate(frame) holds or timeout seconds pass
+        
+        Returns a WaitResult (truthy on success); every wait is kept in
+        self.wait_log so the time actually spent can be reported.
+        """
+        def check():
+            frame = self.get_frame(max_age=0)
+            return frame is not None and predicate(frame)
+        return self.wait_for(check, timeout, name)
+    
+    def wait_for(self, condition, timeout, name='wait'):
+        """Poll condition() (no frame needed) until it holds or timeout seconds pass"""
+        # Includes the captures and checks made while polling
+        with self.metrics.span('wait'):
+            result = wait_until(condition, timeout, self.poll_policy, name,
+                                sleep=self.clock.sleep, now=self.clock.monotonic)
+        self.wait_log.append(result)
+        if self.trace is not None:
+            self.trace.wait(result)
+        return result
+    
+    def sleep(self, seconds, reason=''):
+        """A fixed sleep that shows up in the trace"""
+        if self.trace is not None:
+            self.trace.sleep(seconds, reason)
+        with self.metrics.span('sleep'), self.pipeline_paused():
+            self.clock.sleep(seconds)
+    
+    def wait_for_screen_settled(self, reference, timeout, name='screen settle', region=None, regions=()):
+        """Wait until the screen (or a region) changed from reference and stopped changing
+        
+        A change in any of `regions` counts on its own, however small it is
+        compared to the whole screen.
+        """
+        if reference is None or not IMAGE_PROCESSING_AVAILABLE:
+            self.sleep(timeout, name)
+            self.settled_time = self.clock.time()
+            return None
+        settled = ScreenSettled(reference, region, regions, stride=self.change_stride * 2,
+                                stable_polls=self.settle_polls, stable_for=self.settle_stable)
+        result = self.wait_until(settled, timeout, name)
+        if settled.frame is not None:
+            self.settled_time = settled.frame.timestamp
+        return result
+    
+    def game_in_foreground(self):
+        """True if the game package is the foreground app"""
+        try:
+            return self.backend.current_app() == self.game_package
+        except Exception:
+            return False
+    
+    def wait_stats(self):
+        """Per-wait-name count, mean/max time spent and timeouts"""
+        return summarize_waits(self.wait_log)
+    
+    def recognize_text(self, image, region=None):
+        """Perform OCR on a frame, image or image path, optionally on a region"""
+        # Change detector, preprocessing buffers and OCR engine are shared with the pipeline thread
+        with self.analysis_lock:
+            if self.ocr_engine is None:
                 return {'text': '', 'confidence': 0}
             
-            img = Image.open(image_path)
-            
-            # Crop region if specified
-            if region:
-                x, y, w, h = region
-                img = img.crop((x, y, x + w, y + h))
-            
-            # Preprocess image for better OCR (using PIL instead of opencv)
-            if IMAGE_PROCESSING_AVAILABLE:
-                # Convert to grayscale
-                if img.mode != 'L':
-                    img = img.convert('L')
+            try:
+                if image is None:
+                    return {'text': '', 'confidence': 0}
+                if isinstance(image, (str, Path)) and not os.path.exists(image):
+                    return {'text': '', 'confidence': 0}
                 
-                # Enhance contrast for better OCR
-                enhancer = ImageEnhance.Contrast(img)
-                img = enhancer.enhance(2.0)  # Increase contrast
+                frame = load_frame(image)
                 
-                # Apply simple threshold (median-based, faster than Otsu)
-                img_array = np.array(img)
-                threshold = np.median(img_array)  # Use median as threshold
+                # Region pixels unchanged since the last read - reuse that result
+                if region:
+                    unchanged, previous = self.region_unchanged(self.ocr_region_name(region), frame.crop(region),
+                                                                stride=1)
+                    if unchanged:
+                        return dict(previous)
                 
-                # Apply threshold: values above threshold become white (255), below become black (0)
-                img_array = np.where(img_array > threshold, 255, 0).astype(np.uint8)
-                img = Image.fromarray(img_array)
+                img, img_array = self.preprocess_for_ocr(frame, region)
+                
+                # Identical binarized crops are answered from the cache
+                key, cached = self.lookup_ocr_cache(img_array)
+                if cached is None:
+                    # Perform OCR
+                    with self.metrics.span('ocr'):
+                        cached = self.run_ocr_engine(img)
+                    self.metrics.count('ocr_calls')
+                    self.store_ocr_result(key, img_array, cached)
+                if region:
+                    self.remember_ocr_result(region, cached)
+                return cached
+            except Exception as e:
+                self.log.error(f"❌ OCR failed: {e}")
             
-            # Perform OCR
-            if OCR_ENGINE == 'pytesseract':
-                text = pytesseract.image_to_string(img, config='--psm 7 -c tessedit_char_whitelist=0123456789/:$')
-                return {'text': text.strip(), 'confidence': 1.0}
-            elif OCR_ENGINE == 'easyocr':
-                results = reader.readtext(np.array(img))
-                text = ' '.join([result[1] for result in results])
-                return {'text': text.strip(), 'confidence': 1.0}
-        except Exception as e:
-            print(f"❌ OCR failed: {e}")
+            return {'text': '', 'confidence': 0}
+    
+    def recognize_regions(self, frame, regions):
+        """OCR several regions of one frame with a single batched engine call
         
+        regions is {name: (x, y, w, h)}, returns {name: {'text', 'confidence'}}
+        """
+        # Change detector, preprocessing buffers and OCR engine are shared with the pipeline thread
+        with self.analysis_lock:
+            results = {name: {'text': '', 'confidence': 0} for name in regions}
+            if self.ocr_engine is None or frame is None:
+                return results
+            
+            try:
+                frame = load_frame(frame)
+                pending = []
+                for name, region in regions.items():
+                    unchanged, previous = self.region_unchanged(self.ocr_region_name(region), frame.crop(region),
+                                                                stride=1)
+                    if unchanged:
+                        results[name] = dict(previous)
+                        continue
+                    img, img_array = self.preprocess_for_ocr(frame, region)
+                    key, cached = self.lookup_ocr_cache(img_array)
+                    if cached is not None:
+                        results[name] = cached
+                        self.remember_ocr_result(region, cached)
+                    else:
+                        pending.append((name, region, img, img_array, key))
+                
+                if pending:
+                    with self.metrics.span('ocr'):
+                        batch = self.run_ocr_engine_batch([img for _, _, img, _, _ in pending])
+                    self.metrics.count('ocr_calls', len(pending))
+                    for (name, region, img, img_array, key), result in zip(pending, batch):
+                        self.store_ocr_result(key, img_array, result)
+                        self.remember_ocr_result(region, result)
+                        results[name] = result
+            except Exception as e:
+                self.log.error(f"❌ OCR failed: {e}")
+            
+            return results
+    
+    def ocr_region_name(self, region):
+        return "ocr {},{} {}x{}".format(*region)
+    
+    def region_unchanged(self, name, pixels, stride=None):
+        """(True, previous result) if the region's pixels did not change since it was analysed"""
+        if self.change_detector is None:
+            return False, None
+        return self.change_detector.lookup(name, pixels, stride)
+    
+    def remember_region_result(self, name, result):
+        if self.change_detector is not None:
+            self.change_detector.store(name, result)
+    
+    def remember_ocr_result(self, region, result):
+        """Keep an OCR result for the region (and trace it)"""
+        name = self.ocr_region_name(region)
+        self.remember_region_result(name, result)
+        if self.trace is not None:
+            self.trace.ocr(name, result)
+    
+    def preprocess_for_ocr(self, frame, region=None):
+        """Crop, grayscale, boost contrast and threshold - returns (image, array)
+        
+        The array lives in a buffer reused for the same region on the next call.
+        """
+        if self.ocr_preprocessor is None:
+            # Dark text on white for every engine and path (single, batched, pool, cache)
+            self.ocr_preprocessor = ocr_preprocess.OCRPreprocessor(
+                threshold=self.ocr_threshold_method, upscale=self.ocr_upscale, dark_text=True)
+        
+        # Crop region if specified (a view on the frame, no copy)
+        pixels = frame.crop(region) if region else frame.array
+        if pixels.ndim == 3:
+            pixels = pixels[..., :3]
+        
+        with self.metrics.span('preprocess'):
+            img_array = self.ocr_preprocessor.process(pixels, key=region)
+            return Image.fromarray(img_array), img_array
+    
+    def lookup_ocr_cache(self, img_array):
+        """Returns (cache key, cached result or None)"""
+        if self.ocr_cache is None:
+            return None, None
+        key = ocr_cache_lib.crop_key(img_array, self.ocr_engine)
+        cached = self.ocr_cache.get(key)
+        return key, dict(cached) if cached is not None else None
+    
+    def store_ocr_result(self, key, img_array, result):
+        if key is not None:
+            self.ocr_cache.put(key, result)
+        if self.glyph_samples is not None:
+            self.glyph_samples.add(img_array, result['text'])
+    
+    def run_ocr_engine(self, img):
+        """Send a preprocessed image to the OCR engine"""
+        if self.ocr_reader is not None:
+            return self.ocr_reader(np.asarray(img))
+        pool = self.get_ocr_pool()
+        if pool is not None:
+            return pool.recognize(np.asarray(img))
+        if self.ocr_engine == 'template':
+            return get_glyph_bank().recognize(np.asarray(img))
+        elif self.ocr_engine == 'pytesseract':
+            # Resident engine: language data loaded once, no process per call
+            engine = self.get_resident_tesseract()
+            if engine is not None:
+                return engine.read(img)
+            if self.ocr_engine == 'pytesseract':
+                text = pytesseract.image_to_string(img, config=f'--psm 7 -c tessedit_char_whitelist={OCR_WHITELIST}')
+                return {'text': text.strip(), 'confidence': 1.0}
+            # No tesseract at all: the engine that replaced it
+            return self.run_ocr_engine(img)
+        elif self.ocr_engine == 'easyocr':
+            results = get_easyocr_reader().readtext(np.array(img))
+            text = ' '.join([result[1] for result in results])
+            return {'text': text.strip(), 'confidence': 1.0}
         return {'text': '', 'confidence': 0}
     
-    def is_button_blue(self):
-        """Check if button is blue by analyzing color"""
-        if not IMAGE_PROCESSING_AVAILABLE:
-            return False
+    def run_ocr_engine_batch(self, images):
+        """Send several preprocessed crops to the OCR engine in one call"""
+        pool = self.get_ocr_pool()
+        if pool is not None:
+            # One crop per worker, read in parallel
+            return pool.recognize_many([np.asarray(img) for img in images])
+        if len(images) == 1 or self.ocr_engine == 'template' or self.ocr_reader is not None:
+            # Template matching has no per-call overhead to save
+            return [self.run_ocr_engine(img) for img in images]
         
-        try:
-            screenshot_path = self.take_screenshot()
-            if not screenshot_path:
+        if self.ocr_engine == 'easyocr':
+            arrays = ocr_batch.pad_to_common_size([np.asarray(img) for img in images])
+            batches = get_easyocr_reader().readtext_batched(arrays)
+            return [{'text': ' '.join(r[1] for r in results).strip(), 'confidence': 1.0}
+                    for results in batches]
+        
+        # Tesseract: one composite strip, one crop per line
+        strip = ocr_batch.build_ocr_strip(images)
+        engine = self.get_resident_tesseract()
+        if engine is not None:
+            result = engine.read(strip, psm=PSM_SINGLE_BLOCK)
+        elif self.ocr_engine != 'pytesseract':
+            # No tesseract at all: the engine that replaced it
+            return self.run_ocr_engine_batch(images)
+        else:
+            text = pytesseract.image_to_string(strip, config=f'--psm 6 -c tessedit_char_whitelist={OCR_WHITELIST}')
+            result = {'text': text, 'confidence': 1.0}
+        
+        lines = ocr_batch.split_strip_text(result['text'], len(images))
+        if lines is None:
+            # A crop came back empty or merged - read them one by one
+            return [self.run_ocr_engine(img) for img in images]
+        return [{'text': line, 'confidence': result['confidence']} for line in lines]
+    
+    def get_resident_tesseract(self):
+        """Start the resident tesseract engine on first use (None if unavailable)
+        
+        Without it and without pytesseract, OCR moves to easyocr or is disabled.
+        """
+        if self.use_resident_tesseract and self.tesseract_engine is None:
+            with STARTUP.measure('resident tesseract', 'engine'):
+                self.tesseract_engine = create_resident_tesseract(whitelist=OCR_WHITELIST)
+            if self.tesseract_engine is None:
+                self.log.warning("⚠️  Resident tesseract unavailable"
+                                 + (", using pytesseract" if PYTESSERACT_AVAILABLE else ""))
+                self.use_resident_tesseract = False
+            else:
+                self.log.info(f"✅ Resident tesseract engine ready ({self.tesseract_engine.name})")
+        if self.tesseract_engine is None and self.ocr_engine == 'pytesseract' and not PYTESSERACT_AVAILABLE:
+            # Picked for the resident engine alone, pytesseract is not installed
+            if EASYOCR_AVAILABLE:
+                self.log.warning("⚠️  pytesseract not installed, using easyocr")
+                self.ocr_engine = 'easyocr'
+            else:
+                self.log.error("❌ pytesseract not installed - OCR disabled")
+                self.ocr_engine = None
+        return self.tesseract_engine
+    
+    def get_ocr_pool(self):
+        """Start the OCR worker processes on first use (None if disabled)"""
+        if self.ocr_workers <= 0 or self.ocr_engine is None:
+            return None
+        if self.ocr_pool is None:
+            try:
+                with STARTUP.measure(f'OCR pool ({self.ocr_workers} workers)', 'engine'):
+                    self.ocr_pool = ocr_pool.OCRProcessPool(
+                        self.ocr_engine, self.ocr_workers, whitelist=OCR_WHITELIST,
+                        glyph_bank_file=GLYPH_BANK_FILE,
+                        use_resident_tesseract=self.use_resident_tesseract)
+                    self.ocr_pool.warm()
+            except Exception as e:
+                self.log.warning(f"⚠️  OCR worker pool unavailable, reading in-process: {e}")
+                self.ocr_pool = None
+                self.ocr_workers = 0
+                return None
+            self.log.info(f"✅ OCR worker pool ready ({self.ocr_workers} processes, {self.ocr_engine})")
+        return self.ocr_pool
+    
+    def ocr_cache_stats(self):
+        """Hit/miss counters of the OCR cache"""
+        if self.ocr_cache is None:
+            return {'size': 0, 'hits': 0, 'misses': 0, 'evictions': 0, 'hit_rate': 0.0}
+        return self.ocr_cache.stats()
+    
+    def is_button_blue(self, frame=None):
+        """Check if button is blue by analyzing color (uses the cached frame if none given)"""
+        # Change detector and probe results are shared with the pipeline thread
+        with self.analysis_lock:
+            if not IMAGE_PROCESSING_AVAILABLE:
                 return False
             
-            img = Image.open(screenshot_path)
-            # Crop button region
-            button_img = img.crop((
-                self.button_x,
-                self.button_y,
-                self.button_x + self.button_width,
-                self.button_y + self.button_height
-            ))
-            
-            # Convert to numpy array
-            img_array = np.array(button_img)
-            if len(img_array.shape) == 3:
-                # Calculate average color
-                avg_color = img_array.mean(axis=(0, 1))
-                r, g, b = avg_color[:3]
+            try:
+                if frame is None:
+                    frame = self.get_frame()
+                if frame is None:
+                    return False
                 
-                # Check if blue is dominant
-                is_blue = b > 100 and b > r * 1.2 and b > g * 1.2
-                return is_blue
-        except Exception as e:
-            print(f"❌ Button color check failed: {e}")
-        
-        return False
+                # Crop button region
+                img_array = frame.crop((self.button_x, self.button_y,
+                                        self.button_width, self.button_height))
+                
+                # Button pixels unchanged since the last check - same answer
+                unchanged, previous = self.region_unchanged('button color', img_array)
+                if unchanged:
+                    return previous
+                
+                if len(img_array.shape) == 3:
+                    # Blue must be dominant (evaluated with all other probes in one pass)
+                    is_blue = self.probe(frame)['button_blue']
+                    self.remember_region_result('button color', is_blue)
+                    return is_blue
+            except Exception as e:
+                self.log.error(f"❌ Button color check failed: {e}")
+            
+            return False
+    
+    def get_probe_set(self):
+        """Declare every color check once: the button plus probes from the config"""
+        if self.probe_set is None:
+            probes = [
+                # Average color: blue > 100 and blue > 1.2 x red and green
+                pixel_probes.ColorProbe(
+                    'button_blue',
+                    (self.button_x, self.button_y, self.button_width, self.button_height),
+                    above=(None, None, 100), dominant='b', ratio=1.2),
+            ]
+            probes += [pixel_probes.ColorProbe.from_config(p) for p in self.extra_probes]
+            self.probe_set = pixel_probes.ProbeSet(probes)
+        return self.probe_set
+    
+    def probe(self, frame=None):
+        """Evaluate all color probes on a frame in one pass (once per frame)"""
+        if frame is None:
+            frame = self.get_frame()
+        if frame is None:
+            return None
+        if frame is not self._probed_frame:
+            with self.metrics.span('color_probe'):
+                self._probe_results = self.get_probe_set().evaluate(frame.array)
+            self._probed_frame = frame
+        return self._probe_results
     
-    def get_button_ocr_amount(self):
-        """Get amount from button OCR"""
+    def get_button_ocr_amount(self, frame=None):
+        """Get amount from button OCR (uses the cached frame if none given)"""
         try:
-            screenshot_path = self.take_screenshot()
-            if not screenshot_path:
+            if frame is None:
+                frame = self.get_frame()
+            if frame is None:
                 return None
             
             # Crop button region
             region = (self.button_x, self.button_y, self.button_width, self.button_height)
-            ocr_result = self.recognize_text(screenshot_path, region)
+            ocr_result = self.recognize_text(frame, region)
             
             # Extract number from text
-            import re
             match = re.search(r'\$?\s*(\d+)', ocr_result['text'])
             if match:
                 return int(match.group(1))
         except Exception as e:
-            print(f"❌ Get button amount failed: {e}")
+            self.log.error(f"❌ Get button amount failed: {e}")
         
         return None
     
     def reset_game(self):
         """Reset the game"""
-        print("\n🔄 RESET: Starting reset process...")
-        max_attempts = 50
-        
-        for attempt in range(1, max_attempts + 1):
-            if not self.running:
-                return False
-            
-            while self.paused and self.running:
-                time.sleep(0.1)
+        # Frames are taken on demand here, the capture thread would only add load
+        with self.pipeline_paused():
+            self.log.info("\n🔄 RESET: Starting reset process...")
+            self.metrics.count('resets')
+            max_attempts = 50
             
-            print(f"\n🔄 Reset attempt {attempt}/{max_attempts}")
-            
-            # Three reset clicks
-            self.click(self.reset_button_x, self.reset_button_y, self.reset_clicks_delay)
-            self.click(self.reset_button2_x, self.reset_button2_y, self.reset_clicks_delay)
-            self.click(self.reset_button3_x, self.reset_button3_y, self.click_delay)
-            
-            # Click car
-            self.click(self.start_click_x, self.start_click_y, self.click_delay)
-            
-            # Check button amount
-            amount = self.get_button_ocr_amount()
-            if amount is not None:
-                print(f"   💰 Button amount: {amount}")
-                if amount <= self.reset_target_amount:
-                    print(f"   ✅ Reset successful! Amount: {amount}")
-                    return True
+            for attempt in range(1, max_attempts + 1):
+                if not self.running:
+                    return False
+                
+                while self.paused and self.running:
+                    self.clock.sleep(0.1)
+                
+                self.log.info(f"\n🔄 Reset attempt {attempt}/{max_attempts}", event='reset_attempt', attempt=attempt)
+                self.metrics.count('reset_attempts')
+                
+                # Three reset clicks, then click car - sent as one chain
+                self.click_sequence([
+                    (self.reset_button_x, self.reset_button_y, self.reset_clicks_delay),
+                    (self.reset_button2_x, self.reset_button2_y, self.reset_clicks_delay),
+                    (self.reset_button3_x, self.reset_button3_y, self.click_delay),
+                    (self.start_click_x, self.start_click_y, self.click_delay),
+                ])
+                
+                # Check button amount
+                amount = self.get_button_ocr_amount()
+                if amount is not None:
+                    self.log.info(f"   💰 Button amount: {amount}", event='reset_amount', amount=amount)
+                    if amount <= self.reset_target_amount:
+                        self.log.info(f"   ✅ Reset successful! Amount: {amount}", event='reset_done', amount=amount,
+                                      attempts=attempt)
+                        return True
+                
+                self.sleep(0.5, 'reset retry')
             
-            time.sleep(0.5)
-        
-        print("❌ Reset failed after max attempts")
-        return False
+            self.log.error("❌ Reset failed after max attempts", event='reset_failed', attempts=max_attempts)
+            self.keep_anomaly('reset_failed')
+            return False
     
     def format_elapsed_time(self, seconds):
         """Format elapsed time"""
@@ -510,19 +1157,22 @@ class AndroidAutomation:
         self.paused = not self.paused
         
         if self.paused:
-            self.pause_start_time = time.time()
-            print("\n⏸️  PAUSED - Press to resume")
+            self.pause_start_time = self.clock.time()
+            self.log.info("\n⏸️  PAUSED - Press to resume")
         else:
             if self.pause_start_time:
-                paused_duration = time.time() - self.pause_start_time
+                paused_duration = self.clock.time() - self.pause_start_time
                 self.total_paused_time += paused_duration
                 if self.start_time:
                     self.start_time += paused_duration
                 self.pause_start_time = None
-            print("\n▶️  RESUMED")
+            self.log.info("\n▶️  RESUMED")
     
     def run(self):
         """Main automation loop"""
+        startup_steps = len(STARTUP.steps)
+        self.start_trace()
+        self.start_metrics()
         try:
             print("🔌 Initializing Android automation...")
             
@@ -535,186 +1185,272 @@ class AndroidAutomation:
                 print("   (Switch to your game app now!)")
                 for i in range(5, 0, -1):
                     print(f"   Starting in {i}...")
-                    time.sleep(1)
+                    self.sleep(1, 'countdown')
             
             self.get_screen_size()
-            print(f"\n📱 Screen size: {self.screen_width}x{self.screen_height}\n")
+            print(f"\n📱 Screen size: {self.screen_width}x{self.screen_height}")
+            STARTUP.report()
+            startup_steps = len(STARTUP.steps)
+            print()
             
-            # Start with reset
-            print("🔄 Starting with reset...\n")
+            # Start with reset (reset_game() stops early unless running is set)
+            self.running = True
+            self.log.info("🔄 Starting with reset...\n")
             if not self.reset_game():
-                print("❌ Reset failed. Cannot continue automation.")
+                self.log.error("❌ Reset failed. Cannot continue automation.")
                 return
             
             # Verify button amount
-            print("\n🔍 Verifying button amount after reset...")
+            self.log.info("\n🔍 Verifying button amount after reset...")
             button_amount = self.get_button_ocr_amount()
             if button_amount is None or button_amount > self.reset_target_amount:
-                print(f"❌ Button amount is {button_amount}, expected <= {self.reset_target_amount}")
+                self.log.error(f"❌ Button amount is {button_amount}, expected <= {self.reset_target_amount}")
                 return
             
-            print(f"✅ Button amount verified: {button_amount}. Starting automation...\n")
+            self.log.info(f"✅ Button amount verified: {button_amount}. Starting automation...\n")
+            self.start_pipeline()
             
-            self.start_time = time.time()
+            self.start_time = self.clock.time()
             self.running = True
             
             while self.running:
                 # Check pause
                 while self.paused and self.running:
-                    time.sleep(0.1)
+                    self.clock.sleep(0.1)
                 
                 if not self.running:
                     break
                 
-                # Click start button
-                self.click(self.start_click_x, self.start_click_y, self.click_delay)
+                # Click start button, continue once the screen reacted
+                self.click_and_settle(self.start_click_x, self.start_click_y, self.click_delay)
                 
-                # Check if button is blue/active
-                is_blue = self.is_button_blue()
+                # Check if button is blue/active (analysed while the tap settled)
+                state = self.analyzed_state()
+                is_blue = state is not None and state['button_blue']
                 
                 if is_blue:
-                    print("\n✅ BUTTON IS BLUE/ACTIVE!")
+                    self.log.info("\n✅ BUTTON IS BLUE/ACTIVE!", event='button_blue')
                     
                     # Click button
                     button_center_x = self.button_x + self.button_width // 2
                     button_center_y = self.button_y + self.button_height // 2
-                    self.click(button_center_x, button_center_y, self.click_delay)
+                    self.click_and_settle(button_center_x, button_center_y, self.click_delay)
                     
-                    # Perform OCR above button
-                    screenshot_path = self.take_screenshot()
-                    if screenshot_path:
-                        region = (self.ocr_above_x, self.ocr_above_y, 
-                                 self.ocr_above_width, self.ocr_above_height)
-                        ocr_result = self.recognize_text(screenshot_path, region)
-                        ocr_text = ocr_result['text']
+                    # OCR above button - step and amount regions, read by the analysis stage
+                    state = self.analyzed_state()
+                    if state:
+                        reads = state['reads']
+                        ocr_text = reads['step']['text']
                         
-                        print(f"\n📝 OCR Result: \"{ocr_text}\"")
+                        self.log.info(f"\n📝 OCR Result: \"{ocr_text}\"", event='ocr', region='step', text=ocr_text)
+                        if not ocr_text.strip():
+                            self.keep_anomaly('step_unreadable', state.frame)
                         
                         # Check if final step
                         if self.final_step_target in ocr_text:
-                            print(f"\n✅ Step is {self.final_step_target} - Automation complete!")
-                            elapsed = time.time() - self.start_time
-                            print(f"\n⏱️  Total time: {self.format_elapsed_time(elapsed)}")
+                            self.log.info(f"\n✅ Step is {self.final_step_target} - Automation complete!", event='complete')
+                            self.metrics.count('completions')
+                            elapsed = self.clock.time() - self.start_time
+                            self.log.info(f"\n⏱️  Total time: {self.format_elapsed_time(elapsed)}")
                             self.running = False
                             return
                         
                         # Check if step is 10/20 - timer check
                         if '10/20' in ocr_text:
-                            print("\n✅ Step is 10/20 - Checking timer...")
-                            time.sleep(10)  # Wait before checking timer
+                            self.log.info("\n✅ Step is 10/20 - Checking timer...")
+                            timer_region = self.timer_region()
                             
-                            # Take screenshot for timer OCR
-                            screenshot_path = self.take_screenshot()
-                            # Timer OCR region (use config if available, otherwise default)
-                            if self.timer_ocr_x is not None:
-                                timer_region = (self.timer_ocr_x, self.timer_ocr_y,
-                                              self.timer_ocr_width, self.timer_ocr_height)
-                            else:
-                                # Default: button region + offset
-                                timer_region = (self.button_x + 30, self.button_y + 30,
-                                              self.button_width - 30, self.button_height)
-                            ocr_result = self.recognize_text(screenshot_path, timer_region)
+                            # Not a wait_until(): the value decides the reset below and
+                            # is compared with timer_threshold as read 10 seconds in
+                            self.sleep(10, 'timer')
+                            
+                            # Frame for timer OCR
+                            frame = self.get_frame()
+                            ocr_result = self.recognize_text(frame, timer_region)
                             timer_text = ocr_result['text']
                             
-                            print(f"📝 Timer OCR: \"{timer_text}\"")
+                            self.log.info(f"📝 Timer OCR: \"{timer_text}\"", event='ocr', region='timer', text=timer_text)
                             
                             # Extract timer seconds
-                            import re
                             timer_match = re.search(r':(\d+)', timer_text)
                             if timer_match:
                                 timer_seconds = int(timer_match.group(1))
-                                print(f"⏱️  Timer seconds: {timer_seconds}")
+                                self.log.info(f"⏱️  Timer seconds: {timer_seconds}", event='timer', seconds=timer_seconds)
                                 
                                 if timer_seconds > self.timer_threshold:
-                                    print(f"⚠️  Timer is {timer_seconds} seconds (> {self.timer_threshold}), resetting...")
+                                    self.log.info(f"⚠️  Timer is {timer_seconds} seconds (> {self.timer_threshold}), resetting...",
+                                                  event='timer_reset', seconds=timer_seconds)
+                                    self.keep_anomaly('timer_reset', frame)
                                     self.reset_game()
                                     continue
                                 else:
                                     # Log time from start
                                     if self.start_time:
-                                        elapsed = time.time() - self.start_time
-                                        print(f"⏱️  Time from start until timer check passed: {self.format_elapsed_time(elapsed)}")
+                                        elapsed = self.clock.time() - self.start_time
+                                        self.log.info(f"⏱️  Time from start until timer check passed: {self.format_elapsed_time(elapsed)}")
                                     
-                                    print(f"✅ Timer is {timer_seconds} seconds (<= {self.timer_threshold})")
+                                    self.log.info(f"✅ Timer is {timer_seconds} seconds (<= {self.timer_threshold})")
                                     
-                                    # Post-timer clicks
-                                    self.click(self.start_click_x, self.start_click_y, self.click_delay)
-                                    time.sleep(10)
-                                    self.click(self.post_timer_click1_x, self.post_timer_click1_y, self.click_delay)
-                                    time.sleep(self.click_delay)
-                                    self.click(self.post_timer_click2_x, self.post_timer_click2_y, self.click_delay)
-                                    time.sleep(self.click_delay)
+                                    # Post-timer clicks: wait out the transition after start,
+                                    # then the other two as one chain
+                                    self.click_and_settle(self.start_click_x, self.start_click_y,
+                                                          self.click_delay + 10)
+                                    self.click_sequence([
+                                        (self.post_timer_click1_x, self.post_timer_click1_y, self.click_delay * 2),
+                                        (self.post_timer_click2_x, self.post_timer_click2_y, 0),
+                                    ])
                                     
                                     # Continue with blue button clicking only
-                                    print("✅ Post-timer clicks completed. Now only clicking blue button...")
-                                    time.sleep(self.click_delay * 2)
+                                    self.log.info("✅ Post-timer clicks completed. Now only clicking blue button...")
+                                    self.wait_until(self.is_button_blue, self.click_delay * 2, 'button blue')
                                     
                                     while self.running:
                                         while self.paused and self.running:
-                                            time.sleep(0.1)
+                                            self.clock.sleep(0.1)
                                         
                                         if not self.running:
                                             break
                                         
                                         if self.is_button_blue():
-                                            print("\n✅ BUTTON IS BLUE/ACTIVE!")
-                                            self.click(button_center_x, button_center_y, self.click_delay)
+                                            self.log.info("\n✅ BUTTON IS BLUE/ACTIVE!", event='button_blue')
+                                            self.click_and_settle(button_center_x, button_center_y,
+                                                                  self.click_delay)
                                             
                                             # Check final step
-                                            screenshot_path = self.take_screenshot()
-                                            if screenshot_path:
+                                            frame = self.get_frame()
+                                            if frame:
                                                 region = (self.ocr_above_x, self.ocr_above_y,
                                                          self.ocr_above_width, self.ocr_above_height)
-                                                ocr_result = self.recognize_text(screenshot_path, region)
+                                                ocr_result = self.recognize_text(frame, region)
                                                 if self.final_step_target in ocr_result['text']:
-                                                    print(f"\n✅ Step is {self.final_step_target} - Automation complete!")
-                                                    elapsed = time.time() - self.start_time
-                                                    print(f"\n⏱️  Total time: {self.format_elapsed_time(elapsed)}")
+                                                    self.log.info(f"\n✅ Step is {self.final_step_target} - Automation complete!", event='complete')
+                                                    self.metrics.count('completions')
+                                                    elapsed = self.clock.time() - self.start_time
+                                                    self.log.info(f"\n⏱️  Total time: {self.format_elapsed_time(elapsed)}")
                                                     self.running = False
                                                     return
                                         
-                                        time.sleep(self.click_delay * 2)
+                                        self.wait_until(self.is_button_blue, self.click_delay * 2,
+                                                        'button blue')
                                     
                                     break
+                            else:
+                                self.keep_anomaly('timer_unreadable', frame)
                         
                         # Check if step is 2/10
                         if '2/10' in ocr_text:
-                            print("📍 Step is 2/10")
-                            screenshot_path = self.take_screenshot()
-                            if screenshot_path:
-                                region = (self.ocr_second_x, self.ocr_second_y,
-                                         self.ocr_second_width, self.ocr_second_height)
-                                ocr_result = self.recognize_text(screenshot_path, region)
-                                ocr_text2 = ocr_result['text']
-                                print(f"\n📝 Second OCR Result: \"{ocr_text2}\"")
+                            self.log.info("📍 Step is 2/10")
+                            # Amount region was read from the same frame as the step
+                            ocr_text2 = reads['amount']['text']
+                            self.log.info(f"\n📝 Second OCR Result: \"{ocr_text2}\"", event='ocr', region='amount', text=ocr_text2)
+                            
+                            # Extract amount
+                            amount_match = re.search(r'\$?\s*(\d+)', ocr_text2)
+                            if amount_match:
+                                amount = int(amount_match.group(1))
+                                self.log.info(f"💰 Amount detected: {amount}", event='amount', amount=amount)
                                 
-                                # Extract amount
-                                import re
-                                amount_match = re.search(r'\$?\s*(\d+)', ocr_text2)
-                                if amount_match:
-                                    amount = int(amount_match.group(1))
-                                    print(f"💰 Amount detected: {amount}")
-                                    
-                                    if amount < self.amount_threshold:
-                                        print(f"⚠️  Amount {amount} < {self.amount_threshold}, resetting...")
-                                        self.reset_game()
-                                        continue
+                                if amount < self.amount_threshold:
+                                    self.log.info(f"⚠️  Amount {amount} < {self.amount_threshold}, resetting...",
+                                              event='amount_reset', amount=amount)
+                                    self.keep_anomaly('amount_reset', state.frame)
+                                    self.reset_game()
+                                    continue
+                            else:
+                                self.keep_anomaly('amount_unreadable', state.frame)
                 
-                time.sleep(self.click_delay)
+                self.wait_until(self.is_button_blue, self.click_delay, 'button blue')
         
         except KeyboardInterrupt:
-            print("\n🛑 Stopping automation...")
+            self.log.info("\n🛑 Stopping automation...")
             self.running = False
         except Exception as e:
-            print(f"\n❌ Error: {e}")
+            self.log.error(f"\n❌ Error: {e}", event='error', error=repr(e))
+            self.keep_anomaly('error')
             self.running = False
         finally:
+            self.running = False
+            pipeline_stats = self.stop_pipeline()
+            trace_stats = self.stop_trace()
+            self.stop_metrics()
+            debug_frame_stats = self.stop_debug_frames()
+            # Everything logged so far reaches the console before the summary
+            self.log.flush()
             if self.start_time:
-                elapsed = time.time() - self.start_time
+                elapsed = self.clock.time() - self.start_time
                 print(f"\n⏱️  Total time: {self.format_elapsed_time(elapsed)}")
+            if len(STARTUP.steps) > startup_steps:
+                # Engines loaded on first use during the run
+                STARTUP.report()
+            stats = self.tap_latency_stats()
+            if stats['count']:
+                print(f"👆 Taps ({stats['method']}): {stats['count']}, "
+                      f"median {stats['p50_ms']:.1f} ms, max {stats['max_ms']:.1f} ms")
+            self.backend.close()
+            if self.ocr_pool is not None:
+                stats = self.ocr_pool.stats()
+                print(f"🧮 OCR pool: {stats['regions']} regions on {stats['workers']} workers, "
+                      f"{stats['regions_per_sec']:.1f} regions/s")
+                self.ocr_pool.close()
+                self.ocr_pool = None
+            if self.tesseract_engine is not None:
+                self.tesseract_engine.close()
+                self.tesseract_engine = None
+            if self.ocr_cache is not None:
+                stats = self.ocr_cache.stats()
+                print(f"🧠 OCR cache: {stats['hits']} hits, {stats['misses']} misses "
+                      f"({stats['hit_rate']:.0%} hit rate)")
+                self.ocr_cache.save()
+            if self.change_detector is not None:
+                ratios = self.change_detector.skip_ratios()
+                if ratios:
+                    print("🔁 Unchanged-region skips: " + ", ".join(
+                        f"{name} {ratio:.0%}" for name, ratio in sorted(ratios.items())))
+            if pipeline_stats:
+                print(f"🧵 Pipeline: {pipeline_stats['captures']} captures, "
+                      f"{pipeline_stats['analysed']} analysed, {pipeline_stats['dropped']} dropped, "
+                      f"{pipeline_stats['skipped']} skipped for a newer one, "
+                      f"queue depth avg {pipeline_stats['mean_depth']:.1f} / max {pipeline_stats['max_depth']}, "
+                      f"capture-to-analysis {pipeline_stats['mean_latency_ms']:.0f} ms")
+            if trace_stats:
+                print(f"📼 Trace: {trace_stats['records']} records, "
+                      f"{trace_stats['written_bytes'] / 1024:.0f} KB written "
+                      f"({trace_stats['repeated_crops']} repeated crops skipped, "
+                      f"{trace_stats['dropped']} dropped)")
+            if debug_frame_stats:
+                print(f"🖼️  Debug frames: {debug_frame_stats['written']} written "
+                      f"({debug_frame_stats['kept']} kept, {debug_frame_stats['kept_mb']:.1f} MB), "
+                      f"{debug_frame_stats['anomalies']} anomalies, {debug_frame_stats['dropped']} dropped"
+                      + (f", {debug_frame_stats['errors']} failed" if debug_frame_stats['errors'] else "")
+                      + f" - {self.screenshots_dir}")
+            waits = self.wait_stats()
+            if waits:
+                print("⏳ Waits: " + ", ".join(
+                    f"{name} {w['count']}x avg {w['mean']:.2f}s of {w['budget'] / w['count']:.1f}s"
+                    + (f" ({w['timeouts']} timed out)" if w['timeouts'] else "")
+                    for name, w in sorted(waits.items())))
+            log_stats = self.log.stats()
+            if log_stats['suppressed'] or log_stats['dropped']:
+                print(f"📝 Log: {log_stats['records']} records, {log_stats['suppressed']} kept off the console"
+                      + (f", {log_stats['dropped']} dropped" if log_stats['dropped'] else "")
+                      + (f" (see {self.log_file})" if self.log_file else ""))
+            phases = self.metrics.report()
+            if phases:
+                print("📊 Time per phase (share of the run):")
+                for line in phases:
+                    print(line)
 
 
 if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Android game automation")
+    parser.add_argument('--profile', action='store_true',
+                        help="sample the run and write a flame graph + top functions when it stops")
+    parser.add_argument('--profile-interval', type=float, default=0.01, help="seconds between samples")
+    parser.add_argument('--profile-dir', default="profiles", help="where the profile files go")
+    args = parser.parse_args()
+    
     print("""
     ════════════════════════════════════════════════════════
     Android Game Automation Script
@@ -779,7 +1515,22 @@ if __name__ == "__main__":
     ════════════════════════════════════════════════════════
     """)
     
+    profiler = None
+    if args.profile:
+        from profiler import SamplingProfiler
+        profiler = SamplingProfiler(automation.metrics, interval=args.profile_interval).start()
+        print(f"🔬 Profiling every {args.profile_interval * 1000:.0f} ms")
+    
     try:
         automation.run()
     except KeyboardInterrupt:
         print("\n\n✅ Automation stopped by user")
+    finally:
+        if profiler is not None:
+            profiler.stop()
+            print("\n" + profiler.summary())
+            try:
+                for path in profiler.write(args.profile_dir):
+                    print(f"🔬 {path}")
+            except OSError as e:
+                print(f"⚠️  Could not write the profile: {e}")
@@ -0,0 +1,202 @@
+"""
+Backend auto-selection
+Used by android-automation.py (device_backend 'auto') to pick the fastest
+working capture and tap paths for the device it runs on
+
+Each candidate is timed for a few iterations after a warm-up call:
+- capture: uiautomator2 screenshot, raw screencap, screencap -p
+- tap: uiautomator2 click, sendevent, input (probed with no-op commands
+  that take the same path, so nothing is tapped on screen)
+
+The winners are cached per device serial in a JSON file, so later starts
+build the same combination without probing again. A capture or tap
+method the caller sets (capture_method / tap_method in the config) is
+used as is; only the other one is probed.
+"""
+
+import json
+import os
+import time
+
+from device_backend import Uiautomator2Backend, ShellBackend, SplitBackend, run_shell
+
+CACHE_FILE = "backend_choice.json"
+
+CAPTURE_CANDIDATES = ('uiautomator2', 'raw', 'png')
+TAP_CANDIDATES = ('uiautomator2', 'sendevent', 'input')
+
+
+def median_latency(function, iterations=3):
+    """Median seconds per call after one warm-up call, None if it fails"""
+    try:
+        function()
+        timings = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - started)
+    except Exception:
+        return None
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def device_serial(u2_backend=None):
+    """Serial of the device, from uiautomator2 or getprop ('local' if unknown)"""
+    if u2_backend is not None and u2_backend.serial:
+        return u2_backend.serial
+    try:
+        serial = run_shell('getprop ro.serialno', timeout=2).stdout.strip()
+    except Exception:
+        serial = ''
+    return serial or 'local'
+
+
+def load_choices(path):
+    if not path or not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_choice(path, serial, choice):
+    choices = load_choices(path)
+    choices[serial] = choice
+    with open(path, 'w') as f:
+        json.dump(choices, f, indent=2)
+
+
+def fastest(latencies):
+    """Name with the lowest measured latency, None if nothing worked"""
+    working = {name: latency for name, latency in latencies.items() if latency is not None}
+    if not working:
+        return None
+    return min(working, key=working.get)
+
+
+class BackendSelector:
+    """Probes capture/tap candidates once per device and builds the fastest backend"""
+
+    def __init__(self, cache_file=CACHE_FILE, iterations=3, screencap_command='screencap',
+                 use_uiautomator=True):
+        self.cache_file = cache_file
+        self.iterations = iterations
+        self.screencap_command = screencap_command
+        self.use_uiautomator = use_uiautomator
+        self.u2_backend = None
+        self.u2_tried = False
+
+    def connect_uiautomator2(self):
+        """Connected Uiautomator2Backend, or None"""
+        if not self.u2_tried and self.use_uiautomator:
+            self.u2_tried = True
+            try:
+                self.u2_backend = Uiautomator2Backend.connect()
+            except Exception as e:
+                print(f"⚠️  uiautomator2 connection failed: {e}")
+        return self.u2_backend
+
+    def shell(self, capture='raw', tap='input'):
+        return ShellBackend(capture if capture in ('raw', 'png') else 'raw',
+                            self.screencap_command, tap if tap in ('sendevent', 'input') else 'input')
+
+    def probe_capture(self, name):
+        if name == 'uiautomator2':
+            backend = self.connect_uiautomator2()
+            if backend is None:
+                return None
+            return median_latency(backend.capture, self.iterations)
+        backend = self.shell(capture=name)
+        if name == 'raw':
+            if backend.raw_screencap is None:
+                return None
+            # Time the raw path alone, without its PNG fallback
+            return median_latency(backend.raw_screencap.capture, self.iterations)
+
+        def capture_png():
+            if backend.capture_png() is None:
+                raise RuntimeError("screencap -p failed")
+        return median_latency(capture_png, self.iterations)
+
+    def probe_tap(self, name):
+        if name == 'uiautomator2':
+            backend = self.connect_uiautomator2()
+            if backend is None:
+                return None
+            return median_latency(backend.probe_tap, self.iterations)
+        backend = self.shell(tap=name)
+        try:
+            return median_latency(backend.probe_tap, self.iterations)
+        finally:
+            backend.close()
+
+    def probe(self, skip=()):
+        """Time every candidate (except the `skip` kinds), returns the choice dict that gets cached"""
+        choice = {'probed_at': time.strftime('%Y-%m-%d %H:%M:%S')}
+        for kind, candidates, probe in (('capture', CAPTURE_CANDIDATES, self.probe_capture),
+                                        ('tap', TAP_CANDIDATES, self.probe_tap)):
+            if kind in skip:
+                continue
+            latencies = {name: probe(name) for name in candidates}
+            choice[kind] = fastest(latencies)
+            choice[kind + '_ms'] = {name: round(s * 1000, 1) for name, s in latencies.items() if s is not None}
+        return choice
+
+    def build(self, choice):
+        """Backend for a {'capture': ..., 'tap': ...} choice"""
+        capture, tap = choice['capture'], choice['tap']
+        u2_backend = None
+        if 'uiautomator2' in (capture, tap):
+            u2_backend = self.connect_uiautomator2()
+            if u2_backend is None:
+                raise RuntimeError("uiautomator2 is not reachable")
+        if capture == tap == 'uiautomator2':
+            return u2_backend
+        shell = self.shell(capture, tap)
+        if capture != 'uiautomator2' and tap != 'uiautomator2':
+            return shell
+        if capture == 'uiautomator2':
+            return SplitBackend(u2_backend, shell)
+        return SplitBackend(shell, u2_backend)
+
+    def select(self, capture=None, tap=None):
+        """Cached choice for this device if there is one, otherwise probe and cache
+
+        A capture / tap method given here is kept, only the other is probed.
+        """
+        fixed = {kind: name for kind, name in (('capture', capture), ('tap', tap)) if name}
+        if len(fixed) == 2:
+            backend = self.build(fixed)
+            print(f"✅ Device backend (configured): {backend.name}")
+            return backend, fixed
+
+        serial = device_serial(self.connect_uiautomator2())
+        cached = load_choices(self.cache_file).get(serial) or {}
+        choice = dict(cached, **fixed)
+        if choice.get('capture') and choice.get('tap'):
+            try:
+                backend = self.build(choice)
+                print(f"✅ Device backend (cached for {serial}): {backend.name}")
+                return backend, choice
+            except Exception as e:
+                print(f"⚠️  Cached backend choice no longer works, probing again: {e}")
+
+        kinds = ' and '.join(kind for kind in ('capture', 'tap') if kind not in fixed)
+        print(f"⏱️  Probing {kinds} backends...")
+        probed = self.probe(skip=fixed)
+        choice = dict(probed, **fixed)
+        if not choice.get('capture') or not choice.get('tap'):
+            raise RuntimeError(f"no working {kinds} backend found")
+        backend = self.build(choice)
+        print(f"✅ Device backend for {serial}: {backend.name}")
+        print("   " + "   ".join(f"{kind} ms: {probed[kind + '_ms']}" for kind in ('capture', 'tap')
+                                 if kind + '_ms' in probed))
+        try:
+            # Only measured winners are cached, a configured method is not one
+            save_choice(self.cache_file, serial, dict(cached, **probed))
+        except OSError as e:
+            print(f"⚠️  Could not cache the backend choice: {e}")
+        return backend, choice
@@ -0,0 +1,410 @@
+"""
+Benchmark suite: the engine's hot operations
+Runs AndroidAutomation's take_screenshot(), capture_frame(),
+is_button_blue(), recognize_text(), get_button_ocr_amount(),
+recognize_regions() (the batched step + amount read of every analysed
+frame) and one reset_game() attempt on the checked-in fixtures
+(benchmarks/fixtures, see make_fixtures.py), for every capture backend and
+OCR engine available here
+
+- latency per call: p50 / p95 / p99 (sleeps are skipped, only work is timed)
+- memory per call from tracemalloc: peak, and what is still allocated after
+- OCR answers checked against fixtures/expected.json
+- a JSON results file; --compare flags p50 regressions against an earlier one
+  (exit code 1), so a slower build is caught before it goes to the phones
+
+Backends: the fake device (fixtures) always; raw/png screencap and
+uiautomator2 when they answer. Engines: template (the fixtures' glyph
+bank) always; resident tesseract, pytesseract and easyocr when installed
+(listed as skipped otherwise). Every engine is also run through the OCR
+worker pool (ocr_pool.py, --pool-workers processes).
+OCR cache and change detection are off unless --cached is given, so the
+engines themselves are measured.
+
+Run: python benchmarks/bench_engine.py [--compare benchmarks/results/old.json]
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import itertools
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+import PIL
+
+from clock import NoSleepClock
+from device_backend import FakeDevice, ShellBackend, Uiautomator2Backend
+from frames import load_frame
+from startup import module_available
+from structured_log import StructuredLogger
+from tesseract_engine import resident_tesseract_available
+
+BENCH_DIR = Path(__file__).resolve().parent
+FIXTURES_DIR = BENCH_DIR / "fixtures"
+RESULTS_DIR = BENCH_DIR / "results"
+
+# Regressions smaller than this are timer noise, whatever the ratio
+NOISE_FLOOR_MS = 0.05
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def time_calls(function, iterations, max_seconds):
+    """Seconds per call, after one warm-up call (at least 3 calls, at most max_seconds)"""
+    function()
+    timings = []
+    deadline = time.perf_counter() + max_seconds
+    while len(timings) < iterations and (len(timings) < 3 or time.perf_counter() < deadline):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def measure_memory(function, calls):
+    """(median peak KB, KB still allocated per call) over calls traced calls"""
+    tracemalloc.start()
+    try:
+        function()
+        peaks = []
+        before = tracemalloc.get_traced_memory()[0]
+        for _ in range(calls):
+            start = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            function()
+            peaks.append(tracemalloc.get_traced_memory()[1] - start)
+        retained = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    peaks.sort()
+    return peaks[len(peaks) // 2] / 1024, retained / calls / 1024
+
+
+class Case:
+    """One operation on one backend with one engine; check(result) says if it read right"""
+
+    def __init__(self, operation, backend, engine, function, check=None):
+        self.operation = operation
+        self.backend = backend
+        self.engine = engine
+        self.function = function
+        self.check = check
+
+    def run(self, iterations, max_seconds, memory_calls):
+        answers = []
+
+        def call():
+            result = self.function()
+            if self.check is not None:
+                answers.append(self.check(result))
+
+        # The engine's own prints would be timed as terminal I/O
+        with contextlib.redirect_stdout(io.StringIO()):
+            timings = sorted(time_calls(call, iterations, max_seconds))
+            peak_kb, retained_kb = measure_memory(self.function, memory_calls)
+        ms = [t * 1000 for t in timings]
+        return {
+            'operation': self.operation,
+            'backend': self.backend,
+            'engine': self.engine,
+            'iterations': len(ms),
+            'p50_ms': round(percentile(ms, 0.50), 4),
+            'p95_ms': round(percentile(ms, 0.95), 4),
+            'p99_ms': round(percentile(ms, 0.99), 4),
+            'mean_ms': round(sum(ms) / len(ms), 4),
+            'max_ms': round(ms[-1], 4),
+            'peak_kb': round(peak_kb, 1),
+            'retained_kb': round(retained_kb, 2),
+            'correct': round(sum(answers) / len(answers), 3) if answers else None,
+        }
+
+
+def load_fixtures():
+    with open(FIXTURES_DIR / "expected.json", 'r') as f:
+        expected = json.load(f)
+    screens = [(name, load_frame(str(FIXTURES_DIR / name)), spec)
+               for name, spec in sorted(expected['screens'].items())]
+    regions = {name: tuple(region) for name, region in expected['regions'].items()}
+    return screens, regions
+
+
+def ocr_engines(pool_workers=2):
+    """(label, ocr_engine, use_resident_tesseract, workers) for every engine installed here,
+    and the labels of those that are not"""
+    available = {
+        'template': ('template', False, True),
+        'tesseract-resident': ('pytesseract', True, resident_tesseract_available()),
+        'pytesseract': ('pytesseract', False, module_available('pytesseract') and shutil.which('tesseract')),
+        'easyocr': ('easyocr', False, module_available('easyocr')),
+    }
+    engines = []
+    skipped = []
+    for label, (engine, use_resident, installed) in available.items():
+        if not installed:
+            skipped.append(label)
+            continue
+        engines.append((label, engine, use_resident, 0))
+        if pool_workers > 0:
+            engines.append((f"{label}+pool{pool_workers}", engine, use_resident, pool_workers))
+    return engines, skipped
+
+
+def capture_backends(clock, screencap_command):
+    """{label: backend} for every capture path that answers"""
+    backends = {'fake': FakeDevice(str(FIXTURES_DIR), advance='capture', clock=clock)}
+    with contextlib.redirect_stdout(io.StringIO()):
+        raw = ShellBackend('raw', screencap_command)
+        try:
+            if raw.raw_screencap is not None and raw.raw_screencap.capture() is not None:
+                backends['raw'] = raw
+        except Exception:
+            pass
+        png = ShellBackend('png', screencap_command)
+        if png.capture_png() is not None:
+            backends['png'] = png
+        if module_available('uiautomator2'):
+            try:
+                backends['uiautomator2'] = Uiautomator2Backend.connect()
+            except Exception:
+                pass
+    return backends
+
+
+class Suite:
+    """Builds automation instances on the fixtures and collects the cases"""
+
+    def __init__(self, cached=False, screencap_command='screencap', pool_workers=2):
+        self.cached = cached
+        self.screencap_command = screencap_command
+        self.pool_workers = pool_workers
+        self.pooled = []  # automations with worker processes to stop at the end
+        self.clock = NoSleepClock()
+        self.screens, self.regions = load_fixtures()
+        self.tmp = tempfile.mkdtemp(prefix='bench_engine_')
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.module = importlib.import_module('android-automation')
+        # Template engine: the glyph bank learned from the fixtures
+        self.module.GLYPH_BANK_FILE = str(FIXTURES_DIR / "glyph_bank.npz")
+
+    def automation(self, backend, engine='template', use_resident=False, workers=0):
+        with contextlib.redirect_stdout(io.StringIO()):
+            automation = self.module.AndroidAutomation(backend=backend, clock=self.clock)
+        # Single-threaded, nothing written, fixture coordinates (not the phone's config)
+        automation.use_pipeline = False
+        automation.ocr_workers = workers
+        automation.trace_dir = None
+        automation.metrics_dir = None
+        automation.save_screenshots = False
+        automation.save_anomalies = False
+        automation.log.close()
+        automation.log = StructuredLogger(None, console=False)
+        if workers:
+            self.pooled.append(automation)
+        automation.glyph_samples = None
+        automation.ocr_engine = engine
+        automation.use_resident_tesseract = use_resident
+        if not self.cached:
+            automation.ocr_cache = None
+            automation.change_detector = None
+        automation.button_x, automation.button_y, automation.button_width, automation.button_height = \
+            self.regions['button']
+        automation.ocr_above_x, automation.ocr_above_y, automation.ocr_above_width, \
+            automation.ocr_above_height = self.regions['step']
+        automation.ocr_second_x, automation.ocr_second_y, automation.ocr_second_width, \
+            automation.ocr_second_height = self.regions['amount']
+        automation.timer_ocr_x, automation.timer_ocr_y, automation.timer_ocr_width, \
+            automation.timer_ocr_height = self.regions['timer']
+        return automation
+
+    def capture_cases(self):
+        cases = []
+        for label, backend in capture_backends(self.clock, self.screencap_command).items():
+            automation = self.automation(backend)
+            output = os.path.join(self.tmp, f"{label}.png")
+            cases.append(Case('capture_frame', label, '-', automation.capture_frame,
+                              lambda frame: frame is not None))
+            cases.append(Case('take_screenshot', label, '-',
+                              lambda a=automation, path=output: a.take_screenshot(path),
+                              lambda path: path is not None))
+        return cases
+
+    def analysis_cases(self, engines):
+        fake = FakeDevice(str(FIXTURES_DIR), advance='capture', clock=self.clock)
+        cases = []
+
+        automation = self.automation(fake)
+        screens = itertools.cycle(self.screens)
+        cases.append(self.cycling_case(
+            'is_button_blue', '-', screens, lambda frame, a=automation: a.is_button_blue(frame),
+            lambda result, spec: result == spec['button_blue']))
+
+        for label, engine, use_resident, workers in engines:
+            automation = self.automation(fake, engine, use_resident, workers)
+            cases.append(self.cycling_case(
+                'recognize_text', label, itertools.cycle(self.screens),
+                lambda frame, a=automation: a.recognize_text(frame, self.regions['step']),
+                lambda result, spec: result['text'] == spec['texts']['step']))
+            cases.append(self.cycling_case(
+                'recognize_regions', label, itertools.cycle(self.screens),
+                lambda frame, a=automation: a.recognize_regions(frame, a.step_regions()),
+                lambda result, spec: (result['step']['text'], result['amount']['text']) ==
+                                     (spec['texts']['step'], spec['texts']['amount'])))
+            cases.append(self.cycling_case(
+                'get_button_ocr_amount', label, itertools.cycle(self.screens),
+                lambda frame, a=automation: a.get_button_ocr_amount(frame),
+                lambda result, spec: result == spec['amount']))
+            cases.append(self.reset_case(label, engine, use_resident, workers))
+        return cases
+
+    def cycling_case(self, operation, engine, screens, function, check):
+        """A case that moves on to the next fixture screen on every call"""
+        current = {}
+
+        def call():
+            name, frame, spec = next(screens)
+            current['spec'] = spec
+            return function(frame)
+        return Case(operation, 'fake', engine, call, lambda result: check(result, current['spec']))
+
+    def reset_case(self, label, engine, use_resident, workers=0):
+        """One reset_game() attempt: the tap chain, a capture and the amount OCR"""
+        name, frame, spec = next((s for s in self.screens if s[2]['amount'] <= 10), self.screens[0])
+        device = FakeDevice([frame.array], advance=None, clock=self.clock)
+        automation = self.automation(device, engine, use_resident, workers)
+        automation.reset_target_amount = spec['amount']
+
+        def attempt():
+            automation.running = True
+            return automation.reset_game()
+        return Case('reset_game attempt', 'fake', label, attempt, lambda ok: ok)
+
+    def run(self, iterations, max_seconds, memory_calls, operations=None):
+        engines, skipped = ocr_engines(self.pool_workers)
+        for label in skipped:
+            print(f"⏭️  {label}: not installed, skipped")
+        cases = self.capture_cases() + self.analysis_cases(engines)
+        results = []
+        for case in cases:
+            if operations and case.operation not in operations:
+                continue
+            try:
+                results.append(case.run(iterations, max_seconds, memory_calls))
+            except Exception as e:
+                print(f"⚠️  {case.operation} ({case.backend}, {case.engine}) failed: {e}")
+                continue
+            print_row(results[-1])
+        for automation in self.pooled:
+            if automation.ocr_pool is not None:
+                automation.ocr_pool.close()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+        return results
+
+
+def print_header():
+    print(f"{'operation':<22} {'backend':<13} {'engine':<19} {'n':>5} {'p50 ms':>9} "
+          f"{'p95 ms':>9} {'p99 ms':>9} {'peak KB':>9} {'kept KB':>8} {'correct':>8}")
+
+
+def print_row(row):
+    correct = '-' if row['correct'] is None else f"{row['correct']:.0%}"
+    print(f"{row['operation']:<22} {row['backend']:<13} {row['engine']:<19} {row['iterations']:>5} "
+          f"{row['p50_ms']:>9.3f} {row['p95_ms']:>9.3f} {row['p99_ms']:>9.3f} "
+          f"{row['peak_kb']:>9.1f} {row['retained_kb']:>8.2f} {correct:>8}")
+
+
+def host_info():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, timeout=5, cwd=BENCH_DIR).stdout.strip() or None
+    except Exception:
+        commit = None
+    return {
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+        'numpy': np.__version__,
+        'pillow': PIL.__version__,
+        'commit': commit,
+    }
+
+
+def compare(results, baseline_file, threshold):
+    """Print p50 changes against a baseline results file, returns the regressions"""
+    with open(baseline_file, 'r') as f:
+        baseline = {(r['operation'], r['backend'], r['engine']): r for r in json.load(f)['results']}
+    regressions = []
+    print(f"\nCompared with {baseline_file} (regression: p50 above x{threshold:.2f})")
+    for row in results:
+        old = baseline.get((row['operation'], row['backend'], row['engine']))
+        if old is None or not old['p50_ms']:
+            continue
+        ratio = row['p50_ms'] / old['p50_ms']
+        regressed = ratio > threshold and row['p50_ms'] - old['p50_ms'] > NOISE_FLOOR_MS
+        if regressed:
+            regressions.append(row)
+        mark = '❌' if regressed else '  '
+        print(f" {mark} {row['operation']:<22} {row['backend']:<13} {row['engine']:<19} "
+              f"{old['p50_ms']:>9.3f} -> {row['p50_ms']:>9.3f} ms   x{ratio:5.2f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the engine's hot operations on fixtures")
+    parser.add_argument('--iterations', type=int, default=200, help="timed calls per case")
+    parser.add_argument('--max-seconds', type=float, default=3.0, help="time budget per case")
+    parser.add_argument('--memory-calls', type=int, default=10, help="calls traced with tracemalloc")
+    parser.add_argument('--operation', action='append', help="only run this operation (repeatable)")
+    parser.add_argument('--cached', action='store_true', help="keep OCR cache and change detection on")
+    parser.add_argument('--pool-workers', type=int, default=2,
+                        help="worker processes for the OCR pool cases (0: no pool cases)")
+    parser.add_argument('--screencap-command', default='screencap')
+    parser.add_argument('--output', help="results file (default benchmarks/results/engine_<time>.json)")
+    parser.add_argument('--compare', help="earlier results file to check for regressions")
+    parser.add_argument('--threshold', type=float, default=1.2, help="p50 ratio that counts as a regression")
+    args = parser.parse_args()
+
+    suite = Suite(args.cached, args.screencap_command, args.pool_workers)
+    print_header()
+    results = suite.run(args.iterations, args.max_seconds, args.memory_calls, args.operation)
+
+    output = Path(args.output) if args.output else \
+        RESULTS_DIR / time.strftime("engine_%Y%m%d_%H%M%S.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({
+            'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'host': host_info(),
+            'options': {'iterations': args.iterations, 'max_seconds': args.max_seconds,
+                        'cached': args.cached, 'pool_workers': args.pool_workers},
+            'results': results,
+        }, f, indent=2)
+    print(f"\n💾 Results written to {output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print(f"❌ {len(regressions)} regressions")
+            sys.exit(1)
+        print("✅ No regressions")
+
+
+if __name__ == "__main__":
+    main()
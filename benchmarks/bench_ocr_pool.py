@@ -0,0 +1,84 @@
+"""
+Throughput benchmark: OCR worker pool
+Reads batches of button-sized crops in-process and through OCRProcessPool
+with 1, 2, 4... workers and reports regions per second
+
+The crops are digits drawn with PIL's default font and the engine is a
+glyph bank learned from them, so it runs without tesseract/easyocr.
+Pass an engine name ('pytesseract', 'easyocr') to measure that instead.
+
+Run: python benchmarks/bench_ocr_pool.py [engine] [max workers]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from glyph_ocr import GlyphBank
+from ocr_pool import OCRProcessPool, _build_reader
+
+WHITELIST = '0123456789/:$'
+
+
+def render_crop(text, width=120, height=25):
+    """A binarized crop: dark text on white, like the preprocessed regions"""
+    img = Image.new('L', (width, height), 255)
+    ImageDraw.Draw(img).text((4, 6), text, fill=0)
+    return np.where(np.asarray(img) > 127, 255, 0).astype(np.uint8)
+
+
+def sample_texts(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return [f"{rng.integers(1, 30)}/{rng.integers(10, 40)} ${rng.integers(1, 999)}"
+            for _ in range(count)]
+
+
+def learn_bank(path):
+    bank = GlyphBank()
+    for text in ['0123456789', '$/:', '10/20 $15', '2/10 $98']:
+        bank.learn(render_crop(text), text)
+    bank.save(path)
+
+
+def measure(read_many, crops, batch):
+    started = time.perf_counter()
+    for i in range(0, len(crops), batch):
+        read_many(crops[i:i + batch])
+    return len(crops) / (time.perf_counter() - started)
+
+
+def main(engine='template', max_workers=None, regions=400, batch=8):
+    max_workers = max_workers or os.cpu_count() or 1
+    crops = [render_crop(text) for text in sample_texts(regions)]
+    bank_file = os.path.join(tempfile.mkdtemp(), 'glyph_bank.npz')
+    if engine == 'template':
+        learn_bank(bank_file)
+
+    print(f"OCR throughput, engine {engine}, batches of {batch} crops (regions/s)")
+    read = _build_reader(engine, WHITELIST, bank_file, True)
+    baseline = measure(lambda batch_crops: [read(c) for c in batch_crops], crops, batch)
+    print(f"  in-process      {baseline:10.1f}")
+
+    workers = 1
+    while workers <= max_workers:
+        pool = OCRProcessPool(engine, workers, whitelist=WHITELIST, glyph_bank_file=bank_file)
+        try:
+            warm = pool.warm()
+            rate = measure(pool.recognize_many, crops, batch)
+        finally:
+            pool.close()
+        print(f"  {workers:2d} workers      {rate:10.1f}   x{rate / baseline:5.2f}   "
+              f"(warm-up {warm:.2f}s)")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else 'template',
+         int(sys.argv[2]) if len(sys.argv) > 2 else None)
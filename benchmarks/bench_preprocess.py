@@ -0,0 +1,55 @@
+"""
+Micro-benchmark: OCR preprocessing
+Compares the original PIL pipeline (grayscale, Contrast(2.0), median
+threshold) with OCRPreprocessor on button-sized crops
+
+Run: python benchmarks/bench_preprocess.py
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+from PIL import Image, ImageEnhance
+
+from ocr_preprocess import OCRPreprocessor
+
+
+def pil_pipeline(crop):
+    """The preprocessing recognize_text() used before OCRPreprocessor"""
+    img = Image.fromarray(crop).convert('L')
+    img = ImageEnhance.Contrast(img).enhance(2.0)
+    img_array = np.array(img)
+    threshold = np.median(img_array)
+    return np.where(img_array > threshold, 255, 0).astype(np.uint8)
+
+
+def timeit(function, repeats):
+    started = time.perf_counter()
+    for _ in range(repeats):
+        function()
+    return (time.perf_counter() - started) / repeats * 1e6
+
+
+def main(repeats=2000):
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 256, size=(1920, 1080, 4), dtype=np.uint8)
+    regions = {'button 120x25': (220, 370, 120, 25), 'amount 60x25': (110, 400, 60, 25)}
+    preprocessor = OCRPreprocessor()
+
+    print("OCR preprocessing (µs per crop)")
+    for name, (x, y, w, h) in regions.items():
+        crop = frame[y:y + h, x:x + w]
+        same = np.array_equal(pil_pipeline(np.ascontiguousarray(crop[..., :3])),
+                              preprocessor.process(crop[..., :3], key=name))
+        old = timeit(lambda: pil_pipeline(np.ascontiguousarray(crop[..., :3])), repeats)
+        new = timeit(lambda: preprocessor.process(crop[..., :3], key=name), repeats)
+        print(f"  {name:<14} PIL {old:8.1f}   buffers+LUT {new:8.1f}   "
+              f"x{old / new:4.1f}   identical output: {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark fixtures
+Draws the frames bench_engine.py runs on: full-size screens with the
+button, step, amount and timer regions at the default coordinates of
+android-automation.py, plus the texts they show (expected.json) and a
+glyph bank learned from them for the 'template' OCR engine
+
+Screenshots from the phone can be added to fixtures/ as well; add their
+texts to expected.json to have the OCR checked on them.
+
+Run: python benchmarks/make_fixtures.py
+"""
+
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from glyph_ocr import GlyphBank
+from ocr_preprocess import OCRPreprocessor
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+SCREEN_SIZE = (1080, 1920)
+
+# Default regions of AndroidAutomation (x, y, width, height)
+REGIONS = {
+    'button': (220, 370, 120, 25),
+    'step': (220, 340, 120, 25),
+    'amount': (110, 400, 60, 25),
+    'timer': (250, 400, 90, 25),
+}
+
+BLUE = (30, 90, 220)
+GREY = (120, 120, 120)
+
+# name: button color and the text of each region
+SCREENS = {
+    'reset_ready': {'button_blue': False, 'texts': {'button': '$5', 'step': '1/20', 'amount': '$5'}},
+    'button_grey': {'button_blue': False, 'texts': {'button': '$25', 'step': '5/20', 'amount': '$25'}},
+    'button_blue': {'button_blue': True,
+                    'texts': {'button': '$15', 'step': '10/20', 'amount': '$15', 'timer': ':03'}},
+    'final_step': {'button_blue': True, 'texts': {'button': '$40', 'step': '20/30', 'amount': '$40'}},
+}
+
+
+def load_font(size=18):
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:
+        # Pillow < 10.1: fixed-size bitmap font
+        return ImageFont.load_default()
+
+
+def draw_screen(spec, font):
+    """One full-size screen: dark background, a few panels, the texts"""
+    img = Image.new('RGB', SCREEN_SIZE, (24, 32, 48))
+    draw = ImageDraw.Draw(img)
+    draw.rectangle((40, 200, 1040, 700), fill=(40, 52, 74))
+    draw.rectangle((40, 800, 1040, 1100), fill=(52, 40, 74))
+    for name, text in spec['texts'].items():
+        x, y, w, h = REGIONS[name]
+        if name == 'button':
+            draw.rectangle((x, y, x + w - 1, y + h - 1), fill=BLUE if spec['button_blue'] else GREY)
+        else:
+            draw.rectangle((x, y, x + w - 1, y + h - 1), fill=(16, 16, 16))
+        draw.text((x + 6, y + 3), text, fill=(255, 255, 255), font=font)
+    return img
+
+
+def learn_bank(screens, images):
+    """Glyph bank from the binarized text regions, like glyph_ocr.py learns from samples"""
+    bank = GlyphBank()
+    preprocessor = OCRPreprocessor()
+    for name, spec in screens.items():
+        array = np.asarray(images[name])
+        for region_name, text in spec['texts'].items():
+            x, y, w, h = REGIONS[region_name]
+            binary = preprocessor.process(array[y:y + h, x:x + w])
+            if not bank.learn(binary, text):
+                print(f"⚠️  {name}/{region_name}: glyphs do not line up with '{text}'")
+    return bank
+
+
+def main():
+    FIXTURES_DIR.mkdir(exist_ok=True)
+    font = load_font()
+    images = {name: draw_screen(spec, font) for name, spec in SCREENS.items()}
+    for name, img in images.items():
+        img.save(FIXTURES_DIR / f"{name}.png", optimize=True)
+
+    expected = {}
+    for name, spec in SCREENS.items():
+        amount = int(spec['texts']['button'].lstrip('$'))
+        expected[f"{name}.png"] = {'button_blue': spec['button_blue'], 'amount': amount,
+                                   'texts': spec['texts']}
+    with open(FIXTURES_DIR / "expected.json", 'w') as f:
+        json.dump({'regions': REGIONS, 'screens': expected}, f, indent=2)
+
+    bank = learn_bank(SCREENS, images)
+    bank.save(FIXTURES_DIR / "glyph_bank.npz")
+    print(f"✅ {len(images)} screens and a {len(bank)}-glyph bank written to {FIXTURES_DIR}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Per-region change detection
+Used by android-automation.py to skip color checks and OCR on regions
+whose pixels did not change since the last time they were analysed
+
+Each region is compared against the pixels its last result was computed
+from, counting the share of pixels whose difference is above `delta`
+(see waiting.changed_fraction). A digit edit only touches a few percent
+of a text crop, so a mean difference would miss it. OCR regions are
+compared in full; `stride` only thins out regions looked at for color.
+If the share is at or below `fraction` the previous result is reused.
+"""
+
+from waiting import changed_fraction
+
+
+class RegionChangeDetector:
+    """Remembers the analysed pixels and the last result for every region"""
+
+    def __init__(self, stride=4, fraction=0.0, delta=32):
+        self.stride = stride
+        self.fraction = fraction
+        self.delta = delta
+        self.samples = {}
+        # Sample of a changed region, kept once its new result is stored
+        self.pending = {}
+        self.results = {}
+        self.checks = {}
+        self.skips = {}
+
+    def changed(self, name, pixels, stride=None):
+        """True if the region differs from the sample its result came from"""
+        stride = self.stride if stride is None else stride
+        sample = pixels[::stride, ::stride]
+        previous = self.samples.get(name)
+        if previous is not None and changed_fraction(sample, previous, 1, self.delta) <= self.fraction:
+            return False
+        self.pending[name] = sample.copy()
+        return True
+
+    def lookup(self, name, pixels, stride=None):
+        """Returns (True, previous result) if the region is unchanged, else (False, None)"""
+        self.checks[name] = self.checks.get(name, 0) + 1
+        if not self.changed(name, pixels, stride) and name in self.results:
+            self.skips[name] = self.skips.get(name, 0) + 1
+            return True, self.results[name]
+        return False, None
+
+    def store(self, name, result):
+        # Only now do the new pixels stand for the result (a failed read keeps the old ones)
+        if name in self.pending:
+            self.samples[name] = self.pending.pop(name)
+        self.results[name] = result
+
+    def gated(self, name, pixels, compute, stride=None):
+        """Return compute() for changed regions, the previous result otherwise"""
+        unchanged, result = self.lookup(name, pixels, stride)
+        if unchanged:
+            return result
+        result = compute()
+        self.store(name, result)
+        return result
+
+    def forget(self, name=None):
+        """Drop the stored sample/result for one region (or all)"""
+        if name is None:
+            self.samples.clear()
+            self.pending.clear()
+            self.results.clear()
+        else:
+            self.samples.pop(name, None)
+            self.pending.pop(name, None)
+            self.results.pop(name, None)
+
+    def skip_ratios(self):
+        return {name: self.skips.get(name, 0) / count for name, count in self.checks.items() if count}
@@ -0,0 +1,59 @@
+"""
+Clocks
+Used by android-automation.py for every timestamp and sleep, so a run
+can be driven by a VirtualClock (replay.py) instead of real time, or skip
+its sleeps (NoSleepClock, benchmarks)
+"""
+
+import time
+
+
+class SystemClock:
+    """Real time"""
+
+    def time(self):
+        return time.time()
+
+    def monotonic(self):
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+
+
+class NoSleepClock(SystemClock):
+    """Real time, but sleeps return at once (only the work between them is timed)"""
+
+    def __init__(self):
+        self.slept = 0.0
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            self.slept += seconds
+
+
+class VirtualClock:
+    """Time that only moves when something sleeps or calls advance()
+
+    monotonic() starts at `start`; time() is that offset from `wall_start`.
+    """
+
+    def __init__(self, start=0.0, wall_start=0.0):
+        self.now = start
+        self.wall_start = wall_start
+        self.slept = 0.0
+
+    def time(self):
+        return self.wall_start + self.now
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            self.now += seconds
+            self.slept += seconds
+
+    def advance(self, seconds):
+        self.now += seconds
@@ -0,0 +1,176 @@
+"""
+Debug frames
+Used by android-automation.py to write captures to screenshots_dir
+(save_screenshots) and to keep the frames behind anomalies (a reset, an
+unreadable OCR read, an error) without stalling the loop
+
+- frames are queued and encoded by a writer thread; when the queue is
+  full the frame is dropped and counted instead of blocking (a few slots
+  are reserved for anomaly frames, captures cannot crowd them out)
+- captures go to <directory>/debug as a ring buffer: only the newest
+  max_frames / max_bytes are kept, older frame_* files there (also from
+  earlier runs) are deleted once the first capture is written; nothing
+  else in the directory is ever touched
+- anomaly frames go to <directory>/anomalies with their reason in the
+  file name and have their own, separate limit
+- PNG is written with fast compression (or BMP / JPEG), still a normal
+  image the fake device and any viewer can open
+"""
+
+import queue
+import re
+import threading
+from collections import deque
+from pathlib import Path
+
+from startup import lazy_module
+
+Image = lazy_module('PIL.Image')
+np = lazy_module('numpy')
+
+FORMATS = {
+    'png': ('.png', {'compress_level': 1}),
+    'bmp': ('.bmp', {}),
+    'jpg': ('.jpg', {'quality': 90}),
+}
+
+_STOP = object()
+
+
+def _timestamp(name):
+    match = re.search(r'_(\d+)', name)
+    return int(match.group(1)) if match else 0
+
+
+class DebugFrameWriter:
+    """Writes debug frames on a background thread with bounded retention"""
+
+    def __init__(self, directory, max_frames=200, max_bytes=200 * 1024 * 1024, max_anomalies=50,
+                 image_format='png', queue_size=8, anomaly_slots=4):
+        if image_format not in FORMATS:
+            raise ValueError(f"Unknown debug frame format {image_format!r} (use {', '.join(FORMATS)})")
+        self.directory = Path(directory) / "debug"
+        self.anomaly_directory = Path(directory) / "anomalies"
+        self.extension, self.save_options = FORMATS[image_format]
+        self.max_frames = max_frames
+        self.max_bytes = max_bytes
+        self.max_anomalies = max_anomalies
+        self.written = 0
+        self.anomalies = 0
+        self.dropped = 0
+        self.deleted = 0
+        self.errors = 0
+        self.last_error = None
+        # (path, size) oldest first, existing files included so retention covers earlier runs;
+        # captures are only looked at once one is saved (anomalies alone leave them alone)
+        self.frames = None
+        self.frame_bytes = 0
+        self.kept_anomalies = None
+        self.queue_size = queue_size
+        self.queue = queue.Queue(maxsize=queue_size + anomaly_slots)
+        self.thread = threading.Thread(target=self._writer_loop, name='debug-frames', daemon=True)
+        self.thread.start()
+
+    @staticmethod
+    def _existing(directory, prefix):
+        files = []
+        if directory.is_dir():
+            for path in directory.iterdir():
+                if path.name.startswith(prefix) and path.is_file():
+                    files.append((path, path.stat().st_size))
+        # Oldest first by the capture time (ms) in the name
+        files.sort(key=lambda item: (_timestamp(item[0].name), item[0].name))
+        return deque(files)
+
+    def save(self, frame):
+        """Queue a capture (never blocks)"""
+        return self._queue(frame, None)
+
+    def anomaly(self, frame, reason):
+        """Queue the frame behind an anomaly, kept apart from the ring buffer"""
+        return self._queue(frame, re.sub(r'[^a-z0-9_]+', '_', reason.lower()).strip('_') or 'anomaly')
+
+    def _queue(self, frame, reason):
+        if reason is None and self.queue.qsize() >= self.queue_size:
+            self.dropped += 1
+            return False
+        try:
+            # The array is never written to after capture, so the thread can encode it as is
+            self.queue.put_nowait((frame.array, frame.timestamp, reason))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _write(self, array, timestamp, reason):
+        ms = int(timestamp * 1000)
+        if reason is None:
+            if self.frames is None:
+                self.frames = self._existing(self.directory, "frame_")
+                self.frame_bytes = sum(size for _, size in self.frames)
+            directory, name, kept = self.directory, f"frame_{ms}", self.frames
+        else:
+            if self.kept_anomalies is None:
+                self.kept_anomalies = self._existing(self.anomaly_directory, "anomaly_")
+            directory, name, kept = self.anomaly_directory, f"anomaly_{ms}_{reason}", self.kept_anomalies
+        directory.mkdir(parents=True, exist_ok=True)
+        image = Image.fromarray(np.ascontiguousarray(array))
+        if self.extension == '.jpg' and image.mode != 'RGB':
+            image = image.convert('RGB')
+        path = directory / (name + self.extension)
+        image.save(str(path), **self.save_options)
+        size = path.stat().st_size
+        kept.append((path, size))
+        if reason is None:
+            self.written += 1
+            self.frame_bytes += size
+            while len(kept) > 1 and (len(kept) > self.max_frames or self.frame_bytes > self.max_bytes):
+                self.frame_bytes -= self._delete(kept)
+        else:
+            self.anomalies += 1
+            while len(kept) > self.max_anomalies:
+                self._delete(kept)
+
+    def _delete(self, kept):
+        path, size = kept.popleft()
+        try:
+            path.unlink()
+            self.deleted += 1
+        except FileNotFoundError:
+            pass
+        return size
+
+    def _writer_loop(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is _STOP:
+                    return
+                self._write(*item)
+            except Exception as e:
+                self.errors += 1
+                self.last_error = e
+            finally:
+                self.queue.task_done()
+
+    def flush(self):
+        """Wait until every queued frame is on disk"""
+        if self.thread.is_alive():
+            self.queue.join()
+
+    def close(self):
+        if self.thread.is_alive():
+            self.queue.put(_STOP)
+            self.thread.join()
+
+    def stats(self):
+        return {
+            'written': self.written,
+            'anomalies': self.anomalies,
+            'dropped': self.dropped,
+            'deleted': self.deleted,
+            'errors': self.errors,
+            'kept': len(self.frames or ()),
+            'kept_mb': self.frame_bytes / (1024 * 1024),
+        }
+
@@ -0,0 +1,397 @@
+"""
+Device backends
+Used by android-automation.py for everything that touches the device:
+screen size, captures, taps and starting the game
+
+- Uiautomator2Backend: uiautomator2 (standalone on the phone or over ADB)
+- ShellBackend: shell commands (raw screencap, persistent-shell taps, am start)
+- FakeDevice: frames from disk and a tap log, for running, profiling and
+  benchmarking the engine on a computer with no phone attached
+"""
+
+import io
+import re
+import subprocess
+import time
+from pathlib import Path
+
+from clock import SystemClock
+from frames import Frame, load_frame
+from input_injection import InputTapInjector, SendeventInjector, sequence_script, sequence_timeout
+from startup import STARTUP, lazy_module, module_available
+
+u2 = lazy_module('uiautomator2')
+Image = lazy_module('PIL.Image')
+np = lazy_module('numpy')
+screencap_raw = lazy_module('screencap_raw')
+IMAGE_PROCESSING_AVAILABLE = module_available('PIL') and module_available('numpy')
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+
+class DeviceBackend:
+    """What AndroidAutomation needs from a device"""
+
+    name = 'device'
+    serial = None
+
+    def screen_size(self):
+        """(width, height), or None if it has to come from a capture"""
+        return None
+
+    def capture(self):
+        """Capture the screen, returns a Frame (or None)"""
+        raise NotImplementedError
+
+    def tap(self, x, y):
+        raise NotImplementedError
+
+    def probe_tap(self):
+        """Same round-trip as a tap without touching the screen (latency probe)"""
+        raise NotImplementedError
+
+    def tap_sequence(self, steps):
+        """Tap a chain of [(x, y, delay), ...]"""
+        for x, y, delay in steps:
+            self.tap(x, y)
+            if delay > 0:
+                time.sleep(delay)
+
+    def start_app(self, package, restart=False):
+        """Open an app, returns how it was started or None"""
+        return None
+
+    def current_app(self):
+        """Package of the foreground app, or None if the backend cannot tell"""
+        return None
+
+    def latency_stats(self):
+        return {'count': 0}
+
+    def close(self):
+        pass
+
+
+def run_shell(command, timeout=5):
+    return subprocess.run(['sh', '-c', command], capture_output=True, text=True, timeout=timeout)
+
+
+def start_app_with_shell(package):
+    """am start, then monkey - returns the method that worked or None"""
+    # am (Activity Manager) works if you have shell access (root or ADB over network)
+    try:
+        if run_shell(f'am start -n {package}/.MainActivity').returncode == 0:
+            return 'am start'
+    except Exception:
+        pass
+    try:
+        if run_shell(f'monkey -p {package} -c android.intent.category.LAUNCHER 1').returncode == 0:
+            return 'monkey'
+    except Exception:
+        pass
+    return None
+
+
+class Uiautomator2Backend(DeviceBackend):
+    """uiautomator2 device (works standalone, no computer needed)"""
+
+    name = 'uiautomator2'
+
+    def __init__(self, device):
+        self.device = device
+
+    @classmethod
+    def connect(cls):
+        """Connect locally (standalone mode), then through wireless ADB"""
+        try:
+            with STARTUP.measure('uiautomator2.connect()', 'connect'):
+                device = u2.connect()  # Auto-detect device
+            print("✅ Connected via uiautomator2 (standalone mode)")
+        except Exception:
+            with STARTUP.measure("uiautomator2.connect('127.0.0.1:5555')", 'connect'):
+                device = u2.connect('127.0.0.1:5555')
+            print("✅ Connected via uiautomator2 (wireless ADB)")
+        return cls(device)
+
+    @property
+    def serial(self):
+        return getattr(self.device, 'serial', None)
+
+    def screen_size(self):
+        info = self.device.info
+        return info['displayWidth'], info['displayHeight']
+
+    def capture(self):
+        # Returns a PIL image, nothing touches disk
+        return Frame(self.device.screenshot(), source='uiautomator2')
+
+    def tap(self, x, y):
+        self.device.click(x, y)
+
+    def probe_tap(self):
+        # Same JSON-RPC round-trip to the uiautomator server as click()
+        self.device.info
+
+    def tap_sequence(self, steps):
+        # One uiautomator2 shell call runs the whole chain
+        self.device.shell(sequence_script(steps), timeout=sequence_timeout(steps))
+
+    def start_app(self, package, restart=False):
+        try:
+            self.device.app_start(package, stop=restart)
+            return 'uiautomator2'
+        except Exception as e:
+            print(f"⚠️  uiautomator2 app_start failed: {e}")
+            return start_app_with_shell(package)
+
+    def current_app(self):
+        return self.device.app_current().get('package')
+
+
+class ShellBackend(DeviceBackend):
+    """Shell commands run on the device itself (Termux / Pydroid with shell access)"""
+
+    name = 'shell'
+
+    def __init__(self, capture_method='raw', screencap_command='screencap', tap_method='input'):
+        self.screencap_command = screencap_command
+        self.tap_method = tap_method
+        self.tap_injector = None
+        self.size = None
+        self.device_serial = None
+        self.raw_screencap = None
+        if IMAGE_PROCESSING_AVAILABLE and capture_method == 'raw':
+            self.raw_screencap = screencap_raw.RawScreencap(['sh', '-c', screencap_command])
+
+    def screen_size(self):
+        if self.size is None:
+            try:
+                result = run_shell('wm size', timeout=2)
+                if result.returncode == 0:
+                    # Parse output like "Physical size: 1080x1920"
+                    w, h = map(int, result.stdout.split()[-1].split('x'))
+                    self.size = (w, h)
+            except Exception:
+                pass
+        return self.size
+
+    def capture(self):
+        if self.raw_screencap:
+            # Raw framebuffer straight into numpy (no PNG at all)
+            try:
+                return self.raw_screencap.capture()
+            except Exception as e:
+                print(f"⚠️  Raw screencap failed, falling back to PNG: {e}")
+                self.raw_screencap = None
+        return self.capture_png()
+
+    def capture_png(self):
+        """screencap -p streamed through a pipe instead of a temp file"""
+        try:
+            result = subprocess.run(
+                ['sh', '-c', f'{self.screencap_command} -p'],
+                capture_output=True,
+                check=False,
+                timeout=5
+            )
+            if result.returncode != 0 or not result.stdout:
+                print(f"⚠️  Screenshot via shell failed (code {result.returncode})")
+                return None
+            img = Image.open(io.BytesIO(result.stdout))
+            img.load()
+            return Frame(img, source='screencap')
+        except Exception as e:
+            print(f"⚠️  Screenshot via shell failed: {e}")
+            print(f"   Install uiautomator2 for better screenshot support")
+            return None
+
+    def get_tap_injector(self):
+        """Create the tap injector on first use"""
+        if self.tap_injector is None:
+            if self.tap_method == 'sendevent':
+                try:
+                    size = self.screen_size() or (1080, 1920)
+                    self.tap_injector = SendeventInjector(*size)
+                    print("✅ Tapping via sendevent (no input JVM)")
+                except Exception as e:
+                    print(f"⚠️  sendevent not available, using input tap: {e}")
+            if self.tap_injector is None:
+                self.tap_injector = InputTapInjector()
+        return self.tap_injector
+
+    @property
+    def serial(self):
+        if self.device_serial is None:
+            try:
+                self.device_serial = run_shell('getprop ro.serialno', timeout=2).stdout.strip() or None
+            except Exception:
+                pass
+        return self.device_serial
+
+    def tap(self, x, y):
+        # Persistent shell, no process spawn per tap
+        self.get_tap_injector().tap(x, y)
+
+    def probe_tap(self):
+        injector = self.get_tap_injector()
+        if injector.name != self.tap_method:
+            raise RuntimeError(f"{self.tap_method} taps not available")
+        injector.noop()
+
+    def tap_sequence(self, steps):
+        # One script written into the persistent shell
+        self.get_tap_injector().run_sequence(steps)
+
+    def start_app(self, package, restart=False):
+        if restart:
+            try:
+                run_shell(f'am force-stop {package}')
+            except Exception:
+                pass
+        return start_app_with_shell(package)
+
+    def current_app(self):
+        try:
+            result = run_shell('dumpsys window | grep mCurrentFocus', timeout=2)
+        except Exception:
+            return None
+        # mCurrentFocus=Window{... u0 com.example.game/com.example.game.MainActivity}
+        match = re.search(r'\s([\w.]+)/', result.stdout)
+        return match.group(1) if match else None
+
+    def latency_stats(self):
+        if self.tap_injector is None:
+            return {'count': 0}
+        return dict(self.tap_injector.latency.summary(), method=self.tap_injector.name)
+
+    def close(self):
+        if self.tap_injector is not None:
+            self.tap_injector.close()
+            self.tap_injector = None
+
+
+def image_files(path):
+    """Image files of a directory in name order, or the file itself"""
+    path = Path(path)
+    if path.is_dir():
+        return sorted(p for p in path.iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)
+    return [path]
+
+
+class FakeDevice(DeviceBackend):
+    """In-process device: serves frames from disk and logs taps
+
+    frames is a directory of screenshots, one image file or a list of
+    paths / images / arrays. By default every tap moves on to the next
+    frame (advance='tap'); advance='capture' plays them back one per
+    capture and advance=None keeps showing the first one. Delays emulate
+    the capture and tap latency of a real phone.
+    """
+
+    name = 'fake'
+
+    def __init__(self, frames, advance='tap', loop=True, capture_delay=0.0, tap_delay=0.0, app=None,
+                 clock=None):
+        if isinstance(frames, (str, Path)):
+            frames = image_files(frames)
+        # Decoded once, so captures cost no disk I/O
+        self.frames = [np.ascontiguousarray(load_frame(f).array) for f in frames]
+        if not self.frames:
+            raise ValueError("FakeDevice needs at least one frame")
+        self.advance = advance
+        self.loop = loop
+        self.capture_delay = capture_delay
+        self.tap_delay = tap_delay
+        self.app = app
+        self.clock = clock or SystemClock()
+        self.index = 0
+        self.captures = 0
+        self.taps = []
+        self.started_apps = []
+
+    def _next(self):
+        if self.index + 1 < len(self.frames):
+            self.index += 1
+        elif self.loop:
+            self.index = 0
+
+    def screen_size(self):
+        height, width = self.frames[self.index].shape[:2]
+        return width, height
+
+    def capture(self):
+        self.clock.sleep(self.capture_delay)
+        frame = Frame(self.frames[self.index], timestamp=self.clock.time(), source='fake')
+        self.captures += 1
+        if self.advance == 'capture':
+            self._next()
+        return frame
+
+    def probe_tap(self):
+        self.clock.sleep(self.tap_delay)
+
+    def tap(self, x, y):
+        self.clock.sleep(self.tap_delay)
+        self.taps.append((self.clock.time(), x, y))
+        if self.advance == 'tap':
+            self._next()
+
+    def tap_sequence(self, steps):
+        for x, y, delay in steps:
+            self.tap(x, y)
+            self.clock.sleep(delay)
+
+    def start_app(self, package, restart=False):
+        self.app = package
+        self.started_apps.append(package)
+        return 'fake'
+
+    def current_app(self):
+        return self.app
+
+    def latency_stats(self):
+        return {'count': len(self.taps), 'mean_ms': self.tap_delay * 1000,
+                'p50_ms': self.tap_delay * 1000, 'max_ms': self.tap_delay * 1000,
+                'method': self.name}
+
+
+class SplitBackend(DeviceBackend):
+    """Captures through one backend, taps and app control through another"""
+
+    def __init__(self, capture_backend, control_backend):
+        self.capture_backend = capture_backend
+        self.control_backend = control_backend
+        self.name = f"{capture_backend.name} capture + {control_backend.name} taps"
+
+    @property
+    def serial(self):
+        return self.control_backend.serial or self.capture_backend.serial
+
+    def screen_size(self):
+        return self.control_backend.screen_size() or self.capture_backend.screen_size()
+
+    def capture(self):
+        return self.capture_backend.capture()
+
+    def tap(self, x, y):
+        self.control_backend.tap(x, y)
+
+    def probe_tap(self):
+        self.control_backend.probe_tap()
+
+    def tap_sequence(self, steps):
+        self.control_backend.tap_sequence(steps)
+
+    def start_app(self, package, restart=False):
+        return self.control_backend.start_app(package, restart)
+
+    def current_app(self):
+        app = self.control_backend.current_app()
+        return app if app is not None else self.capture_backend.current_app()
+
+    def latency_stats(self):
+        return self.control_backend.latency_stats()
+
+    def close(self):
+        self.control_backend.close()
+        self.capture_backend.close()
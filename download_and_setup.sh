@@ -38,6 +38,29 @@ FILES=(
     "android-automation.py"
     "setup_wizard.py"
     "load_config.py"
+    "frames.py"
+    "device_backend.py"
+    "backend_select.py"
+    "startup.py"
+    "screencap_raw.py"
+    "input_injection.py"
+    "ocr_cache.py"
+    "ocr_batch.py"
+    "ocr_preprocess.py"
+    "ocr_pool.py"
+    "change_detection.py"
+    "pixel_probes.py"
+    "waiting.py"
+    "pipeline.py"
+    "run_trace.py"
+    "clock.py"
+    "replay.py"
+    "metrics.py"
+    "profiler.py"
+    "structured_log.py"
+    "debug_frames.py"
+    "glyph_ocr.py"
+    "tesseract_engine.py"
     "run.sh"
     "launcher.sh"
     "quick_start.sh"
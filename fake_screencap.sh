@@ -0,0 +1,13 @@
+#!/bin/bash
+# Stand-in for Android's `screencap` on a Linux box
+# Replays a raw dump recorded on the phone with: screencap > /sdcard/dump.raw
+# Usage: SCREENCAP_DUMP=dump.raw bash fake_screencap.sh
+
+DUMP="${SCREENCAP_DUMP:-dump.raw}"
+
+if [ ! -f "$DUMP" ]; then
+    echo "❌ Raw dump not found: $DUMP" >&2
+    exit 1
+fi
+
+cat "$DUMP"
@@ -0,0 +1,134 @@
+"""
+In-memory screen frames
+Used by android-automation.py so one capture can be analysed without
+writing a PNG to /sdcard and decoding it again
+"""
+
+import time
+
+from startup import lazy_module, module_available
+
+# Loaded on first use so importing this module stays cheap
+Image = lazy_module('PIL.Image')
+np = lazy_module('numpy')
+IMAGE_PROCESSING_AVAILABLE = module_available('PIL') and module_available('numpy')
+
+
+def _is_array(obj):
+    return IMAGE_PROCESSING_AVAILABLE and isinstance(obj, np.ndarray)
+
+
+class Frame:
+    """A captured screen image held in memory with its capture timestamp"""
+
+    def __init__(self, image, timestamp=None, source=None):
+        # image is either a PIL image or a numpy array (H x W x C, RGB/RGBA)
+        is_array = _is_array(image)
+        self._image = None if is_array else image
+        self._array = image if is_array else None
+        self.timestamp = timestamp if timestamp is not None else time.time()
+        self.source = source
+        self.path = None
+
+    @property
+    def array(self):
+        """Pixels as a numpy array (converted once, then reused)"""
+        if self._array is None:
+            self._array = np.asarray(self._image)
+        return self._array
+
+    @property
+    def image(self):
+        """Pixels as a PIL image (converted once, then reused)"""
+        if self._image is None:
+            self._image = Image.fromarray(self._array)
+        return self._image
+
+    @property
+    def width(self):
+        if self._array is not None:
+            return self._array.shape[1]
+        return self._image.width
+
+    @property
+    def height(self):
+        if self._array is not None:
+            return self._array.shape[0]
+        return self._image.height
+
+    def age(self, now=time.time):
+        """Seconds since the frame was captured, on the clock its timestamp came from"""
+        return now() - self.timestamp
+
+    def crop(self, region):
+        """Return the (x, y, w, h) region as a numpy view (no copy)"""
+        x, y, w, h = region
+        return self.array[y:y + h, x:x + w]
+
+    def crop_image(self, region):
+        """Return the (x, y, w, h) region as a PIL image"""
+        return Image.fromarray(np.ascontiguousarray(self.crop(region)))
+
+    def save(self, path):
+        """Write the frame to disk and remember where it went"""
+        self.image.save(str(path))
+        self.path = str(path)
+        return self.path
+
+
+def load_frame(source):
+    """Turn a Frame, PIL image, numpy array or file path into a Frame"""
+    if isinstance(source, Frame):
+        return source
+    if _is_array(source):
+        return Frame(source, source='array')
+    if isinstance(source, Image.Image):
+        return Frame(source, source='image')
+    # Anything else is treated as a path to an image on disk
+    img = Image.open(str(source))
+    img.load()
+    frame = Frame(img, source='file')
+    frame.path = str(source)
+    return frame
+
+
+class FrameCache:
+    """Keeps the latest frame and serves it again while it is still fresh
+
+    The cache is invalidated explicitly (e.g. after every tap) and otherwise
+    reuses the frame for up to `ttl` seconds, measured with `now` (the
+    clock the frame timestamps come from).
+    """
+
+    def __init__(self, capture, ttl=0.5, now=time.time):
+        self.capture = capture
+        self.ttl = ttl
+        self.now = now
+        self.frame = None
+        self.captures = 0
+        self.hits = 0
+
+    def get(self, max_age=None):
+        """Return the cached frame if fresh enough, otherwise capture a new one"""
+        if max_age is None:
+            max_age = self.ttl
+        if self.frame is not None and self.frame.age(self.now) <= max_age:
+            self.hits += 1
+            return self.frame
+        frame = self.capture()
+        if frame is not None:
+            self.captures += 1
+            self.frame = frame
+        return frame
+
+    def invalidate(self):
+        """Forget the cached frame so the next get() captures again"""
+        self.frame = None
+
+    def stats(self):
+        requests = self.captures + self.hits
+        return {
+            'captures': self.captures,
+            'hits': self.hits,
+            'hit_rate': self.hits / requests if requests else 0.0,
+        }
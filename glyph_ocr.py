@@ -0,0 +1,200 @@
+"""
+Template-matching OCR for the game's fixed font
+Used by android-automation.py as the 'template' OCR engine
+
+The game only shows the characters 0123456789/:$ in one font, so instead
+of running tesseract we cut the binarized crop into glyphs and compare them
+against a small bank of glyphs learned from our own labeled crops.
+
+Collecting samples:
+    Set glyph_samples_dir in the config. Every crop read by tesseract or
+    easyocr is stored there as a PNG together with its text in labels.tsv.
+    Fix any wrong labels in labels.tsv by hand.
+
+Learning the bank:
+    python glyph_ocr.py learn glyph_bank.npz <samples_dir>
+
+Checking a crop:
+    python glyph_ocr.py read glyph_bank.npz crop.png
+"""
+
+import itertools
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+CHARSET = '0123456789/:$'
+GLYPH_SIZE = 16
+MIN_GLYPH_PIXELS = 3
+# Segments wider than this (relative to line height) are touching glyphs
+MAX_GLYPH_ASPECT = 0.9
+
+
+def foreground_mask(binary):
+    """Text pixels of a 0/255 crop (text is whichever colour is the minority)"""
+    mask = binary > 127
+    if mask.mean() > 0.5:
+        mask = ~mask
+    return mask
+
+
+def segment_glyphs(mask):
+    """Split a text line into glyph masks using the column projection"""
+    rows = np.flatnonzero(mask.any(axis=1))
+    if rows.size == 0:
+        return []
+    line = mask[rows[0]:rows[-1] + 1]
+
+    columns = line.any(axis=0).astype(np.int8)
+    # Start/end of every run of non-empty columns
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], columns, [0]))))
+    glyphs = []
+    for start, end in zip(edges[::2], edges[1::2]):
+        for glyph in split_touching(line[:, start:end]):
+            if glyph.sum() >= MIN_GLYPH_PIXELS:
+                glyphs.append(glyph)
+    return glyphs
+
+
+def split_touching(segment):
+    """Cut a too-wide segment at its thinnest column near the middle"""
+    height, width = segment.shape
+    if width <= height * MAX_GLYPH_ASPECT or width < 4:
+        return [segment]
+    profile = segment.sum(axis=0)
+    lo, hi = width // 4, width - width // 4
+    cut = lo + int(profile[lo:hi].argmin())
+    return split_touching(segment[:, :cut]) + split_touching(segment[:, cut:])
+
+
+def glyph_vector(glyph):
+    """Normalize a glyph to a zero-mean, unit-length GLYPH_SIZE^2 vector
+
+    The glyph is cropped to its own bounding box and padded to a square
+    (keeping its aspect ratio), so narrow glyphs like ':' and '1' stay
+    distinguishable and glyph height differences ('$') do not matter.
+    """
+    rows = np.flatnonzero(glyph.any(axis=1))
+    glyph = glyph[rows[0]:rows[-1] + 1]
+    height, width = glyph.shape
+    cell = max(height, width)
+    box = np.zeros((height, cell), dtype=bool)
+    offset = (cell - width) // 2
+    box[:, offset:offset + width] = glyph
+
+    row_idx = (np.arange(GLYPH_SIZE) * height // GLYPH_SIZE)
+    col_idx = (np.arange(GLYPH_SIZE) * cell // GLYPH_SIZE)
+    vector = box[row_idx[:, None], col_idx].astype(np.float32).ravel()
+    vector -= vector.mean()
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector /= norm
+    return vector
+
+
+class GlyphBank:
+    """Labeled glyph templates and a vectorized correlation classifier"""
+
+    def __init__(self, labels=None, vectors=None):
+        self.labels = list(labels) if labels is not None else []
+        if vectors is None:
+            vectors = np.zeros((0, GLYPH_SIZE * GLYPH_SIZE), dtype=np.float32)
+        self.vectors = np.asarray(vectors, dtype=np.float32)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def learn(self, binary, text):
+        """Add the glyphs of a labeled crop, returns False if they do not line up"""
+        text = ''.join(ch for ch in text if ch in CHARSET)
+        glyphs = segment_glyphs(foreground_mask(binary))
+        if not text or len(glyphs) != len(text):
+            return False
+        new_vectors = np.stack([glyph_vector(g) for g in glyphs])
+        self.vectors = np.concatenate([self.vectors, new_vectors])
+        self.labels.extend(text)
+        return True
+
+    def recognize(self, binary):
+        """Read a binarized crop, returns {'text', 'confidence'}"""
+        glyphs = segment_glyphs(foreground_mask(binary))
+        if not glyphs or not self.labels:
+            return {'text': '', 'confidence': 0}
+
+        # Correlation of every glyph against every template in one matmul
+        scores = np.stack([glyph_vector(g) for g in glyphs]) @ self.vectors.T
+        best = scores.argmax(axis=1)
+        text = ''.join(self.labels[i] for i in best)
+        confidence = float(scores[np.arange(len(best)), best].min())
+        return {'text': text, 'confidence': max(confidence, 0.0)}
+
+    def save(self, path):
+        np.savez_compressed(path, labels=np.array(self.labels), vectors=self.vectors)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        return cls(data['labels'].tolist(), data['vectors'])
+
+
+class GlyphSampleWriter:
+    """Stores labeled crops (PNG + labels.tsv) for learning a glyph bank"""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.labels_file = self.directory / 'labels.tsv'
+        # Several crops are stored within the same millisecond (step + amount)
+        self.sequence = itertools.count()
+
+    def add(self, binary, text):
+        if not text:
+            return
+        name = f"crop_{int(time.time() * 1000)}_{next(self.sequence)}.png"
+        Image.fromarray(binary).save(self.directory / name)
+        with open(self.labels_file, 'a') as f:
+            f.write(f"{name}\t{text}\n")
+
+
+def learn_from_directory(samples_dir, bank=None):
+    """Build a GlyphBank from a samples directory written by GlyphSampleWriter"""
+    bank = bank or GlyphBank()
+    samples_dir = Path(samples_dir)
+    used = skipped = 0
+    with open(samples_dir / 'labels.tsv', 'r') as f:
+        for line in f:
+            if '\t' not in line:
+                continue
+            name, text = line.rstrip('\n').split('\t', 1)
+            binary = np.asarray(Image.open(samples_dir / name).convert('L'))
+            if bank.learn(binary, text):
+                used += 1
+            else:
+                skipped += 1
+    return bank, used, skipped
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == 'learn':
+        bank, used, skipped = learn_from_directory(sys.argv[3])
+        bank.save(sys.argv[2])
+        print(f"✅ Learned {len(bank)} glyphs from {used} crops ({skipped} skipped)")
+    elif len(sys.argv) == 4 and sys.argv[1] == 'read':
+        bank = GlyphBank.load(sys.argv[2])
+        binary = np.asarray(Image.open(sys.argv[3]).convert('L'))
+        started = time.perf_counter()
+        result = bank.recognize(binary)
+        elapsed = (time.perf_counter() - started) * 1000
+        print(f"📝 \"{result['text']}\" (confidence {result['confidence']:.2f}, {elapsed:.3f} ms)")
+    else:
+        print("Usage:")
+        print("  python glyph_ocr.py learn glyph_bank.npz <samples_dir>")
+        print("  python glyph_ocr.py read glyph_bank.npz crop.png")
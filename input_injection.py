@@ -0,0 +1,288 @@
+"""
+Fast tap injection for the shell (non-uiautomator2) path
+Used by android-automation.py instead of spawning `sh -c "input tap"` per tap
+
+- ShellSession keeps one `sh` process alive and writes commands into it
+- InputTapInjector runs `input tap` through that session
+- SendeventInjector skips the `input` JVM and writes raw touch events,
+  directly to /dev/input/eventN when writable, otherwise via `sendevent`
+- sequence_script() turns a whole tap chain into one shell script so the
+  delays between taps are enforced on the device
+"""
+
+import os
+import re
+import select
+import struct
+import subprocess
+import time
+from collections import deque
+
+
+# linux/input-event-codes.h
+EV_SYN = 0x00
+EV_KEY = 0x01
+EV_ABS = 0x03
+SYN_REPORT = 0x00
+BTN_TOUCH = 0x14a
+ABS_MT_SLOT = 0x2f
+ABS_MT_POSITION_X = 0x35
+ABS_MT_POSITION_Y = 0x36
+ABS_MT_TRACKING_ID = 0x39
+
+# struct input_event: struct timeval + __u16 type + __u16 code + __s32 value
+INPUT_EVENT_FORMAT = 'llHHi'
+
+
+class ShellSession:
+    """Long-lived `sh` process that commands are written into"""
+
+    def __init__(self, shell=('sh',)):
+        self.shell = list(shell)
+        self.process = None
+        self._counter = 0
+
+    def start(self):
+        self.process = subprocess.Popen(
+            self.shell,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            bufsize=0
+        )
+
+    @property
+    def alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def run(self, command, timeout=5):
+        """Run a command in the session and return its output once it finished"""
+        if not self.alive:
+            self.start()
+
+        self._counter += 1
+        marker = f"__done_{self._counter}__".encode()
+        self.process.stdin.write(command.encode() + b"\necho " + marker + b"\n")
+        self.process.stdin.flush()
+        return self._read_until(marker, timeout).decode(errors='replace')
+
+    def _read_until(self, marker, timeout):
+        fd = self.process.stdout.fileno()
+        deadline = time.monotonic() + timeout
+        output = b''
+        while marker not in output:
+            remaining = deadline - time.monotonic()
+            ready, _, _ = select.select([fd], [], [], max(remaining, 0))
+            if not ready:
+                self.close()
+                raise TimeoutError(f"Shell command did not finish within {timeout}s")
+            data = os.read(fd, 4096)
+            if not data:
+                self.close()
+                raise RuntimeError("Shell session exited")
+            output += data
+        return output[:output.index(marker)]
+
+    def close(self):
+        if self.process is None:
+            return
+        try:
+            self.process.stdin.close()
+        except Exception:
+            pass
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.wait()
+        self.process = None
+
+
+class LatencyStats:
+    """Keeps the most recent per-tap latencies"""
+
+    def __init__(self, size=500):
+        self.samples = deque(maxlen=size)
+        self.count = 0
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+        self.count += 1
+
+    def summary(self):
+        if not self.samples:
+            return {'count': 0}
+        ordered = sorted(self.samples)
+        return {
+            'count': self.count,
+            'mean_ms': sum(ordered) / len(ordered) * 1000,
+            'p50_ms': ordered[len(ordered) // 2] * 1000,
+            'max_ms': ordered[-1] * 1000,
+        }
+
+
+def input_tap_command(x, y):
+    return f'input tap {int(x)} {int(y)}'
+
+
+def sequence_script(steps, tap_command=input_tap_command):
+    """Build one shell script for [(x, y, delay), ...] with on-device sleeps"""
+    commands = []
+    for x, y, delay in steps:
+        commands.append(tap_command(x, y))
+        if delay > 0:
+            commands.append(f'sleep {delay:g}')
+    return '; '.join(commands)
+
+
+def sequence_timeout(steps, per_tap=2.0):
+    """Generous timeout for a tap chain: all delays plus slack per tap"""
+    return 5 + sum(delay for _, _, delay in steps) + per_tap * len(steps)
+
+
+class TapInjector:
+    """Base class for shell tap injectors"""
+
+    name = 'shell'
+
+    def __init__(self, session=None):
+        self.session = session or ShellSession()
+        self.latency = LatencyStats()
+
+    def tap_command(self, x, y):
+        raise NotImplementedError
+
+    def tap(self, x, y):
+        started = time.perf_counter()
+        self.session.run(self.tap_command(x, y))
+        self.latency.add(time.perf_counter() - started)
+
+    def run_sequence(self, steps):
+        """Send a whole [(x, y, delay), ...] chain in one round-trip"""
+        self.session.run(sequence_script(steps, self.tap_command), timeout=sequence_timeout(steps))
+
+    def noop_command(self):
+        raise NotImplementedError
+
+    def noop(self):
+        """Go through the same path as a tap without touching the screen (for latency probes)"""
+        output = self.session.run(f"{self.noop_command()} >/dev/null 2>&1 || echo __noop_failed__")
+        if '__noop_failed__' in output:
+            raise RuntimeError(f"{self.name} is not usable in this shell")
+
+    def close(self):
+        self.session.close()
+
+
+class InputTapInjector(TapInjector):
+    """Taps through `input tap` inside a persistent shell session"""
+
+    name = 'input'
+
+    def tap_command(self, x, y):
+        return input_tap_command(x, y)
+
+    def noop_command(self):
+        # KEYCODE_UNKNOWN: starts the same input JVM, the system ignores the key
+        return 'input keyevent 0'
+
+
+def find_touchscreen(session):
+    """Find the multitouch device and its axis ranges from `getevent -pl`"""
+    output = session.run('getevent -pl')
+    device = None
+    found = {}
+    for line in output.splitlines():
+        match = re.match(r'add device \d+: (\S+)', line)
+        if match:
+            if device and 'x_max' in found and 'y_max' in found:
+                break
+            device = match.group(1)
+            found = {}
+            continue
+        match = re.search(r'(ABS_MT_POSITION_[XY])\s*:.*max (\d+)', line)
+        if match and device:
+            axis = 'x_max' if match.group(1).endswith('X') else 'y_max'
+            found[axis] = int(match.group(2))
+
+    if device and 'x_max' in found and 'y_max' in found:
+        return {'device': device, 'x_max': found['x_max'], 'y_max': found['y_max']}
+    return None
+
+
+class SendeventInjector(TapInjector):
+    """Taps by injecting raw multitouch events, skipping the `input` JVM
+
+    Touch coordinates are scaled from screen pixels to the touchscreen's
+    axis range. Events are written straight to the device node when this
+    process can open it, otherwise one `sendevent` line is sent through
+    the shell session per tap.
+    """
+
+    name = 'sendevent'
+
+    def __init__(self, screen_width, screen_height, session=None, touchscreen=None):
+        super().__init__(session)
+        self.touchscreen = touchscreen or find_touchscreen(self.session)
+        if not self.touchscreen:
+            raise RuntimeError("No multitouch input device found")
+
+        self.scale_x = (self.touchscreen['x_max'] + 1) / screen_width
+        self.scale_y = (self.touchscreen['y_max'] + 1) / screen_height
+        self._tracking_id = 0
+
+        self._fd = None
+        try:
+            self._fd = os.open(self.touchscreen['device'], os.O_WRONLY)
+        except OSError:
+            pass
+
+    def _events(self, x, y):
+        self._tracking_id = (self._tracking_id + 1) % 65535
+        return [
+            (EV_ABS, ABS_MT_SLOT, 0),
+            (EV_ABS, ABS_MT_TRACKING_ID, self._tracking_id),
+            (EV_ABS, ABS_MT_POSITION_X, int(x * self.scale_x)),
+            (EV_ABS, ABS_MT_POSITION_Y, int(y * self.scale_y)),
+            (EV_KEY, BTN_TOUCH, 1),
+            (EV_SYN, SYN_REPORT, 0),
+            (EV_ABS, ABS_MT_TRACKING_ID, -1),
+            (EV_KEY, BTN_TOUCH, 0),
+            (EV_SYN, SYN_REPORT, 0),
+        ]
+
+    def tap_command(self, x, y):
+        device = self.touchscreen['device']
+        # sendevent takes unsigned values, so -1 becomes 4294967295
+        return '; '.join(f'sendevent {device} {t} {c} {v & 0xffffffff}' for t, c, v in self._events(x, y))
+
+    def noop_command(self):
+        # A lone SYN_REPORT: no touch state changes
+        return f"sendevent {self.touchscreen['device']} {EV_SYN} {SYN_REPORT} 0"
+
+    def noop(self):
+        if self._fd is None:
+            return super().noop()
+        os.write(self._fd, struct.pack(INPUT_EVENT_FORMAT, 0, 0, EV_SYN, SYN_REPORT, 0))
+
+    def tap(self, x, y):
+        if self._fd is None:
+            return super().tap(x, y)
+        started = time.perf_counter()
+        # Kernel timestamps injected events, so the timeval stays zero
+        payload = b''.join(struct.pack(INPUT_EVENT_FORMAT, 0, 0, t, c, v) for t, c, v in self._events(x, y))
+        os.write(self._fd, payload)
+        self.latency.add(time.perf_counter() - started)
+
+    def run_sequence(self, steps):
+        if self._fd is None:
+            return super().run_sequence(steps)
+        # Direct writes take microseconds, so local sleeps keep the timing
+        for x, y, delay in steps:
+            self.tap(x, y)
+            if delay > 0:
+                time.sleep(delay)
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        super().close()
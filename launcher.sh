@@ -80,7 +80,7 @@ echo ""
 sleep 3
 
 # Run the automation script
-python3 android-automation.py
+python3 android-automation.py "$@"
 
 # When script exits, show message
 echo ""
@@ -94,4 +94,147 @@ def apply_config_to_automation(automation, config):
     if 'final_step_target' in config:
         automation.final_step_target = config['final_step_target']
     
+    # Timing
+    if 'frame_cache_ttl' in config:
+        automation.frame_cache_ttl = config['frame_cache_ttl']
+    
+    # Capture
+    if 'capture_method' in config:
+        automation.capture_method = config['capture_method']
+    
+    if 'screencap_command' in config:
+        automation.screencap_command = config['screencap_command']
+    
+    if 'tap_method' in config:
+        automation.tap_method = config['tap_method']
+    
+    # OCR
+    if 'ocr_cache_size' in config:
+        automation.ocr_cache_size = config['ocr_cache_size']
+    
+    if 'ocr_cache_file' in config:
+        automation.ocr_cache_file = config['ocr_cache_file']
+    
+    if 'use_resident_tesseract' in config:
+        automation.use_resident_tesseract = config['use_resident_tesseract']
+    
+    if 'ocr_threshold_method' in config:
+        automation.ocr_threshold_method = config['ocr_threshold_method']
+    
+    if 'ocr_upscale' in config:
+        automation.ocr_upscale = config['ocr_upscale']
+    
+    # Glyph OCR
+    if 'glyph_samples_dir' in config:
+        automation.glyph_samples_dir = config['glyph_samples_dir']
+    
+    # Color probes
+    if 'probes' in config:
+        automation.extra_probes = config['probes']
+    
+    # Change detection
+    if 'change_detection' in config:
+        automation.change_detection = config['change_detection']
+    
+    if 'change_fraction' in config:
+        automation.change_fraction = config['change_fraction']
+    
+    if 'change_delta' in config:
+        automation.change_delta = config['change_delta']
+    
+    if 'change_stride' in config:
+        automation.change_stride = config['change_stride']
+    
+    # Polling waits
+    if 'poll_initial' in config:
+        automation.poll_initial = config['poll_initial']
+    
+    if 'poll_max' in config:
+        automation.poll_max = config['poll_max']
+    
+    if 'settle_polls' in config:
+        automation.settle_polls = config['settle_polls']
+    
+    if 'settle_stable' in config:
+        automation.settle_stable = config['settle_stable']
+    
+    # Device backend
+    if 'device_backend' in config:
+        automation.device_backend = config['device_backend']
+    
+    if 'fake_frames' in config:
+        automation.fake_frames = config['fake_frames']
+    
+    if 'backend_probe' in config:
+        automation.backend_probe = config['backend_probe']
+    
+    if 'backend_cache_file' in config:
+        automation.backend_cache_file = config['backend_cache_file']
+    
+    # Run traces
+    if 'trace_dir' in config:
+        automation.trace_dir = config['trace_dir']
+    
+    # Debug frames (captures ring buffer and anomaly frames)
+    if 'save_screenshots' in config:
+        automation.save_screenshots = config['save_screenshots']
+    
+    if 'screenshots_keep' in config:
+        automation.screenshots_keep = config['screenshots_keep']
+    
+    if 'screenshots_max_mb' in config:
+        automation.screenshots_max_mb = config['screenshots_max_mb']
+    
+    if 'screenshot_format' in config:
+        automation.screenshot_format = config['screenshot_format']
+    
+    if 'save_anomalies' in config:
+        automation.save_anomalies = config['save_anomalies']
+    
+    if 'anomalies_keep' in config:
+        automation.anomalies_keep = config['anomalies_keep']
+    
+    # Structured log
+    if 'log_file' in config:
+        automation.log_file = config['log_file']
+    
+    if 'log_level' in config:
+        automation.log_level = config['log_level']
+    
+    if 'log_console' in config:
+        automation.log_console = config['log_console']
+    
+    if 'log_console_level' in config:
+        automation.log_console_level = config['log_console_level']
+    
+    if 'log_console_rate' in config:
+        automation.log_console_rate = config['log_console_rate']
+    
+    if 'log_max_bytes' in config:
+        automation.log_max_bytes = config['log_max_bytes']
+    
+    if 'log_backups' in config:
+        automation.log_backups = config['log_backups']
+    
+    # Metrics snapshots (JSONL + Prometheus text)
+    if 'metrics_dir' in config:
+        automation.metrics_dir = config['metrics_dir']
+    
+    if 'metrics_interval' in config:
+        automation.metrics_interval = config['metrics_interval']
+    
+    # OCR worker processes
+    if 'ocr_workers' in config:
+        automation.ocr_workers = config['ocr_workers']
+    
+    # Capture / analysis pipeline
+    if 'use_pipeline' in config:
+        automation.use_pipeline = config['use_pipeline']
+    
+    if 'pipeline_depth' in config:
+        automation.pipeline_depth = config['pipeline_depth']
+    
+    if 'pipeline_interval' in config:
+        automation.pipeline_interval = config['pipeline_interval']
+    
     print("✅ Configuration loaded from setup wizard!")
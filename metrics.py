@@ -0,0 +1,198 @@
+"""
+Run metrics
+Used by android-automation.py to time every phase of the loop (capture,
+decode, preprocess, OCR, color probe, tap, sleep, wait) and count what
+happened (captures, OCR calls, resets, reset attempts, completions)
+
+- metrics.span('ocr') times a block, metrics.observe() records a duration
+  measured elsewhere, metrics.count() bumps a counter
+- current_phase(thread id) is the innermost span a thread is in
+  (profiler.py files its samples under it)
+- MetricsExporter appends a snapshot to metrics.jsonl every interval and
+  rewrites metrics.prom (Prometheus text format) next to it
+
+Thread-safe: the pipeline threads record into the same Metrics.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Histogram bucket upper bounds (seconds), Prometheus style
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """Count, sum, max and bucket counts of one phase's durations"""
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)  # last one is +Inf
+
+    def add(self, seconds):
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    def quantile(self, fraction):
+        """Upper bound of the bucket holding the quantile (max for the +Inf bucket)"""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank and n:
+                return min(BUCKETS[i], self.max) if i < len(BUCKETS) else self.max
+        return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'mean': round(self.sum / self.count, 6) if self.count else 0.0,
+            'max': round(self.max, 6),
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'buckets': list(self.buckets),
+        }
+
+
+class Metrics:
+    """Phase timings and counters of a run"""
+
+    def __init__(self, clock=None):
+        self.lock = threading.Lock()
+        self.spans = {}
+        self.counters = {}
+        self.active = {}  # thread id -> names of the open spans
+        self.wall_time = clock.time if clock else time.time
+        self.started = self.wall_time()
+
+    @contextmanager
+    def span(self, name):
+        """Time the block (always real time)"""
+        stack = self.active.setdefault(threading.get_ident(), [])
+        stack.append(name)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started)
+            stack.pop()
+
+    def current_phase(self, thread_id):
+        """Innermost open span of a thread, None outside spans"""
+        stack = self.active.get(thread_id)
+        try:
+            return stack[-1] if stack else None
+        except IndexError:
+            # Popped by its thread in the meantime
+            return None
+
+    def observe(self, name, seconds):
+        with self.lock:
+            histogram = self.spans.get(name)
+            if histogram is None:
+                histogram = self.spans[name] = Histogram()
+            histogram.add(seconds)
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def snapshot(self):
+        with self.lock:
+            now = self.wall_time()
+            return {
+                'time': round(now, 3),
+                'uptime': round(now - self.started, 3),
+                'counters': dict(self.counters),
+                'spans': {name: h.summary() for name, h in self.spans.items()},
+            }
+
+    def prometheus(self, prefix='automation'):
+        """Prometheus text exposition of the current values"""
+        snapshot = self.snapshot()
+        lines = [f"# HELP {prefix}_uptime_seconds Seconds since the run started",
+                 f"# TYPE {prefix}_uptime_seconds gauge",
+                 f"{prefix}_uptime_seconds {snapshot['uptime']}"]
+        for name, value in sorted(snapshot['counters'].items()):
+            metric = f"{prefix}_{name}_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+        metric = f"{prefix}_phase_seconds"
+        lines.append(f"# HELP {metric} Time spent per phase of the loop")
+        lines.append(f"# TYPE {metric} histogram")
+        for name, span in sorted(snapshot['spans'].items()):
+            cumulative = 0
+            for bound, n in zip(BUCKETS, span['buckets']):
+                cumulative += n
+                lines.append(f'{metric}_bucket{{phase="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{phase="{name}",le="+Inf"}} {span["count"]}')
+            lines.append(f'{metric}_sum{{phase="{name}"}} {span["sum"]}')
+            lines.append(f'{metric}_count{{phase="{name}"}} {span["count"]}')
+        return '\n'.join(lines) + '\n'
+
+    def report(self):
+        """Lines for the end-of-run summary: where the time went"""
+        snapshot = self.snapshot()
+        uptime = snapshot['uptime'] or 1.0
+        lines = []
+        for name, span in sorted(snapshot['spans'].items(), key=lambda item: -item[1]['sum']):
+            lines.append(f"   {name:<11} {span['sum']:9.1f}s  {span['sum'] / uptime:6.1%}  "
+                         f"{span['count']:7d}x  avg {span['mean'] * 1000:8.1f} ms  "
+                         f"max {span['max'] * 1000:8.1f} ms")
+        if snapshot['counters']:
+            lines.append("   " + ", ".join(f"{name} {value}"
+                                          for name, value in sorted(snapshot['counters'].items())))
+        return lines
+
+
+class MetricsExporter:
+    """Writes metrics to disk every interval seconds on a background thread"""
+
+    def __init__(self, metrics, directory, interval=10.0):
+        self.metrics = metrics
+        self.directory = str(directory)
+        self.interval = interval
+        os.makedirs(self.directory, exist_ok=True)
+        self.jsonl_path = os.path.join(self.directory, "metrics.jsonl")
+        self.prom_path = os.path.join(self.directory, "metrics.prom")
+        self.snapshots = 0
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._loop, name='metrics', daemon=True)
+        self.thread.start()
+
+    def _loop(self):
+        while not self.stop_event.wait(self.interval):
+            self.export()
+
+    def export(self):
+        """Append one JSONL snapshot and replace the Prometheus file"""
+        try:
+            with open(self.jsonl_path, 'a') as f:
+                f.write(json.dumps(self.metrics.snapshot(), separators=(',', ':')) + '\n')
+            # Replace atomically so a scraper never reads half a file
+            tmp_path = self.prom_path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                f.write(self.metrics.prometheus())
+            os.replace(tmp_path, self.prom_path)
+            self.snapshots += 1
+        except OSError as e:
+            print(f"⚠️  Writing metrics failed: {e}")
+
+    def close(self):
+        """Stop the thread and write the final snapshot"""
+        self.stop_event.set()
+        self.thread.join(timeout=self.interval + 1)
+        self.export()
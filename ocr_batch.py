@@ -0,0 +1,63 @@
+"""
+Helpers for OCR-ing several regions in one engine call
+Used by AndroidAutomation.recognize_regions() in android-automation.py
+
+- easyocr gets all crops padded to one size for readtext_batched()
+- tesseract gets one composite strip with a crop per line (psm 6)
+"""
+
+from startup import lazy_module
+
+Image = lazy_module('PIL.Image')
+np = lazy_module('numpy')
+
+
+def dark_text_on_white(binary):
+    """Flip a 0/255 crop so text is black and the background white
+
+    Crops from android-automation.py already are (OCRPreprocessor
+    dark_text=True), this only matters for crops from elsewhere.
+    """
+    if (binary > 127).mean() < 0.5:
+        return 255 - binary
+    return binary
+
+
+def pad_to_size(binary, height, width, fill=255):
+    padded = np.full((height, width), fill, dtype=np.uint8)
+    padded[:binary.shape[0], :binary.shape[1]] = binary
+    return padded
+
+
+def pad_to_common_size(arrays):
+    """Pad crops (already dark text on white) to the largest height/width"""
+    height = max(a.shape[0] for a in arrays)
+    width = max(a.shape[1] for a in arrays)
+    return [pad_to_size(a, height, width) for a in arrays]
+
+
+def build_ocr_strip(images, margin=8):
+    """Stack binarized crops into one image, one crop per text line
+
+    Crops are separated by blank rows (at least their own height) so
+    tesseract's block layout sees one line per crop, in order.
+    """
+    arrays = [dark_text_on_white(np.asarray(img)) for img in images]
+    width = max(a.shape[1] for a in arrays) + 2 * margin
+    gap = max(a.shape[0] for a in arrays)
+    height = sum(a.shape[0] for a in arrays) + gap * (len(arrays) - 1) + 2 * margin
+
+    strip = np.full((height, width), 255, dtype=np.uint8)
+    y = margin
+    for array in arrays:
+        strip[y:y + array.shape[0], margin:margin + array.shape[1]] = array
+        y += array.shape[0] + gap
+    return Image.fromarray(strip)
+
+
+def split_strip_text(text, count):
+    """Lines of a strip OCR result, or None if they do not match the crops"""
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    if len(lines) != count:
+        return None
+    return lines
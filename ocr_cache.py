@@ -0,0 +1,89 @@
+"""
+OCR result cache
+Used by android-automation.py so identical text regions are not sent to
+the OCR engine again
+
+Keys are a hash of the binarized crop packed to one bit per pixel, so two
+crops that threshold to the same black/white pattern share one entry even
+if the raw pixels differ slightly (anti-aliasing, compression noise).
+"""
+
+import hashlib
+import json
+from collections import OrderedDict
+from pathlib import Path
+
+from startup import lazy_module
+
+np = lazy_module('numpy')
+
+
+def crop_key(binary, engine=''):
+    """Fast hash of a binarized (0/255) crop"""
+    packed = np.packbits(binary > 127)
+    digest = hashlib.blake2b(packed.tobytes(), digest_size=16)
+    digest.update(f"{engine}:{binary.shape[0]}x{binary.shape[1]}".encode())
+    return digest.hexdigest()
+
+
+class OCRCache:
+    """Bounded LRU cache of OCR results with optional on-disk persistence"""
+
+    def __init__(self, max_size=256, path=None):
+        self.max_size = max_size
+        self.path = Path(path) if path else None
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if self.path:
+            self.load()
+
+    def get(self, key):
+        result = self.entries.get(key)
+        if result is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def put(self, key, result):
+        self.entries[key] = result
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self.entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+    def load(self):
+        """Load entries saved by a previous run (missing or bad file is ignored)"""
+        if not self.path or not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r') as f:
+                for key, result in json.load(f):
+                    self.put(key, result)
+        except Exception as e:
+            print(f"⚠️  Error loading OCR cache: {e}")
+
+    def save(self):
+        if not self.path:
+            return
+        try:
+            with open(self.path, 'w') as f:
+                json.dump(list(self.entries.items()), f)
+        except Exception as e:
+            print(f"⚠️  Error saving OCR cache: {e}")
@@ -0,0 +1,188 @@
+"""
+Process-pool OCR
+Used by android-automation.py (ocr_workers > 0) to run OCR on several
+cores instead of one thread under the GIL
+
+- every worker process loads its OCR engine once (warm engine)
+- binarized crops travel through preallocated shared memory slots, only
+  the slot name and shape are pickled
+- recognize_many() reads several regions in parallel
+
+Engines: 'template' (glyph bank), 'pytesseract' (resident tesseract when
+available) and 'easyocr'.
+"""
+
+import multiprocessing
+import queue
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from startup import lazy_module
+
+np = lazy_module('numpy')
+Image = lazy_module('PIL.Image')
+
+# Crops are a few KB; anything bigger than a slot is pickled instead
+SLOT_SIZE = 256 * 1024
+
+# Per-process state of a worker: its engine and attached shared memory
+_worker = {}
+
+
+def _attach(name):
+    """Attach to a slot created by the parent without taking ownership of it"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13: workers share the parent's resource tracker, which
+        # already knows the slot, so registering it again is harmless
+        return shared_memory.SharedMemory(name=name)
+
+
+def _build_reader(engine, whitelist, glyph_bank_file, use_resident_tesseract):
+    """The read(binary array) -> {'text', 'confidence'} function of one worker"""
+    if engine == 'template':
+        from glyph_ocr import GlyphBank
+        bank = GlyphBank.load(glyph_bank_file)
+        return bank.recognize
+    if engine == 'easyocr':
+        import easyocr
+        reader = easyocr.Reader(['en'])
+
+        def read_easyocr(binary):
+            text = ' '.join(result[1] for result in reader.readtext(binary))
+            return {'text': text.strip(), 'confidence': 1.0}
+        return read_easyocr
+    if engine == 'pytesseract':
+        if use_resident_tesseract:
+            from tesseract_engine import create_resident_tesseract
+            resident = create_resident_tesseract(whitelist=whitelist)
+            if resident is not None:
+                return lambda binary: resident.read(Image.fromarray(binary))
+        import pytesseract
+        config = f'--psm 7 -c tessedit_char_whitelist={whitelist}'
+
+        def read_pytesseract(binary):
+            text = pytesseract.image_to_string(Image.fromarray(binary), config=config)
+            return {'text': text.strip(), 'confidence': 1.0}
+        return read_pytesseract
+    raise ValueError(f"Unknown OCR engine: {engine}")
+
+
+def _init_worker(engine, whitelist, glyph_bank_file, use_resident_tesseract):
+    _worker['read'] = _build_reader(engine, whitelist, glyph_bank_file, use_resident_tesseract)
+    _worker['slots'] = {}
+
+
+def _ping(_=None):
+    return multiprocessing.current_process().pid
+
+
+def _read_slot(name, shape):
+    """Worker side: OCR the crop stored in a shared memory slot"""
+    block = _worker['slots'].get(name)
+    if block is None:
+        block = _worker['slots'][name] = _attach(name)
+    size = shape[0] * shape[1]
+    binary = np.ndarray(shape, dtype=np.uint8, buffer=block.buf[:size])
+    return _worker['read'](binary)
+
+
+def _read_array(binary):
+    """Worker side: OCR a pickled crop"""
+    return _worker['read'](binary)
+
+
+class OCRProcessPool:
+    """OCR executor backed by worker processes with warm engines"""
+
+    def __init__(self, engine, workers=2, whitelist='', glyph_bank_file=None,
+                 use_resident_tesseract=True, slot_size=SLOT_SIZE):
+        self.engine = engine
+        self.workers = workers
+        self.slot_size = slot_size
+        # forkserver/spawn: never fork a process that runs capture/analysis threads
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=context, initializer=_init_worker,
+            initargs=(engine, whitelist, glyph_bank_file, use_resident_tesseract))
+
+        # Two slots per worker so the next crop can be written while one is read
+        self.slots = [shared_memory.SharedMemory(create=True, size=slot_size)
+                      for _ in range(workers * 2)]
+        self.free_slots = queue.Queue()
+        for index in range(len(self.slots)):
+            self.free_slots.put(index)
+
+        self.regions = 0
+        self.pickled = 0
+        self.busy_time = 0.0
+
+    def warm(self):
+        """Start every worker and load its engine now instead of on the first read"""
+        started = time.perf_counter()
+        list(self.executor.map(_ping, range(self.workers)))
+        return time.perf_counter() - started
+
+    def _submit(self, binary):
+        """Queue one crop, returns (future, slot index or None)"""
+        binary = np.ascontiguousarray(binary, dtype=np.uint8)
+        if binary.ndim == 2 and binary.nbytes <= self.slot_size:
+            index = self.free_slots.get()
+            block = self.slots[index]
+            np.ndarray(binary.shape, dtype=np.uint8, buffer=block.buf[:binary.nbytes])[...] = binary
+            return self.executor.submit(_read_slot, block.name, binary.shape), index
+        self.pickled += 1
+        return self.executor.submit(_read_array, binary), None
+
+    def recognize_many(self, arrays):
+        """OCR several binarized crops in parallel, results in the same order"""
+        started = time.perf_counter()
+        pending = []
+        results = []
+        try:
+            for binary in arrays:
+                if self.free_slots.empty() and pending:
+                    # All slots in flight: collect the oldest read first
+                    results.append(self._collect(pending.pop(0)))
+                pending.append(self._submit(binary))
+            while pending:
+                results.append(self._collect(pending.pop(0)))
+        finally:
+            # A read failed: let the others finish before their slots are reused
+            for future, index in pending:
+                future.exception()
+                if index is not None:
+                    self.free_slots.put(index)
+        self.regions += len(results)
+        self.busy_time += time.perf_counter() - started
+        return results
+
+    def _collect(self, submitted):
+        future, index = submitted
+        try:
+            return future.result()
+        finally:
+            if index is not None:
+                self.free_slots.put(index)
+
+    def recognize(self, binary):
+        """OCR one binarized crop in a worker"""
+        return self.recognize_many([binary])[0]
+
+    def stats(self):
+        return {
+            'workers': self.workers,
+            'regions': self.regions,
+            'pickled': self.pickled,
+            'regions_per_sec': self.regions / self.busy_time if self.busy_time else 0.0,
+        }
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        for block in self.slots:
+            block.close()
+            block.unlink()
+        self.slots = []
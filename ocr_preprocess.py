@@ -0,0 +1,126 @@
+"""
+Allocation-free OCR preprocessing
+Used by android-automation.py to turn a region of a frame into the
+black/white image that goes to the OCR engine
+
+Produces the same result as the original PIL pipeline (grayscale,
+ImageEnhance.Contrast(2.0), threshold at the median) but:
+- buffers are allocated once per region and reused every tick
+- contrast + threshold are folded into one 256-entry lookup table built
+  from the histogram, then applied with a single np.take
+- Otsu thresholding and integer upscaling are available as options
+- dark_text=True flips the lookup table so text always comes out black
+  on white (what tesseract / easyocr expect), at no extra cost
+"""
+
+from startup import lazy_module
+
+np = lazy_module('numpy')
+
+
+class _RegionBuffers:
+    """Preallocated arrays for one region size"""
+
+    def __init__(self, height, width, upscale):
+        self.acc = np.empty((height, width), dtype=np.uint32)
+        self.tmp = np.empty((height, width), dtype=np.uint32)
+        self.gray = np.empty((height, width), dtype=np.uint8)
+        self.binary = np.empty((height, width), dtype=np.uint8)
+        self.upscaled = None
+        if upscale > 1:
+            self.upscaled = np.empty((height * upscale, width * upscale), dtype=np.uint8)
+
+
+def histogram_median(hist):
+    """np.median of the pixels described by a 256-bin histogram"""
+    cumulative = np.cumsum(hist)
+    count = cumulative[-1]
+    low = np.searchsorted(cumulative, (count - 1) // 2 + 1)
+    high = np.searchsorted(cumulative, count // 2 + 1)
+    return (low + high) / 2.0
+
+
+def histogram_otsu(hist):
+    """Otsu threshold of a 256-bin histogram"""
+    levels = np.arange(256, dtype=np.float64)
+    weight_low = np.cumsum(hist)
+    weight_high = weight_low[-1] - weight_low
+    sum_low = np.cumsum(hist * levels)
+    mean_low = sum_low / np.maximum(weight_low, 1)
+    mean_high = (sum_low[-1] - sum_low) / np.maximum(weight_high, 1)
+    between = weight_low * weight_high * (mean_low - mean_high) ** 2
+    return float(between.argmax())
+
+
+class OCRPreprocessor:
+    """Region -> binarized uint8 array, reusing buffers between calls
+
+    The returned array is owned by the preprocessor and is overwritten the
+    next time the same region is processed - copy it if it must be kept.
+    """
+
+    def __init__(self, contrast=2.0, threshold='median', upscale=1, dark_text=False):
+        self.contrast = contrast
+        self.dark_text = dark_text
+        self.threshold = threshold
+        self.upscale = max(1, int(upscale))
+        self.buffers = {}
+        self.levels = np.arange(256, dtype=np.float64)
+        self.binary_lut = np.empty(256, dtype=np.uint8)
+
+    def _buffers(self, key, height, width):
+        buffers = self.buffers.get(key)
+        if buffers is None or buffers.gray.shape != (height, width):
+            buffers = _RegionBuffers(height, width, self.upscale)
+            self.buffers[key] = buffers
+        return buffers
+
+    def _grayscale(self, pixels, buffers):
+        """ITU-R 601-2 luma like PIL's convert('L'), in fixed point"""
+        if pixels.ndim == 2:
+            np.copyto(buffers.gray, pixels)
+            return buffers.gray
+        acc, tmp = buffers.acc, buffers.tmp
+        np.multiply(pixels[..., 0], 19595, out=acc, dtype=np.uint32)
+        np.multiply(pixels[..., 1], 38470, out=tmp, dtype=np.uint32)
+        acc += tmp
+        np.multiply(pixels[..., 2], 7471, out=tmp, dtype=np.uint32)
+        acc += tmp
+        acc += 0x8000
+        acc >>= 16
+        np.copyto(buffers.gray, acc, casting='unsafe')
+        return buffers.gray
+
+    def process(self, pixels, key=None):
+        """Binarize an H x W (x C) uint8 array, returns a 0/255 uint8 array"""
+        height, width = pixels.shape[:2]
+        buffers = self._buffers(key if key is not None else (height, width), height, width)
+        gray = self._grayscale(pixels, buffers)
+
+        hist = np.bincount(gray.ravel(), minlength=256)
+
+        # ImageEnhance.Contrast: blend with the mean grey, truncate, clip
+        mean = int((hist * self.levels).sum() / gray.size + 0.5)
+        contrast_lut = np.clip(np.trunc(mean + self.contrast * (self.levels - mean)), 0, 255)
+
+        # Histogram of the contrast-enhanced image, without building that image
+        contrast_hist = np.bincount(contrast_lut.astype(np.intp), weights=hist, minlength=256)
+        if self.threshold == 'otsu':
+            threshold = histogram_otsu(contrast_hist)
+        else:
+            threshold = histogram_median(contrast_hist)
+
+        # Contrast + threshold in one lookup
+        white = contrast_lut > threshold
+        if self.dark_text and hist[white].sum() * 2 < gray.size:
+            # Mostly black: light text on a dark background, flip it
+            white = ~white
+        np.copyto(self.binary_lut, np.where(white, 255, 0), casting='unsafe')
+        np.take(self.binary_lut, gray, out=buffers.binary)
+
+        if buffers.upscaled is None:
+            return buffers.binary
+        # Nearest-neighbour integer upscale through a broadcast view
+        scale = self.upscale
+        buffers.upscaled.reshape(height, scale, width, scale)[...] = buffers.binary[:, None, :, None]
+        return buffers.upscaled
@@ -0,0 +1,275 @@
+"""
+Capture / analysis pipeline
+Used by android-automation.py so the next screen capture overlaps the
+analysis (color probes, OCR) of the previous one
+
+- a capture thread keeps a small drop-oldest queue of fresh frames
+- an analysis thread takes frames from the queue and publishes the
+  analysed state of the newest one
+- the decision loop (AndroidAutomation.run) reads the latest state of a
+  frame captured after its last tap
+
+The queue blocks the capture thread for a moment when analysis falls
+behind (backpressure) and then drops the oldest frame. Queue depth,
+drops and analysis latency are counted for the end-of-run report.
+
+Captures are paced: one every `interval` seconds while nobody asks, at
+once when the loop waits for a frame or state (frame() / state()), and
+none at all inside paused() (sleeps, resets).
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class DropOldestQueue:
+    """Bounded FIFO: put() waits up to `block` seconds for room, then drops the oldest item"""
+
+    def __init__(self, maxsize=2):
+        self.maxsize = maxsize
+        self.items = deque()
+        self.condition = threading.Condition()
+        self.puts = 0
+        self.dropped = 0
+        self.skipped = 0
+        self.blocked_time = 0.0
+        self.depth_total = 0
+        self.max_depth = 0
+
+    def put(self, item, block=0.0):
+        """Queue an item, returns True if an older item had to be dropped"""
+        with self.condition:
+            if len(self.items) >= self.maxsize and block > 0:
+                started = time.monotonic()
+                self.condition.wait_for(lambda: len(self.items) < self.maxsize, block)
+                self.blocked_time += time.monotonic() - started
+            dropped = False
+            while len(self.items) >= self.maxsize:
+                self.items.popleft()
+                self.dropped += 1
+                dropped = True
+            self.items.append(item)
+            self.puts += 1
+            self.depth_total += len(self.items)
+            self.max_depth = max(self.max_depth, len(self.items))
+            self.condition.notify_all()
+            return dropped
+
+    def get(self, timeout=None):
+        """Oldest queued item, or None if nothing arrived within timeout"""
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.items, timeout):
+                return None
+            item = self.items.popleft()
+            self.condition.notify_all()
+            return item
+
+    def get_newest(self, timeout=None):
+        """Newest queued item (older ones are skipped), or None if nothing arrived within timeout"""
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.items, timeout):
+                return None
+            item = self.items.pop()
+            self.skipped += len(self.items)
+            self.items.clear()
+            self.condition.notify_all()
+            return item
+
+    def __len__(self):
+        return len(self.items)
+
+    def stats(self):
+        return {
+            'depth': len(self.items),
+            'mean_depth': self.depth_total / self.puts if self.puts else 0.0,
+            'max_depth': self.max_depth,
+            'dropped': self.dropped,
+            'skipped': self.skipped,
+            'blocked_s': self.blocked_time,
+        }
+
+
+class LatestValue:
+    """The most recent frame or analysed state; readers wait for one newer than a time"""
+
+    def __init__(self):
+        self.value = None
+        self.condition = threading.Condition()
+
+    def set(self, value):
+        with self.condition:
+            self.value = value
+            self.condition.notify_all()
+
+    def wait_newer(self, after, timeout):
+        """Latest value captured at or after `after` (on the frames' clock), or None on timeout"""
+        def fresh():
+            return self.value is not None and self.value.timestamp >= after
+        with self.condition:
+            if not self.condition.wait_for(fresh, timeout):
+                return None
+            return self.value
+
+
+class AnalyzedState:
+    """Analysis results of one frame"""
+
+    def __init__(self, frame, results, analysed_at=None):
+        self.frame = frame
+        self.results = results
+        self.analysed_at = analysed_at if analysed_at is not None else time.time()
+
+    @property
+    def timestamp(self):
+        return self.frame.timestamp
+
+    @property
+    def latency(self):
+        """Seconds from the start of the capture to the end of its analysis"""
+        return self.analysed_at - self.frame.timestamp
+
+    def __getitem__(self, name):
+        return self.results[name]
+
+    def get(self, name, default=None):
+        return self.results.get(name, default)
+
+
+class Pipeline:
+    """Runs capture() and analyze(frame) on two background threads"""
+
+    def __init__(self, capture, analyze, depth=2, interval=0.2, block=0.05, clock=None):
+        self.capture = capture
+        self.analyze = analyze
+        self.interval = interval
+        self.block = block
+        # Frame timestamps come from the automation's clock, so must ours
+        self.now = clock.time if clock else time.time
+        self.queue = DropOldestQueue(depth)
+        self.frames = LatestValue()
+        self.states = LatestValue()
+        self.stop_event = threading.Event()
+        self.wake = threading.Event()  # someone waits for a new frame
+        self.resumed = threading.Event()
+        self.resumed.set()
+        self.pause_lock = threading.Lock()
+        self.pauses = 0
+        self.threads = []
+        self.captures = 0
+        self.capture_errors = 0
+        self.analysed = 0
+        self.analysis_errors = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    def start(self):
+        self.stop_event.clear()
+        self.threads = [
+            threading.Thread(target=self._capture_loop, name='capture', daemon=True),
+            threading.Thread(target=self._analysis_loop, name='analysis', daemon=True),
+        ]
+        for thread in self.threads:
+            thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        self.stop_event.set()
+        self.wake.set()
+        self.resumed.set()
+        with self.queue.condition:
+            self.queue.condition.notify_all()
+        for thread in self.threads:
+            thread.join(timeout)
+        self.threads = []
+
+    @property
+    def running(self):
+        return any(thread.is_alive() for thread in self.threads)
+
+    @property
+    def serving(self):
+        """Running and not paused: frame() / state() will get fresh frames"""
+        return self.running and self.resumed.is_set()
+
+    @contextmanager
+    def paused(self):
+        """No captures inside the block (nests; frames are then taken on demand by the caller)"""
+        with self.pause_lock:
+            self.pauses += 1
+            self.resumed.clear()
+        try:
+            yield
+        finally:
+            with self.pause_lock:
+                self.pauses -= 1
+                if not self.pauses:
+                    self.resumed.set()
+
+    def _capture_loop(self):
+        while not self.stop_event.is_set():
+            if not self.resumed.is_set():
+                self.resumed.wait(0.2)
+                continue
+            # Cleared before the capture: a request made while it runs is not lost
+            self.wake.clear()
+            started = self.now()
+            try:
+                frame = self.capture()
+            except Exception as e:
+                frame = None
+                if not self.capture_errors:
+                    print(f"⚠️  Pipeline capture failed: {e}")
+            if frame is None:
+                self.capture_errors += 1
+                self.stop_event.wait(0.5)
+                continue
+            # Date the frame from when the capture started: pixels can
+            # predate a tap sent while the capture was in flight
+            frame.timestamp = min(frame.timestamp, started)
+            self.captures += 1
+            self.frames.set(frame)
+            self.queue.put(frame, self.block)
+            if self.interval > 0:
+                self.wake.wait(self.interval)
+
+    def _analysis_loop(self):
+        while not self.stop_event.is_set():
+            # A frame that waited behind a slow analysis is already outdated
+            frame = self.queue.get_newest(timeout=0.2)
+            if frame is None:
+                continue
+            try:
+                state = AnalyzedState(frame, self.analyze(frame), self.now())
+            except Exception as e:
+                self.analysis_errors += 1
+                if self.analysis_errors == 1:
+                    print(f"⚠️  Pipeline analysis failed: {e}")
+                continue
+            self.analysed += 1
+            self.latency_total += state.latency
+            self.latency_max = max(self.latency_max, state.latency)
+            self.states.set(state)
+
+    def frame(self, after=0.0, timeout=2.0):
+        """Newest frame whose capture started at or after `after`"""
+        self.wake.set()
+        return self.frames.wait_newer(after, timeout)
+
+    def state(self, after=0.0, timeout=2.0):
+        """Newest analysed state of a frame captured at or after `after`"""
+        self.wake.set()
+        return self.states.wait_newer(after, timeout)
+
+    def stats(self):
+        stats = self.queue.stats()
+        stats.update({
+            'captures': self.captures,
+            'capture_errors': self.capture_errors,
+            'analysed': self.analysed,
+            'analysis_errors': self.analysis_errors,
+            'mean_latency_ms': self.latency_total / self.analysed * 1000 if self.analysed else 0.0,
+            'max_latency_ms': self.latency_max * 1000,
+        })
+        return stats
@@ -0,0 +1,199 @@
+"""
+Multi-region pixel probes
+Used by android-automation.py to check button state, popups and dialogs
+with one vectorized pass over a frame
+
+A probe is declared once (region, sampling stride, color space and
+thresholds). ProbeSet.evaluate() gathers the sampled pixels of every
+probe with one fancy-index into the frame, then computes all means and
+match fractions with np.add.reduceat.
+
+Probe modes:
+- 'mean': the region's mean color must be strictly above/below the given
+  per-channel bounds, and the `dominant` channel must exceed the other
+  two by `ratio`. The score is the dominant ratio (or 1.0/0.0).
+- 'fraction': the share of sampled pixels inside the bounds must be at
+  least `min_fraction`. The score is that share.
+"""
+
+from startup import lazy_module
+
+np = lazy_module('numpy')
+
+
+CHANNELS = {'r': 0, 'g': 1, 'b': 2, 'h': 0, 's': 1, 'v': 2}
+
+
+class ColorProbe:
+    """A color predicate over one (x, y, w, h) region"""
+
+    def __init__(self, name, region, stride=1, color_space='rgb', mode='mean',
+                 above=None, below=None, dominant=None, ratio=1.0, min_fraction=0.5):
+        self.name = name
+        self.region = tuple(region)
+        self.stride = max(1, int(stride))
+        self.color_space = color_space
+        self.mode = mode
+        self.above = above
+        self.below = below
+        self.dominant = dominant
+        self.ratio = ratio
+        self.min_fraction = min_fraction
+
+    @classmethod
+    def from_config(cls, config):
+        """Build a probe from a setup-wizard style dict"""
+        region = config['region']
+        return cls(
+            config['name'],
+            (region['x'], region['y'], region['width'], region['height']),
+            stride=config.get('stride', 1),
+            color_space=config.get('color_space', 'rgb'),
+            mode=config.get('mode', 'mean'),
+            above=config.get('above'),
+            below=config.get('below'),
+            dominant=config.get('dominant'),
+            ratio=config.get('ratio', 1.0),
+            min_fraction=config.get('min_fraction', 0.5),
+        )
+
+    def sample_indices(self, frame_width, frame_height):
+        """Flat pixel indices of the strided sample, clipped to the frame"""
+        x, y, w, h = self.region
+        xs = np.arange(max(x, 0), min(x + w, frame_width), self.stride)
+        ys = np.arange(max(y, 0), min(y + h, frame_height), self.stride)
+        return (ys[:, None] * frame_width + xs[None, :]).ravel()
+
+
+def _bounds(values, fill):
+    """Per-channel bound tuple (None entries = no bound) as a float array"""
+    if values is None:
+        return np.full(3, fill, dtype=np.float64)
+    return np.array([fill if v is None else v for v in values], dtype=np.float64)
+
+
+def rgb_to_hsv(rgb):
+    """Vectorized RGB (0-255) -> HSV with H in degrees, S and V in 0-255"""
+    rgb = rgb.astype(np.float64)
+    maxc = rgb.max(axis=1)
+    minc = rgb.min(axis=1)
+    delta = maxc - minc
+    safe = np.where(delta == 0, 1, delta)
+    r, g, b = rgb[:, 0], rgb[:, 1], rgb[:, 2]
+    hue = np.select(
+        [maxc == r, maxc == g],
+        [((g - b) / safe) % 6, (b - r) / safe + 2],
+        (r - g) / safe + 4,
+    ) * 60
+    hue[delta == 0] = 0
+    saturation = np.where(maxc == 0, 0, delta / np.where(maxc == 0, 1, maxc) * 255)
+    return np.stack([hue, saturation, maxc], axis=1)
+
+
+class ProbeResults:
+    """Scores and matches of one ProbeSet evaluation"""
+
+    def __init__(self, names, scores, matches, means):
+        self.names = names
+        self.scores = scores
+        self.matches = matches
+        self.means = means
+        self._index = {name: i for i, name in enumerate(names)}
+
+    def __getitem__(self, name):
+        return bool(self.matches[self._index[name]])
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def score(self, name):
+        return float(self.scores[self._index[name]])
+
+    def mean(self, name):
+        return self.means[self._index[name]]
+
+    def as_dict(self):
+        return {name: bool(match) for name, match in zip(self.names, self.matches)}
+
+
+class ProbeSet:
+    """A group of probes evaluated together in one pass"""
+
+    def __init__(self, probes=()):
+        self.probes = []
+        self._layout = None
+        for probe in probes:
+            self.add(probe)
+
+    def add(self, probe):
+        self.probes = [p for p in self.probes if p.name != probe.name] + [probe]
+        self._layout = None
+
+    def __len__(self):
+        return len(self.probes)
+
+    def _prepare(self, width, height):
+        """Precompute gather indices and per-probe parameters for a frame size"""
+        if self._layout is not None and self._layout['size'] == (width, height):
+            return self._layout
+        indices = [p.sample_indices(width, height) for p in self.probes]
+        counts = np.array([len(i) for i in indices])
+        if (counts == 0).any():
+            empty = [p.name for p, c in zip(self.probes, counts) if c == 0]
+            raise ValueError(f"Probe regions outside the frame: {', '.join(empty)}")
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        owner = np.repeat(np.arange(len(self.probes)), counts)
+        self._layout = {
+            'size': (width, height),
+            'indices': np.concatenate(indices),
+            'counts': counts,
+            'starts': starts,
+            'owner': owner,
+            'hsv': np.array([p.color_space == 'hsv' for p in self.probes]),
+            'fraction': np.array([p.mode == 'fraction' for p in self.probes]),
+            'above': np.stack([_bounds(p.above, -np.inf) for p in self.probes]),
+            'below': np.stack([_bounds(p.below, np.inf) for p in self.probes]),
+            'min_fraction': np.array([p.min_fraction for p in self.probes], dtype=np.float64),
+            'has_dominant': np.array([p.dominant is not None for p in self.probes]),
+            'dominant': np.array([CHANNELS.get(p.dominant, 0) for p in self.probes]),
+            'ratio': np.array([p.ratio for p in self.probes], dtype=np.float64),
+        }
+        return self._layout
+
+    def evaluate(self, pixels):
+        """Evaluate every probe on an H x W x C frame array"""
+        height, width = pixels.shape[:2]
+        layout = self._prepare(width, height)
+
+        # One gather for all probes
+        sampled = pixels.reshape(height * width, -1)[layout['indices'], :3].astype(np.float64)
+        if layout['hsv'].any():
+            in_hsv = layout['hsv'][layout['owner']]
+            sampled[in_hsv] = rgb_to_hsv(sampled[in_hsv])
+
+        counts = layout['counts']
+        means = np.add.reduceat(sampled, layout['starts'], axis=0) / counts[:, None]
+
+        # Per-pixel bounds (fraction mode) and per-probe bounds on the mean
+        above = layout['above']
+        below = layout['below']
+        pixel_ok = ((sampled > above[layout['owner']]) & (sampled < below[layout['owner']])).all(axis=1)
+        fractions = np.add.reduceat(pixel_ok.astype(np.float64), layout['starts']) / counts
+        mean_ok = ((means > above) & (means < below)).all(axis=1)
+
+        scores = np.where(layout['fraction'], fractions, mean_ok.astype(np.float64))
+        matches = np.where(layout['fraction'], fractions >= layout['min_fraction'], mean_ok)
+
+        # Dominant channel rule on the mean (e.g. blue > 1.2 x red and green)
+        rows = np.arange(len(self.probes))
+        dominant = layout['dominant']
+        dominant_value = means[rows, dominant]
+        others = means.copy()
+        others[rows, dominant] = -np.inf
+        others_max = others.max(axis=1)
+        dominant_ok = dominant_value > others_max * layout['ratio']
+        use_dominant = layout['has_dominant'] & ~layout['fraction']
+        scores = np.where(use_dominant, dominant_value / np.maximum(others_max, 1e-9), scores)
+        matches = np.where(use_dominant, matches & dominant_ok, matches)
+
+        return ProbeResults([p.name for p in self.probes], scores, matches, means)
@@ -0,0 +1,178 @@
+"""
+Sampling profiler
+Used by android-automation.py --profile to see where a run spends its
+time on the phone itself, where external profilers cannot be attached
+
+- a background thread samples the stacks of every other thread every
+  interval seconds (sys._current_frames, nothing is traced per call)
+- each sample is filed under its thread and the loop phase it was in
+  (the innermost metrics span: capture, ocr, tap, sleep, ...)
+- on stop: a collapsed-stack file (flamegraph.pl / speedscope input), a
+  self-contained SVG flame graph and a top-N text summary
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from html import escape
+
+MAX_DEPTH = 64
+
+
+def frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Samples thread stacks at a fixed interval and aggregates them by phase"""
+
+    def __init__(self, metrics=None, interval=0.01):
+        self.metrics = metrics
+        self.interval = interval
+        self.stacks = Counter()  # (thread, phase, frame labels outermost first) -> samples
+        self.samples = 0
+        self.overhead = 0.0
+        self.started = None
+        self.stopped = None
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.started = time.perf_counter()
+        self.thread = threading.Thread(target=self._loop, name='profiler', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+        self.stopped = time.perf_counter()
+
+    def _loop(self):
+        own = threading.get_ident()
+        labels = {}  # code object -> label, built once per function
+        while not self.stop_event.wait(self.interval):
+            started = time.perf_counter()
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_DEPTH:
+                    code = frame.f_code
+                    label = labels.get(code)
+                    if label is None:
+                        label = labels[code] = frame_label(code)
+                    stack.append(label)
+                    frame = frame.f_back
+                stack.reverse()
+                phase = self.metrics.current_phase(thread_id) if self.metrics else None
+                self.stacks[(names.get(thread_id, str(thread_id)), phase or 'other', tuple(stack))] += 1
+            self.samples += 1
+            self.overhead += time.perf_counter() - started
+
+    def collapsed(self):
+        """{'thread;phase:x;f1;f2': samples}, the folded format of flamegraph.pl"""
+        folded = Counter()
+        for (thread, phase, stack), n in self.stacks.items():
+            folded[';'.join((thread, f"phase:{phase}") + stack)] += n
+        return folded
+
+    def phase_totals(self, thread='MainThread'):
+        totals = Counter()
+        for (name, phase, _), n in self.stacks.items():
+            if name == thread:
+                totals[phase] += n
+        return totals
+
+    def function_totals(self, thread='MainThread'):
+        """(self samples, inclusive samples) per function"""
+        own, inclusive = Counter(), Counter()
+        for (name, _, stack), n in self.stacks.items():
+            if name != thread or not stack:
+                continue
+            own[stack[-1]] += n
+            for label in set(stack):
+                inclusive[label] += n
+        return own, inclusive
+
+    def summary(self, top=15, thread='MainThread'):
+        """Top-N text report: samples per phase, then the hottest functions"""
+        elapsed = (self.stopped or time.perf_counter()) - (self.started or 0)
+        phases = self.phase_totals(thread)
+        total = sum(phases.values()) or 1
+        lines = [f"Profile: {self.samples} samples over {elapsed:.1f}s "
+                 f"(every {self.interval * 1000:.0f} ms, sampler busy "
+                 f"{self.overhead / elapsed if elapsed else 0:.1%})",
+                 f"", f"{thread} by phase:"]
+        for phase, n in phases.most_common():
+            lines.append(f"   {phase:<12} {n / total:6.1%}  {n * self.interval:8.1f}s")
+        own, inclusive = self.function_totals(thread)
+        lines += ["", f"Top {top} functions by self time:"]
+        for label, n in own.most_common(top):
+            lines.append(f"   {n / total:6.1%}  {label}")
+        lines += ["", f"Top {top} functions by total time (including callees):"]
+        for label, n in inclusive.most_common(top):
+            lines.append(f"   {n / total:6.1%}  {label}")
+        return '\n'.join(lines)
+
+    def write(self, directory, top=15):
+        """Write <name>.folded, <name>.svg and <name>.txt, returns their paths"""
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, time.strftime("profile_%Y%m%d_%H%M%S"))
+        folded = self.collapsed()
+        with open(base + '.folded', 'w') as f:
+            for stack, n in sorted(folded.items()):
+                f.write(f"{stack} {n}\n")
+        with open(base + '.svg', 'w') as f:
+            f.write(flame_graph_svg(folded, f"{self.samples} samples, {self.interval * 1000:.0f} ms interval"))
+        with open(base + '.txt', 'w') as f:
+            f.write(self.summary(top) + '\n')
+        return [base + '.folded', base + '.svg', base + '.txt']
+
+
+def flame_graph_svg(folded, subtitle='', width=1200, row=16):
+    """Flame graph of collapsed stacks as a standalone SVG (hover for details)"""
+    root = {'children': {}, 'count': 0}
+    for stack, n in folded.items():
+        node = root
+        node['count'] += n
+        for label in stack.split(';'):
+            node = node['children'].setdefault(label, {'children': {}, 'count': 0})
+            node['count'] += n
+
+    rects = []
+    depth_max = [0]
+
+    def layout(node, x, depth):
+        depth_max[0] = max(depth_max[0], depth)
+        for label, child in sorted(node['children'].items()):
+            w = child['count'] / root['count'] * width
+            if w >= 0.5:
+                rects.append((x, depth, w, label, child['count']))
+                layout(child, x, depth + 1)
+            x += w
+
+    if root['count']:
+        layout(root, 0.0, 0)
+    height = (depth_max[0] + 1) * row + 40
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+             f'font-family="monospace" font-size="11">',
+             f'<text x="4" y="14">Flame graph - {escape(subtitle)}</text>']
+    for x, depth, w, label, count in rects:
+        y = height - (depth + 1) * row - 4
+        # Warm colours by name, so a function keeps its colour across the graph
+        hue = sum(label.encode()) % 60
+        share = count / root['count']
+        parts.append(f'<g><title>{escape(label)} ({count} samples, {share:.1%})</title>'
+                     f'<rect x="{x:.1f}" y="{y}" width="{w:.1f}" height="{row - 1}" '
+                     f'fill="hsl({hue},80%,60%)"/>')
+        if w > 30:
+            text = label[:int(w / 7)]
+            parts.append(f'<text x="{x + 2:.1f}" y="{y + row - 5}">{escape(text)}</text>')
+        parts.append('</g>')
+    parts.append('</svg>')
+    return '\n'.join(parts)
@@ -0,0 +1,326 @@
+"""
+Deterministic trace replay
+Re-runs AndroidAutomation.run() (and reset_game()) against a trace
+recorded with trace_dir, on a VirtualClock: sleeps and waits take no real
+time, so hours of play replay in seconds on a computer
+
+- ReplayDevice serves the recorded frames (rebuilt from the region crops)
+  by virtual time and logs the taps the current logic makes
+- OCR is answered from the recorded results (RecordedOCR), so no OCR
+  engine is needed; pass --engine to run the installed engine instead
+- the replayed taps are compared with the recorded ones: taps the new
+  logic adds, drops or moves are reported as divergences, taps that only
+  happen earlier/later as a timing shift
+
+The recorded frames do not react to divergent taps, so after the first
+divergence the replay shows what the new logic decides on the old run.
+
+Run: python replay.py traces/trace_20240101_120000.trc [--verbose]
+"""
+
+import argparse
+import bisect
+import contextlib
+import difflib
+import hashlib
+import importlib.util
+import io
+import re
+import sys
+import time
+from pathlib import Path
+
+from clock import VirtualClock
+from device_backend import DeviceBackend
+from frames import Frame
+from run_trace import read_trace
+from startup import lazy_module
+from structured_log import StructuredLogger
+
+np = lazy_module('numpy')
+
+TIME_EPSILON = 1e-6
+
+
+class ReplayFinished(BaseException):
+    """The trace ran out
+
+    A BaseException like KeyboardInterrupt, so the run's own error handling
+    (except Exception) lets it through and run() ends right away.
+    """
+
+
+def region_from_ocr_name(name):
+    """(x, y, w, h) from an OCR region name like 'ocr 220,340 120x25'"""
+    match = re.match(r'ocr (\d+),(\d+) (\d+)x(\d+)$', name)
+    return tuple(int(v) for v in match.groups()) if match else None
+
+
+class RecordedTrace:
+    """Frames, taps and OCR results of a trace"""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.wall_start = 0.0
+        self.size = None
+        self.frame_times = []
+        self.frame_crops = []  # per frame: {name: (region, crop)}
+        self.capture_latencies = []
+        self.taps = []  # (t, x, y)
+        self.ocr_pairs = []  # (crop, result)
+        self.end = 0.0
+        self._load()
+
+    def _load(self):
+        current = {}  # name -> (region, crop) as of the latest frame
+        latest_by_region = {}  # region -> crop
+        for meta, array in read_trace(self.path):
+            kind = meta['kind']
+            self.end = max(self.end, meta['t'])
+            if kind == 'start':
+                self.wall_start = meta['wall_time']
+            elif kind == 'crop':
+                region = tuple(meta['region'])
+                current[meta['name']] = (region, array)
+                latest_by_region[region] = array
+            elif kind == 'frame':
+                self.size = tuple(meta['size'])
+                self.frame_times.append(meta['t'])
+                self.frame_crops.append(dict(current))
+                if meta.get('latency') is not None:
+                    self.capture_latencies.append(meta['latency'])
+            elif kind == 'tap':
+                self.taps.append((meta['t'], meta['x'], meta['y']))
+            elif kind == 'taps':
+                # Recorded once the chain finished: spread the taps back over its delays
+                t = meta['t'] - sum(delay for _, _, delay in meta['steps'])
+                for x, y, delay in meta['steps']:
+                    self.taps.append((t, x, y))
+                    t += delay
+            elif kind == 'ocr':
+                region = region_from_ocr_name(meta['name'])
+                crop = latest_by_region.get(region)
+                if crop is not None:
+                    self.ocr_pairs.append((crop, {'text': meta['text'], 'confidence': meta['confidence']}))
+        self.taps.sort()
+
+    def capture_latency(self):
+        """Median recorded capture time (0.05s for traces without it)"""
+        if not self.capture_latencies:
+            return 0.05
+        latencies = sorted(self.capture_latencies)
+        return latencies[len(latencies) // 2]
+
+
+class RecordedOCR:
+    """OCR answered from the trace: binarized crop -> recorded result"""
+
+    def __init__(self, pairs, binarize):
+        self.results = {}
+        self.hits = 0
+        self.misses = 0
+        for crop, result in pairs:
+            self.results[self.key(binarize(crop))] = result
+
+    @staticmethod
+    def key(binary):
+        return hashlib.blake2b(np.ascontiguousarray(binary).tobytes(), digest_size=16).hexdigest()
+
+    def __call__(self, binary):
+        result = self.results.get(self.key(binary))
+        if result is None:
+            self.misses += 1
+            return {'text': '', 'confidence': 0}
+        self.hits += 1
+        return dict(result)
+
+
+class ReplayDevice(DeviceBackend):
+    """Serves recorded frames by virtual time and logs taps"""
+
+    name = 'replay'
+
+    def __init__(self, trace, clock, capture_cost=None, tap_cost=0.01):
+        self.trace = trace
+        self.clock = clock
+        self.capture_cost = capture_cost if capture_cost is not None else trace.capture_latency()
+        self.tap_cost = tap_cost
+        self.taps = []
+        self.captures = 0
+        self._composed_index = None
+        self._composed = None
+
+    def screen_size(self):
+        return self.trace.size
+
+    def _compose(self, index):
+        """Rebuild frame `index` from its region crops on a black screen"""
+        if index == self._composed_index:
+            return self._composed
+        width, height = self.trace.size
+        crops = self.trace.frame_crops[index]
+        channels = max((crop.shape[2] for _, crop in crops.values() if crop.ndim == 3), default=3)
+        canvas = np.zeros((height, width, channels), dtype=np.uint8)
+        for (x, y, w, h), crop in crops.values():
+            canvas[y:y + crop.shape[0], x:x + crop.shape[1]] = crop.reshape(crop.shape[0], crop.shape[1], -1)
+        self._composed_index, self._composed = index, canvas
+        return canvas
+
+    def capture(self):
+        self.clock.advance(self.capture_cost)
+        t = self.clock.monotonic()
+        if t > self.trace.end or not self.trace.frame_times:
+            raise ReplayFinished()
+        # Small tolerance: virtual times add up with float rounding (7.2499999 vs 7.25)
+        index = max(bisect.bisect_right(self.trace.frame_times, t + TIME_EPSILON) - 1, 0)
+        self.captures += 1
+        return Frame(self._compose(index), timestamp=self.clock.time(), source='replay')
+
+    def tap(self, x, y):
+        # Logged once the tap is done, like the trace records it
+        self.clock.advance(self.tap_cost)
+        self.taps.append((self.clock.monotonic(), x, y))
+
+    def tap_sequence(self, steps):
+        for x, y, delay in steps:
+            self.tap(x, y)
+            self.clock.sleep(delay)
+
+    def start_app(self, package, restart=False):
+        return 'replay'
+
+    def latency_stats(self):
+        ms = self.tap_cost * 1000
+        return {'count': len(self.taps), 'mean_ms': ms, 'p50_ms': ms, 'max_ms': ms, 'method': self.name}
+
+
+def compare_taps(recorded, replayed, time_tolerance=1.0):
+    """Divergences (added, dropped or moved taps) and the timing shift of matching taps"""
+    matcher = difflib.SequenceMatcher(None, [(x, y) for _, x, y in recorded],
+                                      [(x, y) for _, x, y in replayed], autojunk=False)
+    divergences = []
+    shifts = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            shifts.extend(replayed[j][0] - recorded[i][0] for i, j in zip(range(i1, i2), range(j1, j2)))
+            continue
+        for k in range(max(i2 - i1, j2 - j1)):
+            divergences.append({
+                'recorded': recorded[i1 + k] if i1 + k < i2 else None,
+                'replayed': replayed[j1 + k] if j1 + k < j2 else None,
+            })
+    return {
+        'divergences': divergences,
+        'matched': len(shifts),
+        'mean_shift': sum(shifts) / len(shifts) if shifts else 0.0,
+        'late_or_early': sum(1 for s in shifts if abs(s) > time_tolerance),
+    }
+
+
+def load_automation_class(path=None):
+    """AndroidAutomation from android-automation.py (not importable by name)"""
+    path = Path(path) if path else Path(__file__).resolve().parent / 'android-automation.py'
+    spec = importlib.util.spec_from_file_location('android_automation', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.AndroidAutomation
+
+
+def replay(trace_path, automation_class=None, capture_cost=None, tap_cost=0.01,
+           use_engine=False, time_tolerance=1.0, verbose=False, configure=None):
+    """Replay a trace through the current run() logic, returns a report dict
+
+    configure(automation) may change timings/thresholds before the run.
+    """
+    trace = RecordedTrace(trace_path)
+    clock = VirtualClock(wall_start=trace.wall_start)
+    device = ReplayDevice(trace, clock, capture_cost, tap_cost)
+    automation_class = automation_class or load_automation_class()
+
+    output = sys.stdout if verbose else io.StringIO()
+    with contextlib.redirect_stdout(output):
+        # Same config (coordinates, thresholds) as the recorded run, but no
+        # directories or log file are created
+        automation = automation_class(backend=device, clock=clock, read_only=True)
+        # Deterministic single-threaded run that writes nothing
+        automation.use_pipeline = False
+        automation.ocr_workers = 0
+        automation.trace_dir = None
+        automation.metrics_dir = None
+        automation.save_screenshots = False
+        automation.save_anomalies = False
+        automation.log.close()
+        automation.log = StructuredLogger(None, console=verbose, now=clock.time)
+        automation.ocr_cache = None
+        automation.glyph_samples = None
+        recorded_ocr = None
+        if not use_engine:
+            recorded_ocr = RecordedOCR(trace.ocr_pairs,
+                                       lambda crop: automation.preprocess_for_ocr(Frame(crop))[1])
+            automation.ocr_engine = 'recorded'
+            automation.ocr_reader = recorded_ocr
+        if configure:
+            configure(automation)
+
+        started = time.perf_counter()
+        try:
+            automation.run()
+        except ReplayFinished:
+            pass
+        wall = time.perf_counter() - started
+
+    # Only compare the part of the recording the replay got through
+    recorded = [tap for tap in trace.taps if tap[0] <= clock.monotonic()]
+    report = compare_taps(recorded, device.taps, time_tolerance)
+    report.update({
+        'recorded_taps': len(recorded),
+        'replayed_taps': len(device.taps),
+        'virtual_seconds': clock.monotonic(),
+        'wall_seconds': wall,
+        'speedup': clock.monotonic() / wall if wall else 0.0,
+        'captures': device.captures,
+        'ocr_hits': recorded_ocr.hits if recorded_ocr else None,
+        'ocr_misses': recorded_ocr.misses if recorded_ocr else None,
+    })
+    return report
+
+
+def print_report(report, limit=20):
+    print(f"⏩ Replayed {report['virtual_seconds']:.1f}s in {report['wall_seconds']:.2f}s "
+          f"(x{report['speedup']:.0f}), {report['captures']} captures")
+    print(f"👆 Taps: {report['recorded_taps']} recorded, {report['replayed_taps']} replayed, "
+          f"{report['matched']} matching (mean shift {report['mean_shift']:+.2f}s, "
+          f"{report['late_or_early']} off by more than the tolerance)")
+    if report['ocr_hits'] is not None:
+        print(f"🧠 Recorded OCR: {report['ocr_hits']} hits, {report['ocr_misses']} misses")
+    divergences = report['divergences']
+    if not divergences:
+        print("✅ No divergences")
+        return
+    print(f"⚠️  {len(divergences)} divergences:")
+    for d in divergences[:limit]:
+        recorded = f"{d['recorded'][1]},{d['recorded'][2]} at {d['recorded'][0]:.2f}s" if d['recorded'] else "-"
+        replayed = f"{d['replayed'][1]},{d['replayed'][2]} at {d['replayed'][0]:.2f}s" if d['replayed'] else "-"
+        print(f"   recorded {recorded:<28} replayed {replayed}")
+    if len(divergences) > limit:
+        print(f"   ... {len(divergences) - limit} more")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded trace on a virtual clock")
+    parser.add_argument('trace')
+    parser.add_argument('--capture-cost', type=float, default=None,
+                        help="virtual seconds per capture (default: median recorded capture time)")
+    parser.add_argument('--tap-cost', type=float, default=0.01, help="virtual seconds per tap")
+    parser.add_argument('--tolerance', type=float, default=1.0, help="seconds before a tap counts as moved in time")
+    parser.add_argument('--engine', action='store_true', help="run the installed OCR engine instead of recorded results")
+    parser.add_argument('--verbose', action='store_true', help="show the run's own output")
+    args = parser.parse_args()
+
+    report = replay(args.trace, capture_cost=args.capture_cost, tap_cost=args.tap_cost,
+                    use_engine=args.engine, time_tolerance=args.tolerance, verbose=args.verbose)
+    print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -171,8 +171,8 @@ main() {
     sleep 3
     
     # Run the automation
-    python3 android-automation.py
+    python3 android-automation.py "$@"
 }
 
 # Run main function
-main
+main "$@"
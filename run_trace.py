@@ -0,0 +1,228 @@
+"""
+Run traces
+Used by android-automation.py (trace_dir) to record what a run saw and
+did: region crops of every captured frame, OCR results, taps, waits and
+sleeps, each with a monotonic timestamp
+
+Archive format (streamable, read back chunk by chunk):
+    chunk  = b'TRC1' + <uint32 compressed size> + <uint32 raw size> + zlib(records)
+    record = <uint32 meta size> + JSON meta + <uint32 blob size> + blob
+A crop's blob is its raw pixel bytes (shape/dtype are in the meta). Crops
+identical to the previous one of the same region are stored as a
+reference only.
+
+Recording never blocks the run: records go into a bounded queue that a
+writer thread compresses and appends to the file. When the queue is full
+records are dropped and counted.
+
+Summary of a trace: python run_trace.py traces/trace_20240101_120000.trc
+"""
+
+import hashlib
+import json
+import queue
+import struct
+import sys
+import threading
+import time
+import zlib
+from collections import Counter
+
+from startup import lazy_module
+
+np = lazy_module('numpy')
+
+CHUNK_MAGIC = b'TRC1'
+CHUNK_HEADER = struct.Struct('<4sII')
+SIZE = struct.Struct('<I')
+
+
+def encode_record(meta, blob=b''):
+    meta = json.dumps(meta, separators=(',', ':')).encode()
+    return SIZE.pack(len(meta)) + meta + SIZE.pack(len(blob)) + blob
+
+
+class TraceWriter:
+    """Streams trace records to a chunked, zlib-compressed archive"""
+
+    def __init__(self, path, chunk_size=256 * 1024, queue_size=4096, level=1, flush_interval=2.0,
+                 clock=None):
+        self.path = str(path)
+        # Record times come from the automation's clock (virtual in replays)
+        self.now = clock.monotonic if clock else time.monotonic
+        self.wall_time = clock.time if clock else time.time
+        self.chunk_size = chunk_size
+        self.level = level
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.started = self.now()
+        self.last_crops = {}
+        self.records = 0
+        self.dropped = 0
+        self.crops = 0
+        self.repeated_crops = 0
+        self.raw_bytes = 0
+        self.written_bytes = 0
+        self.file = open(self.path, 'wb')
+        self.thread = threading.Thread(target=self._writer_loop, name='trace', daemon=True)
+        self.thread.start()
+        self.record('start', wall_time=self.wall_time())
+
+    def record(self, kind, blob=b'', **fields):
+        """Queue one record (never blocks; dropped if the writer is behind)"""
+        fields['kind'] = kind
+        fields['t'] = round(self.now() - self.started, 6)
+        try:
+            self.queue.put_nowait((fields, blob))
+        except queue.Full:
+            self.dropped += 1
+
+    def frame(self, frame, regions, latency=None):
+        """Crops of {name: (x, y, w, h)} from a captured frame (and how long the capture took)"""
+        crops = {}
+        for name, region in regions.items():
+            crop = np.ascontiguousarray(frame.crop(region))
+            data = crop.tobytes()
+            digest = hashlib.blake2b(data, digest_size=8).hexdigest()
+            self.crops += 1
+            if self.last_crops.get(name) == digest:
+                self.repeated_crops += 1
+                crops[name] = None
+                continue
+            self.last_crops[name] = digest
+            crops[name] = (region, crop, data)
+        # One record per changed crop, one small record for the frame itself
+        for name, entry in crops.items():
+            if entry is not None:
+                region, crop, data = entry
+                self.record('crop', data, name=name, region=list(region),
+                            shape=list(crop.shape), dtype=str(crop.dtype))
+        self.record('frame', source=frame.source, size=[frame.width, frame.height],
+                    changed=[name for name, entry in crops.items() if entry is not None],
+                    latency=None if latency is None else round(latency, 6))
+
+    def tap(self, x, y):
+        self.record('tap', x=x, y=y)
+
+    def taps(self, steps):
+        self.record('taps', steps=[list(step) for step in steps])
+
+    def ocr(self, name, result):
+        self.record('ocr', name=name, text=result.get('text', ''),
+                    confidence=float(result.get('confidence', 0)))
+
+    def wait(self, result):
+        self.record('wait', name=result.name, ok=result.ok, elapsed=round(result.elapsed, 6),
+                    polls=result.polls, timeout=result.timeout)
+
+    def sleep(self, seconds, reason=''):
+        self.record('sleep', seconds=seconds, reason=reason)
+
+    def event(self, name, **fields):
+        self.record('event', name=name, **fields)
+
+    def _write_chunk(self, parts):
+        raw = b''.join(parts)
+        compressed = zlib.compress(raw, self.level)
+        self.file.write(CHUNK_HEADER.pack(CHUNK_MAGIC, len(compressed), len(raw)) + compressed)
+        self.file.flush()
+        self.raw_bytes += len(raw)
+        self.written_bytes += CHUNK_HEADER.size + len(compressed)
+
+    def _writer_loop(self):
+        parts = []
+        size = 0
+        last_flush = time.monotonic()
+        while True:
+            try:
+                item = self.queue.get(timeout=0.5)
+            except queue.Empty:
+                item = False
+            if item is None:
+                break
+            if item:
+                meta, blob = item
+                encoded = encode_record(meta, blob)
+                parts.append(encoded)
+                size += len(encoded)
+                self.records += 1
+            if parts and (size >= self.chunk_size or time.monotonic() - last_flush >= self.flush_interval):
+                self._write_chunk(parts)
+                parts, size = [], 0
+                last_flush = time.monotonic()
+        if parts:
+            self._write_chunk(parts)
+
+    def close(self):
+        if self.thread is None:
+            return
+        self.record('stop', dropped=self.dropped)
+        self.queue.put(None)
+        self.thread.join()
+        self.thread = None
+        self.file.close()
+
+    def stats(self):
+        return {
+            'records': self.records,
+            'dropped': self.dropped,
+            'crops': self.crops,
+            'repeated_crops': self.repeated_crops,
+            'raw_bytes': self.raw_bytes,
+            'written_bytes': self.written_bytes,
+        }
+
+
+def read_chunks(f):
+    """Decompressed chunk payloads of an open trace file, one at a time"""
+    while True:
+        header = f.read(CHUNK_HEADER.size)
+        if len(header) < CHUNK_HEADER.size:
+            return
+        magic, compressed_size, raw_size = CHUNK_HEADER.unpack(header)
+        if magic != CHUNK_MAGIC:
+            raise ValueError("Not a trace file (bad chunk header)")
+        data = f.read(compressed_size)
+        if len(data) < compressed_size:
+            return  # last chunk cut short (run killed mid-write)
+        yield zlib.decompress(data)
+
+
+def read_trace(path):
+    """Yield (meta, crop array or None) for every record of a trace"""
+    with open(path, 'rb') as f:
+        for payload in read_chunks(f):
+            offset = 0
+            while offset < len(payload):
+                (meta_size,) = SIZE.unpack_from(payload, offset)
+                offset += SIZE.size
+                meta = json.loads(payload[offset:offset + meta_size])
+                offset += meta_size
+                (blob_size,) = SIZE.unpack_from(payload, offset)
+                offset += SIZE.size
+                array = None
+                if blob_size:
+                    blob = payload[offset:offset + blob_size]
+                    array = np.frombuffer(blob, dtype=meta['dtype']).reshape(meta['shape'])
+                offset += blob_size
+                yield meta, array
+
+
+def summarize(path):
+    """Record counts per kind and the traced duration"""
+    kinds = Counter()
+    duration = 0.0
+    for meta, _ in read_trace(path):
+        kinds[meta['kind']] += 1
+        duration = max(duration, meta['t'])
+    return {'duration': duration, 'kinds': dict(kinds)}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python run_trace.py <trace file>")
+        sys.exit(1)
+    summary = summarize(sys.argv[1])
+    print(f"⏱️  {summary['duration']:.1f}s traced")
+    for kind, count in sorted(summary['kinds'].items()):
+        print(f"   {kind:<6} {count}")
@@ -0,0 +1,114 @@
+"""
+Raw framebuffer capture through `screencap` (no PNG encode/decode)
+Used by android-automation.py when uiautomator2 is not available
+
+`screencap` without -p writes a small header followed by the raw pixel
+buffer. We read it straight from the subprocess pipe into a numpy array.
+
+Testing on Linux without a phone:
+    1. On the phone:  screencap > /sdcard/dump.raw
+    2. Copy dump.raw to the Linux box
+    3. SCREENCAP_DUMP=dump.raw python screencap_raw.py sh fake_screencap.sh
+"""
+
+import struct
+import subprocess
+import sys
+import time
+
+from frames import Frame
+from startup import lazy_module
+
+np = lazy_module('numpy')
+
+
+# android.graphics.PixelFormat values that screencap can report
+PIXEL_FORMAT_RGBA_8888 = 1
+PIXEL_FORMAT_RGBX_8888 = 2
+PIXEL_FORMAT_RGB_888 = 3
+PIXEL_FORMAT_RGB_565 = 4
+PIXEL_FORMAT_BGRA_8888 = 5
+
+BYTES_PER_PIXEL = {
+    PIXEL_FORMAT_RGBA_8888: 4,
+    PIXEL_FORMAT_RGBX_8888: 4,
+    PIXEL_FORMAT_RGB_888: 3,
+    PIXEL_FORMAT_RGB_565: 2,
+    PIXEL_FORMAT_BGRA_8888: 4,
+}
+
+# width, height, format (+ dataspace on Android 9 and newer)
+HEADER_SIZES = (12, 16)
+
+
+def parse_raw_screencap(data):
+    """Turn raw `screencap` output into an H x W x C uint8 array"""
+    if len(data) < HEADER_SIZES[0]:
+        raise ValueError(f"screencap output too short ({len(data)} bytes)")
+
+    width, height, pixel_format = struct.unpack_from('<III', data)
+    bpp = BYTES_PER_PIXEL.get(pixel_format)
+    if bpp is None:
+        raise ValueError(f"Unsupported screencap pixel format: {pixel_format}")
+
+    pixels_size = width * height * bpp
+    header_size = len(data) - pixels_size
+    if header_size not in HEADER_SIZES:
+        raise ValueError(f"Unexpected screencap size: {len(data)} bytes for {width}x{height}")
+
+    # Zero-copy view on the pipe buffer
+    pixels = np.frombuffer(data, dtype=np.uint8, count=pixels_size, offset=header_size)
+
+    if pixel_format == PIXEL_FORMAT_RGB_565:
+        packed = pixels.view('<u2').reshape(height, width)
+        rgb = np.empty((height, width, 3), dtype=np.uint8)
+        rgb[..., 0] = (packed >> 11) << 3
+        rgb[..., 1] = ((packed >> 5) & 0x3F) << 2
+        rgb[..., 2] = (packed & 0x1F) << 3
+        return rgb
+
+    array = pixels.reshape(height, width, bpp)
+    if pixel_format == PIXEL_FORMAT_BGRA_8888:
+        # Reorder to RGBA
+        array = array[..., [2, 1, 0, 3]]
+    return array
+
+
+class RawScreencap:
+    """Capture backend that pipes raw `screencap` output into memory"""
+
+    def __init__(self, command=('sh', '-c', 'screencap'), timeout=5):
+        self.command = list(command)
+        self.timeout = timeout
+        self.last_latency = None
+
+    def capture(self):
+        """Run screencap and return a Frame, raises on failure"""
+        started = time.perf_counter()
+        result = subprocess.run(
+            self.command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            check=False,
+            timeout=self.timeout
+        )
+        if result.returncode != 0 or not result.stdout:
+            raise RuntimeError(f"screencap failed (code {result.returncode})")
+
+        frame = Frame(parse_raw_screencap(result.stdout), source='screencap-raw')
+        self.last_latency = time.perf_counter() - started
+        return frame
+
+
+if __name__ == "__main__":
+    # Quick latency check: python screencap_raw.py [command ...]
+    command = sys.argv[1:] or ['sh', '-c', 'screencap']
+    capture = RawScreencap(command)
+    timings = []
+    for _ in range(10):
+        frame = capture.capture()
+        timings.append(capture.last_latency * 1000)
+    timings.sort()
+    print(f"📱 Frame: {frame.width}x{frame.height}")
+    print(f"⏱️  Raw capture: median {timings[len(timings) // 2]:.1f} ms, "
+          f"best {timings[0]:.1f} ms, worst {timings[-1]:.1f} ms")
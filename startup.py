@@ -0,0 +1,104 @@
+"""
+Lazy imports and startup timing
+Used by android-automation.py so heavy dependencies (easyocr/torch,
+uiautomator2, numpy, Pillow) are only loaded on first use, and so the
+cost of every import, connection and engine start is visible
+"""
+
+import importlib
+import importlib.util
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StartupTimer:
+    """Records how long each import / connect / engine step took"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.steps = []
+
+    @contextmanager
+    def measure(self, name, kind):
+        started = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.steps.append({
+                'name': name,
+                'kind': kind,
+                'seconds': time.perf_counter() - started,
+                'ok': ok,
+            })
+
+    def total(self, kind=None):
+        return sum(step['seconds'] for step in self.steps if kind is None or step['kind'] == kind)
+
+    def report(self):
+        """Print the startup breakdown, slowest step first"""
+        print("\n⏱️  Startup breakdown:")
+        for step in sorted(self.steps, key=lambda s: s['seconds'], reverse=True):
+            status = "" if step['ok'] else "  (failed)"
+            print(f"   {step['seconds'] * 1000:8.1f} ms  {step['kind']:<8} {step['name']}{status}")
+        kinds = sorted({step['kind'] for step in self.steps})
+        summary = ", ".join(f"{kind} {self.total(kind) * 1000:.0f} ms" for kind in kinds)
+        print(f"   Total measured: {self.total() * 1000:.0f} ms ({summary})")
+
+
+# One timer for the whole process
+STARTUP = StartupTimer()
+
+
+def module_available(name):
+    """True if the module can be imported, without importing it"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+class LazyModule:
+    """Module stand-in that imports the real module on first attribute access"""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    with STARTUP.measure(self._name, 'import'):
+                        self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+_LAZY_MODULES = {}
+_LAZY_MODULES_LOCK = threading.Lock()
+
+
+def lazy_module(name):
+    """Shared stand-in per module name, so each import is timed (and listed) once"""
+    with _LAZY_MODULES_LOCK:
+        module = _LAZY_MODULES.get(name)
+        if module is None:
+            module = _LAZY_MODULES[name] = LazyModule(name)
+        return module
+
+
+def ensure_loaded(module):
+    """Import a lazy module now (so its cost is not charged to the caller's step)"""
+    if isinstance(module, LazyModule):
+        return module._load()
+    return module
@@ -0,0 +1,218 @@
+"""
+Structured log
+Used by android-automation.py instead of print() in the loop: a log call
+only builds a dict and queues it, a background thread does the writing
+
+- every record goes to a rotating JSONL file (time, level, message, fields)
+- the console gets the message text, rate-limited: when the loop logs
+  faster than console_rate lines/s the extra info/debug lines only go to
+  the file (warnings and errors are always shown)
+- the queue is bounded; when the writer falls behind records are dropped
+  and counted instead of blocking the loop
+
+Levels: debug, info, warning, error.
+"""
+
+import json
+import os
+import queue
+import sys
+import threading
+import time
+
+LEVELS = {'debug': 10, 'info': 20, 'warning': 30, 'error': 40}
+DISABLED = 100
+
+_STOP = object()
+
+
+def level_number(level):
+    return LEVELS[level] if isinstance(level, str) else level
+
+
+class RotatingJSONLFile:
+    """Appends lines to a file, rotated once it reaches max_bytes (keeps `backups` old files)"""
+
+    def __init__(self, path, max_bytes=5 * 1024 * 1024, backups=3):
+        self.path = str(path)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.file = None
+        self.size = 0
+        self.rotations = 0
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(self.path, 'a', encoding='utf-8')
+        self.size = self.file.tell()
+
+    def rotate(self):
+        self.file.close()
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self.rotations += 1
+        self._open()
+
+    def write(self, lines):
+        # Opened on the first write, so a logger that never logs leaves no file
+        if self.file is None:
+            self._open()
+        data = ''.join(lines)
+        self.file.write(data)
+        self.file.flush()
+        self.size += len(data)
+        if self.size >= self.max_bytes:
+            self.rotate()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class StructuredLogger:
+    """Leveled, structured log written by a background thread"""
+
+    def __init__(self, path=None, level='info', console=True, console_level='info',
+                 console_rate=20.0, console_burst=40, queue_size=10000,
+                 max_bytes=5 * 1024 * 1024, backups=3, now=time.time):
+        self.now = now
+        self.file = RotatingJSONLFile(path, max_bytes, backups) if path else None
+        self.file_level = level_number(level) if self.file else DISABLED
+        self.console = console
+        self.console_level = level_number(console_level) if console else DISABLED
+        # Cheapest possible early exit for records nobody would see
+        self.min_level = min(self.file_level, self.console_level)
+
+        # Token bucket for console lines
+        self.console_rate = console_rate
+        self.console_burst = console_burst
+        self.tokens = float(console_burst)
+        self.last_refill = time.monotonic()
+
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.records = 0
+        self.dropped = 0
+        self.suppressed = 0
+        self.unreported = 0
+        self.write_errors = 0
+        self.thread = threading.Thread(target=self._writer_loop, name='log', daemon=True)
+        self.thread.start()
+
+    def log(self, level, message, **fields):
+        """Queue a record (never blocks)"""
+        level = level_number(level)
+        if level < self.min_level:
+            return
+        fields['t'] = round(self.now(), 3)
+        fields['level'] = level
+        fields['msg'] = message
+        try:
+            self.queue.put_nowait(fields)
+        except queue.Full:
+            self.dropped += 1
+
+    def debug(self, message, **fields):
+        self.log(10, message, **fields)
+
+    def info(self, message, **fields):
+        self.log(20, message, **fields)
+
+    def warning(self, message, **fields):
+        self.log(30, message, **fields)
+
+    def error(self, message, **fields):
+        self.log(40, message, **fields)
+
+    def _console_allows(self, level):
+        if level >= LEVELS['warning']:
+            return True
+        now = time.monotonic()
+        self.tokens = min(self.console_burst, self.tokens + (now - self.last_refill) * self.console_rate)
+        self.last_refill = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def _write(self, records):
+        file_lines = []
+        console_lines = []
+        names = {number: name for name, number in LEVELS.items()}
+        self.records += len(records)
+        for record in records:
+            level = record['level']
+            if level >= self.file_level:
+                entry = {'t': record['t'], 'level': names.get(level, level), 'msg': record['msg'].strip()}
+                entry.update((k, v) for k, v in record.items() if k not in entry)
+                file_lines.append(json.dumps(entry, ensure_ascii=False, default=str) + '\n')
+            if level >= self.console_level:
+                if self._console_allows(level):
+                    if self.unreported:
+                        where = f" (all in {self.file.path})" if self.file else ""
+                        console_lines.append(f"   … {self.unreported} log lines not shown{where}\n")
+                        self.unreported = 0
+                    console_lines.append(record['msg'] + '\n')
+                else:
+                    self.suppressed += 1
+                    self.unreported += 1
+        if file_lines:
+            try:
+                self.file.write(file_lines)
+            except OSError as e:
+                self.write_errors += 1
+                if self.write_errors == 1:
+                    console_lines.append(f"⚠️  Writing the log file failed: {e}\n")
+        if console_lines:
+            # One write per batch instead of one per line (slow terminals)
+            sys.stdout.write(''.join(console_lines))
+            sys.stdout.flush()
+
+    def _writer_loop(self):
+        while True:
+            item = self.queue.get()
+            batch = [item]
+            # Drain whatever else is queued into the same write
+            while len(batch) < 500:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            records = [r for r in batch if r is not _STOP]
+            try:
+                if records:
+                    self._write(records)
+            except Exception:
+                self.write_errors += 1
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+            if len(records) != len(batch):
+                return
+
+    def flush(self):
+        """Wait until everything queued so far is written"""
+        if self.thread.is_alive():
+            self.queue.join()
+
+    def close(self):
+        if self.thread.is_alive():
+            self.queue.put(_STOP)
+            self.thread.join()
+        if self.file is not None:
+            self.file.close()
+
+    def stats(self):
+        return {
+            'records': self.records,
+            'dropped': self.dropped,
+            'suppressed': self.suppressed,
+            'rotations': self.file.rotations if self.file else 0,
+        }
@@ -0,0 +1,154 @@
+"""
+Resident tesseract engine
+Used by android-automation.py instead of pytesseract, which starts the
+tesseract binary and writes a temp image for every OCR call
+
+The engine loads the language data once and keeps the single-line page
+mode and character whitelist configured, so each read only pays for the
+recognition itself. Two bindings are tried:
+- tesserocr (pip install tesserocr)
+- libtesseract through ctypes (pkg install tesseract on Termux ships it)
+"""
+
+import ctypes
+import ctypes.util
+import os
+import threading
+
+from startup import lazy_module, module_available
+
+tesserocr = lazy_module('tesserocr')
+TESSEROCR_AVAILABLE = module_available('tesserocr')
+
+
+PSM_SINGLE_BLOCK = 6
+PSM_SINGLE_LINE = 7
+DEFAULT_WHITELIST = '0123456789/:$'
+
+# Where libtesseract lives when find_library() cannot see it (Termux)
+LIBRARY_PATHS = [
+    '/data/data/com.termux/files/usr/lib/libtesseract.so',
+]
+
+
+def find_tesseract_library():
+    """Path of libtesseract, or None"""
+    for path in LIBRARY_PATHS:
+        if os.path.exists(path):
+            return path
+    return ctypes.util.find_library('tesseract')
+
+
+def resident_tesseract_available():
+    return TESSEROCR_AVAILABLE or find_tesseract_library() is not None
+
+
+class TesserocrEngine:
+    """Resident engine through the tesserocr binding"""
+
+    name = 'tesserocr'
+
+    def __init__(self, lang='eng', psm=PSM_SINGLE_LINE, whitelist=DEFAULT_WHITELIST):
+        self.psm = psm
+        self.api = tesserocr.PyTessBaseAPI(lang=lang, psm=psm)
+        self.api.SetVariable('tessedit_char_whitelist', whitelist)
+        self.lock = threading.Lock()
+
+    def read(self, image, psm=None):
+        """OCR a grayscale PIL image, returns {'text', 'confidence'}
+
+        psm overrides the page segmentation mode for this call only
+        (e.g. PSM_SINGLE_BLOCK for a multi-line strip).
+        """
+        with self.lock:
+            if psm is not None:
+                self.api.SetPageSegMode(psm)
+            self.api.SetImage(image)
+            text = self.api.GetUTF8Text()
+            confidence = self.api.MeanTextConf()
+            if psm is not None:
+                self.api.SetPageSegMode(self.psm)
+        return {'text': text.strip(), 'confidence': confidence / 100.0}
+
+    def close(self):
+        self.api.End()
+
+
+class LibTesseractEngine:
+    """Resident engine through the libtesseract C API (ctypes)"""
+
+    name = 'libtesseract'
+
+    def __init__(self, lang='eng', psm=PSM_SINGLE_LINE, whitelist=DEFAULT_WHITELIST, library=None):
+        library = library or find_tesseract_library()
+        if library is None:
+            raise RuntimeError("libtesseract not found")
+        lib = ctypes.CDLL(library)
+
+        lib.TessBaseAPICreate.restype = ctypes.c_void_p
+        lib.TessBaseAPIInit3.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_char_p]
+        lib.TessBaseAPIInit3.restype = ctypes.c_int
+        lib.TessBaseAPISetPageSegMode.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        lib.TessBaseAPISetVariable.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_char_p]
+        lib.TessBaseAPISetImage.argtypes = [ctypes.c_void_p, ctypes.c_void_p,
+                                            ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int]
+        lib.TessBaseAPIGetUTF8Text.argtypes = [ctypes.c_void_p]
+        lib.TessBaseAPIGetUTF8Text.restype = ctypes.c_void_p
+        lib.TessBaseAPIMeanTextConf.argtypes = [ctypes.c_void_p]
+        lib.TessBaseAPIMeanTextConf.restype = ctypes.c_int
+        lib.TessDeleteText.argtypes = [ctypes.c_void_p]
+        lib.TessBaseAPIEnd.argtypes = [ctypes.c_void_p]
+        lib.TessBaseAPIDelete.argtypes = [ctypes.c_void_p]
+
+        self.lib = lib
+        self.handle = lib.TessBaseAPICreate()
+        if lib.TessBaseAPIInit3(self.handle, None, lang.encode()) != 0:
+            lib.TessBaseAPIDelete(self.handle)
+            raise RuntimeError(f"Could not load tesseract language data '{lang}'")
+        lib.TessBaseAPISetPageSegMode(self.handle, psm)
+        lib.TessBaseAPISetVariable(self.handle, b'tessedit_char_whitelist', whitelist.encode())
+        self.psm = psm
+        self.lock = threading.Lock()
+
+    def read(self, image, psm=None):
+        """OCR a grayscale PIL image, returns {'text', 'confidence'}
+
+        psm overrides the page segmentation mode for this call only.
+        """
+        if image.mode != 'L':
+            image = image.convert('L')
+        data = image.tobytes()
+        with self.lock:
+            if psm is not None:
+                self.lib.TessBaseAPISetPageSegMode(self.handle, psm)
+            self.lib.TessBaseAPISetImage(self.handle, data, image.width, image.height, 1, image.width)
+            pointer = self.lib.TessBaseAPIGetUTF8Text(self.handle)
+            confidence = self.lib.TessBaseAPIMeanTextConf(self.handle)
+            if psm is not None:
+                self.lib.TessBaseAPISetPageSegMode(self.handle, self.psm)
+        if not pointer:
+            return {'text': '', 'confidence': 0}
+        text = ctypes.string_at(pointer).decode('utf-8', errors='replace')
+        self.lib.TessDeleteText(pointer)
+        return {'text': text.strip(), 'confidence': confidence / 100.0}
+
+    def close(self):
+        if self.handle:
+            self.lib.TessBaseAPIEnd(self.handle)
+            self.lib.TessBaseAPIDelete(self.handle)
+            self.handle = None
+
+
+def create_resident_tesseract(lang='eng', psm=PSM_SINGLE_LINE, whitelist=DEFAULT_WHITELIST):
+    """Start the fastest available resident engine, or return None"""
+    if TESSEROCR_AVAILABLE:
+        try:
+            return TesserocrEngine(lang, psm, whitelist)
+        except Exception as e:
+            print(f"⚠️  tesserocr failed to start: {e}")
+    if find_tesseract_library():
+        try:
+            return LibTesseractEngine(lang, psm, whitelist)
+        except Exception as e:
+            print(f"⚠️  libtesseract failed to start: {e}")
+    return None
@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+import backend_select
+from backend_select import BackendSelector
+
+
+@pytest.fixture
+def selector(tmp_path, monkeypatch):
+    monkeypatch.setattr(backend_select, 'device_serial', lambda u2_backend=None: 'serial1')
+    selector = BackendSelector(str(tmp_path / 'choice.json'), use_uiautomator=False)
+    latencies = {'raw': 0.05, 'png': 0.4, 'sendevent': 0.002, 'input': 0.01}
+    selector.probed = []
+
+    def probe(name):
+        selector.probed.append(name)
+        return latencies.get(name)
+    monkeypatch.setattr(selector, 'probe_capture', probe)
+    monkeypatch.setattr(selector, 'probe_tap', probe)
+    return selector
+
+
+def test_unset_methods_are_probed_and_cached(selector):
+    backend, choice = selector.select()
+    assert (choice['capture'], choice['tap']) == ('raw', 'sendevent')
+    assert set(selector.probed) == {'uiautomator2', 'raw', 'png', 'sendevent', 'input'}
+    with open(selector.cache_file) as f:
+        assert json.load(f)['serial1']['tap'] == 'sendevent'
+
+
+def test_configured_methods_are_not_probed(selector):
+    backend, choice = selector.select(capture='png', tap='input')
+    assert choice == {'capture': 'png', 'tap': 'input'}
+    assert backend.raw_screencap is None
+    assert backend.tap_method == 'input'
+    assert selector.probed == []
+
+
+def test_only_the_unset_method_is_probed(selector):
+    backend, choice = selector.select(capture='png')
+    assert (choice['capture'], choice['tap']) == ('png', 'sendevent')
+    assert set(selector.probed) == {'uiautomator2', 'sendevent', 'input'}
+    with open(selector.cache_file) as f:
+        cached = json.load(f)['serial1']
+    # The configured capture is not cached as the measured winner
+    assert 'capture' not in cached and cached['tap'] == 'sendevent'
+
+    selector.probed.clear()
+    backend, choice = selector.select(tap='input')
+    assert (choice['capture'], choice['tap']) == ('raw', 'input')
+    assert set(selector.probed) == {'uiautomator2', 'raw', 'png'}
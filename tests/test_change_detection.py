@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+
+from change_detection import RegionChangeDetector
+
+
+def render(text):
+    image = Image.new('RGB', (120, 30), (255, 255, 255))
+    ImageDraw.Draw(image).text((5, 8), text, fill=(0, 0, 0))
+    return np.asarray(image)
+
+
+def test_unchanged_region_reuses_the_previous_result():
+    detector = RegionChangeDetector(stride=2)
+    pixels = np.zeros((20, 20, 3), np.uint8)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return len(calls)
+
+    assert detector.gated('step', pixels, compute) == 1
+    assert detector.gated('step', pixels.copy(), compute) == 1
+    changed = pixels.copy()
+    changed[:10] = 200
+    assert detector.gated('step', changed, compute) == 2
+    assert detector.skip_ratios() == {'step': 1 / 3}
+
+
+@pytest.mark.parametrize('before, after', [
+    ('10/20', '16/20'), ('19/20', '18/20'), ('$15', '$16'), ('$8', '$9'), ('5', '6'),
+])
+def test_one_digit_edit_is_a_change(before, after):
+    detector = RegionChangeDetector()
+    detector.gated('text', render(before), lambda: before, stride=1)
+    assert detector.gated('text', render(after), lambda: after, stride=1) == after
+
+
+def test_small_noise_is_not_a_change():
+    detector = RegionChangeDetector(stride=1)
+    pixels = np.full((10, 10), 100, np.uint8)
+    detector.gated('amount', pixels, lambda: 'a')
+    noisy = pixels + np.random.default_rng(0).integers(0, 8, pixels.shape, dtype=np.uint8)
+    assert not detector.changed('amount', noisy)
+
+
+def test_failed_read_is_retried_on_the_same_pixels():
+    detector = RegionChangeDetector(stride=1)
+    detector.gated('timer', render('1:00'), lambda: '1:00')
+
+    def failing():
+        raise RuntimeError('ocr crashed')
+
+    with pytest.raises(RuntimeError):
+        detector.gated('timer', render('0:59'), failing)
+    assert detector.gated('timer', render('0:59'), lambda: '0:59') == '0:59'
+
+
+def test_forget_forces_a_new_result():
+    detector = RegionChangeDetector()
+    pixels = np.zeros((8, 8), np.uint8)
+    detector.gated('timer', pixels, lambda: 'a')
+    detector.forget('timer')
+    assert detector.gated('timer', pixels, lambda: 'b') == 'b'
@@ -0,0 +1,58 @@
+import numpy as np
+
+from debug_frames import DebugFrameWriter
+from frames import Frame
+
+
+def frame(t):
+    return Frame(np.zeros((20, 10, 3), np.uint8), timestamp=t)
+
+
+def names(directory):
+    return sorted(p.name for p in directory.iterdir()) if directory.is_dir() else []
+
+
+def test_anomalies_leave_existing_screenshots_alone(tmp_path):
+    for i in range(250):
+        (tmp_path / f"screenshot_{i}.png").write_bytes(b'png')
+    writer = DebugFrameWriter(tmp_path, max_frames=200)
+    writer.anomaly(frame(1.0), 'reset_failed')
+    writer.close()
+    assert len([p for p in tmp_path.iterdir() if p.name.startswith('screenshot_')]) == 250
+    assert names(tmp_path / 'anomalies') == ['anomaly_1000_reset_failed.png']
+    assert writer.stats()['deleted'] == 0
+
+
+def test_captures_are_a_ring_buffer(tmp_path):
+    (tmp_path / "screenshot_1.png").write_bytes(b'png')
+    writer = DebugFrameWriter(tmp_path, max_frames=3)
+    for t in range(5):
+        writer.save(frame(t + 1))
+        writer.flush()
+    writer.close()
+    assert names(tmp_path / 'debug') == ['frame_3000.png', 'frame_4000.png', 'frame_5000.png']
+    assert (tmp_path / "screenshot_1.png").exists()
+    assert writer.stats()['written'] == 5
+
+
+def test_earlier_runs_are_trimmed_once_a_capture_is_saved(tmp_path):
+    debug = tmp_path / 'debug'
+    debug.mkdir()
+    for i in range(5):
+        (debug / f"frame_{i}.png").write_bytes(b'png')
+    writer = DebugFrameWriter(tmp_path, max_frames=2)
+    writer.anomaly(frame(1.0), 'error')
+    writer.flush()
+    assert len(names(debug)) == 5
+    writer.save(frame(10.0))
+    writer.close()
+    assert names(debug) == ['frame_10000.png', 'frame_4.png']
+
+
+def test_anomaly_limit_and_names(tmp_path):
+    writer = DebugFrameWriter(tmp_path, max_anomalies=2)
+    for t in range(4):
+        writer.anomaly(frame(t + 1), 'Timer reset!')
+        writer.flush()
+    writer.close()
+    assert names(tmp_path / 'anomalies') == ['anomaly_3000_timer_reset.png', 'anomaly_4000_timer_reset.png']
@@ -0,0 +1,17 @@
+import subprocess
+
+import device_backend
+from device_backend import ShellBackend
+
+
+def test_shell_serial_is_read_once(monkeypatch):
+    calls = []
+
+    def run_shell(command, timeout=None):
+        calls.append(command)
+        return subprocess.CompletedProcess(command, 0, stdout='abc123\n', stderr='')
+    monkeypatch.setattr(device_backend, 'run_shell', run_shell)
+    backend = ShellBackend(capture_method='png')
+    assert backend.serial == 'abc123'
+    assert backend.serial == 'abc123'
+    assert calls == ['getprop ro.serialno']
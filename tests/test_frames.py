@@ -0,0 +1,22 @@
+import numpy as np
+import pytest
+
+from clock import VirtualClock
+from frames import Frame, FrameCache
+
+
+def test_age_and_cache_follow_the_virtual_clock():
+    clock = VirtualClock(wall_start=1000.0)
+    captures = []
+
+    def capture():
+        captures.append(1)
+        return Frame(np.zeros((4, 4, 3), np.uint8), timestamp=clock.time())
+    cache = FrameCache(capture, ttl=0.5, now=clock.time)
+    frame = cache.get()
+    clock.advance(0.3)
+    assert frame.age(clock.time) == pytest.approx(0.3)
+    assert cache.get() is frame
+    clock.advance(0.3)
+    assert cache.get() is not frame
+    assert len(captures) == 2
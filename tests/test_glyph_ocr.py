@@ -0,0 +1,14 @@
+import numpy as np
+
+import glyph_ocr
+from glyph_ocr import GlyphSampleWriter
+
+
+def test_samples_stored_in_the_same_millisecond_keep_their_own_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(glyph_ocr.time, 'time', lambda: 1000.0)
+    writer = GlyphSampleWriter(tmp_path)
+    writer.add(np.zeros((10, 20), np.uint8), '1/20')
+    writer.add(np.full((10, 20), 255, np.uint8), '$5')
+    rows = [line.split('\t') for line in (tmp_path / 'labels.tsv').read_text().splitlines()]
+    assert len({name for name, _ in rows}) == 2
+    assert all((tmp_path / name).exists() for name, _ in rows)
@@ -0,0 +1,35 @@
+import shutil
+
+import pytest
+
+from input_injection import LatencyStats, ShellSession, sequence_script, sequence_timeout
+
+
+def test_sequence_script_sleeps_on_the_device():
+    steps = [(10, 20, 0.5), (30.7, 40, 0)]
+    assert sequence_script(steps) == 'input tap 10 20; sleep 0.5; input tap 30 40'
+    assert sequence_timeout(steps) == 5 + 0.5 + 2 * 2.0
+
+
+def test_latency_stats_keep_the_recent_samples():
+    stats = LatencyStats(size=3)
+    for seconds in (0.1, 0.001, 0.002, 0.003):
+        stats.add(seconds)
+    summary = stats.summary()
+    assert summary['count'] == 4
+    assert summary['max_ms'] == pytest.approx(3.0)
+    assert summary['p50_ms'] == pytest.approx(2.0)
+
+
+@pytest.mark.skipif(shutil.which('sh') is None, reason="needs sh")
+def test_shell_session_runs_commands_in_one_process():
+    session = ShellSession()
+    try:
+        assert session.run('echo hello') == 'hello\n'
+        pid = session.process.pid
+        session.run('X=1')
+        assert session.run('echo $X') == '1\n'
+        assert session.process.pid == pid
+    finally:
+        session.close()
+    assert not session.alive
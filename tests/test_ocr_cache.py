@@ -0,0 +1,39 @@
+import numpy as np
+
+from ocr_cache import OCRCache, crop_key
+
+
+def test_crop_key_depends_on_pixels_engine_and_shape():
+    crop = np.zeros((4, 16), np.uint8)
+    other = crop.copy()
+    other[0, 0] = 255
+    assert crop_key(crop, 'template') == crop_key(crop.copy(), 'template')
+    assert crop_key(crop, 'template') != crop_key(other, 'template')
+    assert crop_key(crop, 'template') != crop_key(crop, 'easyocr')
+    assert crop_key(crop) != crop_key(np.zeros((8, 8), np.uint8))
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = OCRCache(max_size=2)
+    cache.put('a', {'text': '1'})
+    cache.put('b', {'text': '2'})
+    assert cache.get('a') == {'text': '1'}
+    cache.put('c', {'text': '3'})
+    assert cache.get('b') is None
+    assert cache.get('a') is not None
+    stats = cache.stats()
+    assert (stats['size'], stats['evictions'], stats['hits'], stats['misses']) == (2, 1, 2, 1)
+
+
+def test_entries_survive_a_restart(tmp_path):
+    path = tmp_path / 'ocr_cache.json'
+    cache = OCRCache(path=path)
+    cache.put('a', {'text': '10/20', 'confidence': 90})
+    cache.save()
+    assert OCRCache(path=path).get('a') == {'text': '10/20', 'confidence': 90}
+
+
+def test_bad_cache_file_is_ignored(tmp_path):
+    path = tmp_path / 'ocr_cache.json'
+    path.write_text('not json')
+    assert OCRCache(path=path).stats()['size'] == 0
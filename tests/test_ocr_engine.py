@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+import replay
+from clock import VirtualClock
+from device_backend import FakeDevice
+from frames import Frame
+
+
+@pytest.fixture
+def automation(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    automation_class = replay.load_automation_class()
+    # Only the resident engine was found, and it does not start
+    module = automation_class.__init__.__globals__
+    monkeypatch.setitem(module, 'PYTESSERACT_AVAILABLE', False)
+    monkeypatch.setitem(module, 'create_resident_tesseract', lambda whitelist=None: None)
+    clock = VirtualClock()
+    frames = [np.full((100, 100, 3), 255, np.uint8)]
+    automation = automation_class(backend=FakeDevice(frames, clock=clock), clock=clock, read_only=True)
+    automation.ocr_engine = 'pytesseract'
+    automation.ocr_workers = 0
+    automation.ocr_cache = None
+    automation.change_detector = None
+    return automation, module
+
+
+def test_ocr_is_disabled_without_any_tesseract(automation, monkeypatch):
+    automation, module = automation
+    monkeypatch.setitem(module, 'EASYOCR_AVAILABLE', False)
+    frame = Frame(np.zeros((100, 100, 3), np.uint8))
+    assert automation.recognize_text(frame, (10, 10, 50, 20)) == {'text': '', 'confidence': 0}
+    assert automation.recognize_regions(frame, {'step': (10, 10, 50, 20), 'amount': (10, 40, 50, 20)}) == {
+        'step': {'text': '', 'confidence': 0}, 'amount': {'text': '', 'confidence': 0}}
+    assert automation.ocr_engine is None
+
+
+def test_easyocr_takes_over_without_any_tesseract(automation, monkeypatch):
+    automation, module = automation
+    monkeypatch.setitem(module, 'EASYOCR_AVAILABLE', True)
+    automation.get_resident_tesseract()
+    assert automation.ocr_engine == 'easyocr'
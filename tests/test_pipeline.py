@@ -0,0 +1,81 @@
+import time
+
+import numpy as np
+
+from clock import VirtualClock
+from frames import Frame
+from pipeline import DropOldestQueue, Pipeline
+
+
+def counting_capture(clock=None):
+    calls = []
+
+    def capture():
+        calls.append(1)
+        return Frame(np.zeros((4, 4, 3), np.uint8), timestamp=clock.time() if clock else None)
+    return capture, calls
+
+
+def test_drop_oldest_queue():
+    queue = DropOldestQueue(2)
+    assert not queue.put(1)
+    assert not queue.put(2)
+    assert queue.put(3)
+    assert queue.get(0) == 2
+    assert queue.stats()['dropped'] == 1
+
+
+def test_captures_are_paced():
+    capture, calls = counting_capture()
+    pipeline = Pipeline(capture, lambda frame: {}, interval=0.2).start()
+    time.sleep(0.5)
+    pipeline.stop()
+    assert 1 <= len(calls) <= 4
+
+
+def test_waiting_for_a_frame_wakes_the_capture_thread():
+    capture, calls = counting_capture()
+    pipeline = Pipeline(capture, lambda frame: {}, interval=30).start()
+    try:
+        assert pipeline.frame(timeout=2) is not None
+        started = time.time()
+        assert pipeline.frame(after=started, timeout=2) is not None
+        assert time.time() - started < 1
+    finally:
+        pipeline.stop()
+
+
+def test_no_captures_while_paused():
+    capture, calls = counting_capture()
+    pipeline = Pipeline(capture, lambda frame: {}, interval=0.01).start()
+    try:
+        with pipeline.paused():
+            assert not pipeline.serving
+            time.sleep(0.05)
+            before = len(calls)
+            time.sleep(0.3)
+            assert len(calls) == before
+        assert pipeline.serving
+    finally:
+        pipeline.stop()
+
+
+def test_timestamps_come_from_the_clock():
+    clock = VirtualClock(wall_start=1000.0)
+    capture, calls = counting_capture(clock)
+    pipeline = Pipeline(capture, lambda frame: {'ok': True}, clock=clock).start()
+    try:
+        state = pipeline.state(after=1000.0, timeout=2)
+        assert state.timestamp == 1000.0
+        assert state.analysed_at == 1000.0
+    finally:
+        pipeline.stop()
+
+
+def test_analysis_takes_the_newest_frame():
+    queue = DropOldestQueue(3)
+    for item in (1, 2, 3):
+        queue.put(item)
+    assert queue.get_newest(0) == 3
+    assert len(queue) == 0
+    assert queue.stats()['skipped'] == 2
@@ -0,0 +1,78 @@
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import replay
+from clock import VirtualClock
+from device_backend import FakeDevice
+
+
+class TimedClock(VirtualClock):
+    """Virtual clock that ends the run after limit seconds"""
+
+    def __init__(self, limit, **kwargs):
+        super().__init__(**kwargs)
+        self.limit = limit
+
+    def sleep(self, seconds):
+        super().sleep(seconds)
+        if self.now > self.limit:
+            raise KeyboardInterrupt
+
+
+def screens():
+    frames = []
+    for i in range(4):
+        array = np.full((1000, 600, 3), 255, np.uint8)
+        array[370:395, 220:340] = (0, 0, 200) if i % 2 else (200, 0, 0)
+        frames.append(array)
+    return frames
+
+
+def test_compare_taps_reports_moved_and_extra_taps():
+    recorded = [(0.0, 10, 10), (1.0, 20, 20), (2.0, 30, 30)]
+    replayed = [(0.5, 10, 10), (1.5, 20, 20), (2.5, 40, 40), (3.0, 30, 30)]
+    result = replay.compare_taps(recorded, replayed, time_tolerance=0.75)
+    assert result['divergences'] == [{'recorded': None, 'replayed': (2.5, 40, 40)}]
+    assert result['matched'] == 3
+    assert result['mean_shift'] == pytest.approx(2 / 3)
+    assert result['late_or_early'] == 1
+
+
+def test_recorded_run_replays_without_divergences(tmp_path, monkeypatch):
+    # No config file and the run log stays out of the checkout
+    monkeypatch.chdir(tmp_path)
+    clock = TimedClock(60, wall_start=1.7e9)
+    device = FakeDevice(screens(), clock=clock, capture_delay=0.05, tap_delay=0.01)
+    automation = replay.load_automation_class()(None, backend=device, clock=clock)
+    automation.use_pipeline = False
+    automation.ocr_workers = 0
+    automation.ocr_cache = None
+    automation.save_screenshots = False
+    automation.save_anomalies = False
+    automation.trace_dir = str(tmp_path / 'traces')
+    reads = []
+
+    def reader(binary):
+        reads.append(1)
+        return {'text': '$1' if len(reads) < 40 else '20/20', 'confidence': 90}
+
+    automation.ocr_engine = 'scripted'
+    automation.ocr_reader = reader
+    automation.run()
+
+    automation.log.close()
+    shutil.rmtree(tmp_path / 'logs')
+    trace, = (tmp_path / 'traces').glob('*.trc')
+    written = sorted(tmp_path.rglob('*'))
+    created = lambda *args, **kwargs: pytest.fail("replay created a directory")
+    monkeypatch.setattr(Path, 'mkdir', created)
+    monkeypatch.setattr(os, 'makedirs', created)
+    report = replay.replay(trace)
+    assert sorted(tmp_path.rglob('*')) == written
+    assert report['recorded_taps'] > 0
+    assert report['divergences'] == []
+    assert report['matched'] == report['recorded_taps'] == report['replayed_taps']
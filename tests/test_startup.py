@@ -0,0 +1,12 @@
+from startup import STARTUP, lazy_module
+
+
+def test_one_lazy_module_per_name():
+    assert lazy_module('json') is lazy_module('json')
+
+
+def test_an_import_is_timed_once():
+    before = len(STARTUP.steps)
+    lazy_module('colorsys').rgb_to_hsv(0, 0, 0)
+    lazy_module('colorsys').hsv_to_rgb(0, 0, 0)
+    assert [step['name'] for step in STARTUP.steps[before:]] == ['colorsys']
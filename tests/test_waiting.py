@@ -0,0 +1,83 @@
+import numpy as np
+
+from clock import VirtualClock
+from frames import Frame
+from waiting import PollPolicy, ScreenSettled, changed_fraction, wait_until
+
+BUTTON = (220, 370, 120, 25)
+
+
+def screen(button_color=(200, 0, 0), timestamp=0.0):
+    pixels = np.full((1000, 600, 3), 255, np.uint8)
+    x, y, w, h = BUTTON
+    pixels[y:y + h, x:x + w] = button_color
+    return Frame(pixels, timestamp=timestamp)
+
+
+def test_changed_fraction():
+    a = np.zeros((10, 10, 3), np.uint8)
+    b = a.copy()
+    b[:5, :2] = 100
+    assert changed_fraction(a, a) == 0.0
+    assert changed_fraction(a, b) == 0.1
+    # Small differences (noise, compression) do not count
+    assert changed_fraction(a, a + 10) == 0.0
+    assert changed_fraction(a, np.zeros((5, 5, 3), np.uint8)) == 1.0
+
+
+def test_region_sized_change_ends_the_wait_early():
+    reference = screen()
+    clock = VirtualClock()
+    predicate = ScreenSettled(reference, regions=[BUTTON], stable_polls=2, stable_for=0.2)
+    blue = lambda: screen((0, 0, 200), clock.now)
+    result = wait_until(lambda: predicate(blue()), 5, PollPolicy(0.1, 1.0, 0.1),
+                        sleep=clock.sleep, now=clock.monotonic)
+    assert result.ok
+    assert result.polls == 3
+    assert clock.now < 1
+
+
+def test_region_sized_change_is_too_small_for_the_whole_screen():
+    reference = screen()
+    predicate = ScreenSettled(reference)
+    assert not predicate(screen((0, 0, 200)))
+    assert not predicate.changed
+
+
+def test_unchanged_screen_times_out():
+    reference = screen()
+    clock = VirtualClock()
+    predicate = ScreenSettled(reference, regions=[BUTTON])
+    result = wait_until(lambda: predicate(screen()), 2, sleep=clock.sleep, now=clock.monotonic)
+    assert not result.ok
+    assert clock.now >= 2
+
+
+def test_settles_only_once_the_screen_stops_changing():
+    reference = screen()
+    predicate = ScreenSettled(reference, regions=[BUTTON], stable_polls=2, stable_for=0.3)
+    assert not predicate(screen((0, 0, 200), 0.0))
+    assert not predicate(screen((0, 200, 0), 0.1))
+    assert not predicate(screen((0, 200, 0), 0.2))
+    assert not predicate(screen((0, 200, 0), 0.3))
+    assert predicate(screen((0, 200, 0), 0.4))
+
+
+def test_a_transition_holding_one_picture_is_not_settled():
+    reference = screen()
+    predicate = ScreenSettled(reference, regions=[BUTTON], stable_polls=2, stable_for=0.3)
+    # Pressed look for 0.15 s, then the new screen
+    assert not predicate(screen((100, 100, 100), 0.05))
+    assert not predicate(screen((100, 100, 100), 0.1))
+    assert not predicate(screen((100, 100, 100), 0.15))
+    assert not predicate(screen((0, 0, 200), 0.2))
+    assert not predicate(screen((0, 0, 200), 0.3))
+    assert predicate(screen((0, 0, 200), 0.5))
+
+
+def test_a_slow_fade_is_not_settled():
+    reference = screen()
+    predicate = ScreenSettled(reference, regions=[BUTTON], stable_polls=2, stable_for=0.0)
+    # 20 levels per poll, below the per-pixel delta, but adding up
+    settled = [predicate(screen((200 - 20 * i, 0, 20 * i), 0.05 * i)) for i in range(1, 11)]
+    assert not any(settled[:-2])
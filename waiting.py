@@ -0,0 +1,156 @@
+"""
+Event-driven waiting
+Used by android-automation.py instead of fixed sleeps: poll until a
+condition holds (screen settled, color matched, text matched) or the
+timeout runs out, backing off between polls
+
+Every wait returns a WaitResult with how long it actually took, so the
+time saved over the old fixed sleeps can be measured.
+"""
+
+import time
+
+from startup import lazy_module
+
+np = lazy_module('numpy')
+
+
+class PollPolicy:
+    """Delay between polls, growing by `factor` from `initial` up to `maximum`"""
+
+    def __init__(self, initial=0.05, factor=1.5, maximum=0.5):
+        self.initial = initial
+        self.factor = factor
+        self.maximum = maximum
+
+    def delays(self):
+        delay = self.initial
+        while True:
+            yield delay
+            delay = min(delay * self.factor, self.maximum)
+
+
+class WaitResult:
+    """Outcome of one wait_until() call"""
+
+    def __init__(self, name, ok, elapsed, polls, timeout, value=None):
+        self.name = name
+        self.ok = ok
+        self.elapsed = elapsed
+        self.polls = polls
+        self.timeout = timeout
+        self.value = value
+
+    def __bool__(self):
+        return self.ok
+
+    def __repr__(self):
+        state = "ok" if self.ok else "timeout"
+        return f"<WaitResult {self.name}: {state} after {self.elapsed:.3f}s, {self.polls} polls>"
+
+
+def wait_until(predicate, timeout, poll_policy=None, name='wait', sleep=time.sleep, now=time.monotonic):
+    """Call predicate() until it returns something truthy or timeout seconds pass"""
+    poll_policy = poll_policy or PollPolicy()
+    started = now()
+    deadline = started + timeout
+    polls = 0
+    for delay in poll_policy.delays():
+        polls += 1
+        value = predicate()
+        if value:
+            return WaitResult(name, True, now() - started, polls, timeout, value)
+        remaining = deadline - now()
+        if remaining <= 0:
+            return WaitResult(name, False, now() - started, polls, timeout)
+        sleep(min(delay, remaining))
+
+
+def frame_difference(a, b, stride=8):
+    """Mean absolute difference of two frames (or crops) on a strided sample"""
+    sample_a = a[::stride, ::stride]
+    sample_b = b[::stride, ::stride]
+    if sample_a.shape != sample_b.shape:
+        return float('inf')
+    return float(np.abs(sample_a.astype(np.int16) - sample_b).mean())
+
+
+def changed_fraction(a, b, stride=1, delta=32):
+    """Share of (strided) pixels whose largest channel difference is above delta"""
+    sample_a = a[::stride, ::stride]
+    sample_b = b[::stride, ::stride]
+    if sample_a.shape != sample_b.shape:
+        return 1.0
+    diff = np.abs(sample_a.astype(np.int16) - sample_b)
+    if diff.ndim == 3:
+        diff = diff.max(axis=2)
+    return float((diff > delta).mean())
+
+
+class ScreenSettled:
+    """Predicate on frames: the screen changed from `reference` and stopped changing
+
+    Pass a region to only watch part of the screen. Change is the share
+    of pixels that changed noticeably, measured over the screen (or region)
+    and separately over each of `regions` (button, step text, ...), so a
+    change confined to a small region is not lost in the whole screen.
+
+    Stopped means `stable_polls` polls in a row and at least `stable_for`
+    seconds (frame timestamps) without a change: a transition can hold
+    one picture for a poll or two before it moves on.
+    """
+
+    def __init__(self, reference, region=None, regions=(), threshold=0.01, stride=8, delta=32,
+                 stable_polls=2, stable_for=0.3):
+        # (region, stride) pairs: the screen sampled sparsely, small regions in full
+        self.areas = [(region, stride)] + [(r, 1) for r in regions]
+        self.threshold = threshold
+        self.delta = delta
+        self.stable_polls = stable_polls
+        self.stable_for = stable_for
+        self.reference = self._pixels(reference) if reference is not None else None
+        self.changed = reference is None
+        # Pixels and time of the first frame since the last change, and the polls that matched it
+        self.since = None
+        self.since_time = None
+        self.stable = 0
+        self.frame = None  # the last frame looked at (the settled one once it returns True)
+
+    def _pixels(self, frame):
+        return [frame.crop(region) if region else frame.array for region, _ in self.areas]
+
+    def _differs(self, pixels, other):
+        return any(changed_fraction(a, b, stride, self.delta) > self.threshold
+                   for a, b, (_, stride) in zip(pixels, other, self.areas))
+
+    def __call__(self, frame):
+        self.frame = frame
+        pixels = self._pixels(frame)
+        if not self.changed:
+            self.changed = self._differs(pixels, self.reference)
+        # Compared with the start of the still run, so a slow fade is not taken for a still screen
+        if self.since is None or self._differs(pixels, self.since):
+            self.since = pixels
+            self.since_time = frame.timestamp
+            self.stable = 0
+            return False
+        self.stable += 1
+        return (self.changed and self.stable >= self.stable_polls
+                and frame.timestamp - self.since_time >= self.stable_for)
+
+
+def summarize_waits(results):
+    """Per-name count, mean/max elapsed and timeouts of WaitResults"""
+    summary = {}
+    for result in results:
+        entry = summary.setdefault(result.name, {'count': 0, 'total': 0.0, 'max': 0.0,
+                                                 'timeouts': 0, 'budget': 0.0})
+        entry['count'] += 1
+        entry['total'] += result.elapsed
+        entry['max'] = max(entry['max'], result.elapsed)
+        entry['budget'] += result.timeout
+        if not result.ok:
+            entry['timeouts'] += 1
+    for entry in summary.values():
+        entry['mean'] = entry['total'] / entry['count']
+    return summary